@@ -39,14 +39,12 @@ REVENUES_CATEGORIES = {
 def init_country(qt = False):  # drop_survey_only_variables = False, simulate_f6de = False, start_from = 'imposable'
     """Create a country-specific TaxBenefitSystem."""
     # from openfisca_core.columns import FloatCol
-    from openfisca_core.taxbenefitsystems import LegacyTaxBenefitSystem
+    from openfisca_core.taxbenefitsystems import LegacyTaxBenefitSystem, XmlBasedTaxBenefitSystem
     if qt:
         from openfisca_qt import widgets as qt_widgets
 
-    from . import decompositions, entities, scenarios
+    from . import decompositions, entities, formulas_registry, legislation_cache, legislation_pool, scenarios
     from .model import datatrees
-    from .model import input_variables  # Load input variables into entities. # noqa analysis:ignore
-    from .model import model  # Load output variables into entities. # noqa analysis:ignore
     from .model.cotisations_sociales import preprocessing
     if qt:
         from .widgets.Composition import CompositionWidget
@@ -70,6 +68,9 @@ def init_country(qt = False):  # drop_survey_only_variables = False, simulate_f6
     if qt:
         qt_widgets.CompositionWidget = CompositionWidget
 
+    # Declare input & output variables in entities. Their modules are imported when they are first used.
+    formulas_registry.declare_columns(entities.entity_class_by_symbol)
+
     class TaxBenefitSystem(LegacyTaxBenefitSystem):
         """French tax benefit system"""
         check_consistency = None  # staticmethod(utils.check_consistency)
@@ -97,6 +98,22 @@ def init_country(qt = False):  # drop_survey_only_variables = False, simulate_f6
         REVENUES_CATEGORIES = REVENUES_CATEGORIES
         Scenario = scenarios.Scenario
 
+        def __init__(self):
+            self.legislation_hash = legislation_cache.get_cache_key(self.legislation_xml_file_path,
+                preprocess_legislation = self.preprocess_legislation)
+            legislation_json = legislation_cache.load_legislation_json(self.legislation_xml_file_path,
+                cache_key = self.legislation_hash, preprocess_legislation = self.preprocess_legislation)
+            # XmlBasedTaxBenefitSystem.__init__ only parses and preprocesses the legislation XML file, which is done
+            # by the cache: call its parent with the cached legislation instead.
+            # Copying the declared columns would import every formula module, so the parent copies only the loaded
+            # ones, and the others are declared lazily below.
+            with formulas_registry.hidden_declared_columns(self.entity_class_by_key_plural.itervalues()):
+                super(XmlBasedTaxBenefitSystem, self).__init__(legislation_json = legislation_json)
+            self.column_by_name = column_by_name = formulas_registry.LazyColumnByName()
+            for entity_class in self.entity_class_by_key_plural.itervalues():
+                column_by_name.update_lazily(entity_class.column_by_name)
+            legislation_pool.use_pool(self)
+
         def prefill_cache(self):
             # Compute one "zone APL" variable, to pre-load CSV of "code INSEE commune" to "Zone APL".
             from .model import aides_logement
@@ -0,0 +1,69 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+# OpenFisca -- A versatile microsimulation software
+# By: OpenFisca Team <contact@openfisca.fr>
+#
+# Copyright (C) 2011, 2012, 2013, 2014, 2015 OpenFisca Team
+# https://github.com/openfisca
+#
+# This file is part of OpenFisca.
+#
+# OpenFisca is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# OpenFisca is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+Compile the zone APL CSV file and the subcommunes JSON file into a NumPy array indexed by numeric depcom code.
+
+The generated file is loaded as a memory map by `model/aides_logement.py`.
+"""
+
+
+import argparse
+import logging
+import os
+import sys
+
+import numpy as np
+
+from openfisca_france.model import aides_logement
+
+
+app_name = os.path.splitext(os.path.basename(__file__))[0]
+assets_apl_dir = os.path.dirname(os.path.abspath(__file__))
+log = logging.getLogger(app_name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__)
+    parser.add_argument('-c', '--csv', default = os.path.join(assets_apl_dir, '20110914_zonage.csv'),
+        help = u"zone APL CSV file")
+    parser.add_argument('-j', '--json', default = os.path.join(assets_apl_dir,
+        'commune_depcom_by_subcommune_depcom.json'), help = u"subcommunes JSON file")
+    parser.add_argument('-o', '--output', default = aides_logement.zone_apl_by_depcom_code_file_path,
+        help = u"path of generated NumPy file")
+    parser.add_argument('-v', '--verbose', action = 'store_true', default = False, help = u"increase output verbosity")
+    args = parser.parse_args()
+    logging.basicConfig(level = logging.DEBUG if args.verbose else logging.WARNING)
+
+    with open(args.csv) as csv_file, open(args.json) as json_file:
+        zone_apl_by_depcom_code = aides_logement.build_zone_apl_by_depcom_code(csv_file, json_file)
+    np.save(args.output, zone_apl_by_depcom_code)
+    log.info(u'Saved {} zones APL to {}'.format((zone_apl_by_depcom_code > 0).sum(), args.output))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+
+# OpenFisca -- A versatile microsimulation software
+# By: OpenFisca Team <contact@openfisca.fr>
+#
+# Copyright (C) 2011, 2012, 2013, 2014, 2015 OpenFisca Team
+# https://github.com/openfisca
+#
+# This file is part of OpenFisca.
+#
+# OpenFisca is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# OpenFisca is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""Weighted aggregates of the nodes of a decomposition, over the menages of a survey simulation."""
+
+
+import copy
+
+import numpy as np
+from openfisca_core import decompositions
+
+
+def calculate_aggregates(simulation, decomposition_json, quantile_variable_name = 'nivvie', quantiles_count = 10,
+        weight_variable_name = 'wprm'):
+    """Return a copy of the decomposition with the aggregates of each node in its "aggregates" item.
+
+    The value of a node is the sum of its children (or of its variable for a leaf), at the level of the menage: values
+    of individus, familles and foyers fiscaux go to the menage of the person (or of the head of the entity). The
+    aggregates of a node are:
+    - total: the sum of its values, weighted by the weight of the menages;
+    - beneficiaries: the weighted count of menages having a non-zero value;
+    - total_by_quantile: the weighted sums by quantile of the quantile variable (deciles of nivvie by default).
+
+    The decomposition is walked once, children first, and each variable is calculated only once, even when it is used
+    by several nodes.
+    """
+    weights = simulation.calculate(weight_variable_name)
+    quantile_index = get_quantile_index(simulation.calculate(quantile_variable_name), weights, quantiles_count)
+
+    aggregated_decomposition_json = copy.deepcopy(decomposition_json)
+    nodes = list(decompositions.iter_decomposition_nodes(aggregated_decomposition_json, children_first = True))
+    remaining_uses_count_by_code = {}
+    for node in nodes:
+        if not node.get('children'):
+            remaining_uses_count_by_code[node['code']] = remaining_uses_count_by_code.get(node['code'], 0) + 1
+    array_by_code = {}
+    array_by_node_id = {}
+    for node in nodes:
+        children = node.get('children')
+        if children:
+            array = sum(array_by_node_id.pop(id(child)) for child in children)
+        else:
+            code = node['code']
+            array = array_by_code.get(code)
+            if array is None:
+                array = calculate_by_menage(simulation, code)
+            remaining_uses_count_by_code[code] -= 1
+            if remaining_uses_count_by_code[code] > 0:
+                array_by_code[code] = array
+            else:
+                array_by_code.pop(code, None)
+        array_by_node_id[id(node)] = array
+        weighted_array = array * weights
+        node['aggregates'] = dict(
+            beneficiaries = float(weights[array != 0].sum()),
+            total = float(weighted_array.sum()),
+            total_by_quantile = np.bincount(quantile_index, weights = weighted_array,
+                minlength = quantiles_count).tolist(),
+            )
+    return aggregated_decomposition_json
+
+
+def calculate_by_menage(simulation, variable_name):
+    """Return the values of a variable summed by menage."""
+    array = simulation.calculate_output(variable_name)
+    entity = simulation.get_holder(variable_name).entity
+    menages = simulation.entity_by_key_plural['menages']
+    if entity is menages:
+        return array
+    menage_index = simulation.calculate(menages.index_for_person_variable_name)
+    if not entity.is_persons_entity:
+        # The value of the entity goes to the menage of its head.
+        array = np.where(
+            simulation.calculate(entity.role_for_person_variable_name) == 0,
+            array[simulation.calculate(entity.index_for_person_variable_name)],
+            0,
+            )
+    return np.bincount(menage_index, weights = array, minlength = menages.count)
+
+
+def get_quantile_index(array, weights, quantiles_count):
+    """Return the quantile of each value of array, quantiles having the same total weight."""
+    sorter = np.argsort(array, kind = 'mergesort')
+    cumulative_weights = np.cumsum(weights[sorter])
+    total_weight = cumulative_weights[-1] if cumulative_weights.size else 0
+    quantile_index = np.empty(array.size, dtype = np.int64)
+    if total_weight <= 0:
+        quantile_index.fill(0)
+        return quantile_index
+    # A value belongs to the quantile containing the middle of its weight.
+    quantile_index[sorter] = np.minimum(
+        ((cumulative_weights - weights[sorter] / 2.) / total_weight * quantiles_count).astype(np.int64),
+        quantiles_count - 1,
+        )
+    return quantile_index
@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+
+
+# OpenFisca -- A versatile microsimulation software
+# By: OpenFisca Team <contact@openfisca.fr>
+#
+# Copyright (C) 2011, 2012, 2013, 2014, 2015 OpenFisca Team
+# https://github.com/openfisca
+#
+# This file is part of OpenFisca.
+#
+# OpenFisca is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# OpenFisca is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""Dependency graph of the formulas, extracted from their source code, and invalidation of computed variables.
+
+The variables read by a formula are the names given to the `calculate*` and `compute*` methods of the simulation, in
+the formula itself and in the helper functions it calls with the simulation. When a formula reads a variable whose name
+is not a literal string, it is considered to depend on every column named by a string of its source. When the source
+of a formula can't be read, the formula is considered to depend on every variable.
+
+After an input variable of a simulation is changed, `invalidate` deletes the values of the variables depending on it,
+so that only them are calculated again.
+"""
+
+
+import ast
+import collections
+import inspect
+import logging
+import textwrap
+import types
+import weakref
+
+from .model import communes
+from .model.cotisations_sociales import base as cotisations_sociales_base
+from .model.minima_sociaux import base as minima_sociaux_base
+from .model import uniform_formulas
+
+
+calculate_methods_name = frozenset([
+    'calculate',
+    'calculate_add',
+    'calculate_add_divide',
+    'calculate_divide',
+    'compute',
+    'compute_add',
+    'compute_add_divide',
+    'compute_divide',
+    'get_array',
+    ])
+dependency_graph_by_tax_benefit_system = weakref.WeakKeyDictionary()
+log = logging.getLogger(__name__)
+
+
+class DependencyGraph(object):
+    def __init__(self, column_by_name):
+        """Extract the dependencies of every column. This imports every formula module."""
+        self.dependencies_by_name = dependencies_by_name = {}
+        self.dependents_by_name = dependents_by_name = collections.defaultdict(set)
+        # Paths of the legislation nodes read by each formula, as tuples of names (an empty tuple for the whole
+        # legislation)
+        self.legislation_paths_by_name = legislation_paths_by_name = {}
+        # Names of the formulas whose dependencies are unknown
+        self.undetermined_names = undetermined_names = set()
+        self.formulas_name = formulas_name = set()
+        function_dependencies_by_function = {}
+        for name, column in column_by_name.iteritems():
+            functions, variables_name = get_formula_functions(column)
+            if not functions and not variables_name:
+                continue
+            formulas_name.add(name)
+            dependencies = set(variables_name)
+            legislation_paths = set()
+            for function in functions:
+                function_dependencies = extract_function_dependencies(function, function_dependencies_by_function)
+                if function_dependencies is None:
+                    undetermined_names.add(name)
+                    continue
+                dependencies.update(function_dependencies.variables_name)
+                if function_dependencies.is_dynamic:
+                    dependencies.update(function_dependencies.literals)
+                legislation_paths.update(function_dependencies.legislation_paths)
+            dependencies = set(
+                dependency_name
+                for dependency_name in dependencies
+                if dependency_name in column_by_name and dependency_name != name
+                )
+            dependencies_by_name[name] = dependencies
+            for dependency_name in dependencies:
+                dependents_by_name[dependency_name].add(name)
+            if legislation_paths:
+                legislation_paths_by_name[name] = legislation_paths
+
+    def get_dependents(self, variables_name):
+        """Return the names of the formulas depending, directly or not, on the given variables."""
+        dependents = set(self.undetermined_names) if variables_name else set()
+        pending_names = list(variables_name) + list(dependents)
+        while pending_names:
+            for dependent_name in self.dependents_by_name.get(pending_names.pop(), ()):
+                if dependent_name not in dependents:
+                    dependents.add(dependent_name)
+                    pending_names.append(dependent_name)
+        return dependents
+
+    def get_legislation_readers(self, legislation_paths):
+        """Return the names of the formulas reading the given legislation nodes (or their parents or children)."""
+        readers = set(self.undetermined_names) if legislation_paths else set()
+        for name, formula_legislation_paths in self.legislation_paths_by_name.iteritems():
+            if any(
+                    path[:len(formula_path)] == formula_path or formula_path[:len(path)] == path
+                    for path in legislation_paths
+                    for formula_path in formula_legislation_paths
+                    ):
+                readers.add(name)
+        return readers
+
+
+FunctionDependencies = collections.namedtuple('FunctionDependencies',
+    ['is_dynamic', 'legislation_paths', 'literals', 'variables_name'])
+
+
+def extract_function_dependencies(function, function_dependencies_by_function):
+    """Return the variables and legislation nodes read by a function, or None when its source can't be read.
+
+    is_dynamic is True when some variables are read through names that are not literal strings.
+    """
+    if function in function_dependencies_by_function:
+        return function_dependencies_by_function[function]
+    # Temporary result, for recursive functions
+    function_dependencies_by_function[function] = FunctionDependencies(False, set(), set(), set())
+    try:
+        tree = ast.parse(textwrap.dedent(inspect.getsource(function)))
+    except (IOError, SyntaxError, TypeError):
+        log.info(u'Source of function {} not found: its dependencies are unknown'.format(function.__name__))
+        function_dependencies_by_function[function] = None
+        return None
+    function_dependencies = FunctionDependencies(False, extract_legislation_paths(tree), set(), set())
+    called_functions = []
+    called_nodes = set(node.func for node in ast.walk(tree) if isinstance(node, ast.Call))
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Str):
+            function_dependencies.literals.add(node.s)
+        if isinstance(node, ast.Attribute) and node.attr in calculate_methods_name and node not in called_nodes:
+            # Method kept to be called later, like calculate = simulation.calculate_add
+            function_dependencies = function_dependencies._replace(is_dynamic = True)
+        if not isinstance(node, ast.Call) or not node.args:
+            continue
+        if isinstance(node.func, ast.Attribute) and node.func.attr in calculate_methods_name:
+            if isinstance(node.args[0], ast.Str):
+                function_dependencies.variables_name.add(node.args[0].s)
+            else:
+                function_dependencies = function_dependencies._replace(is_dynamic = True)
+            continue
+        if not any(isinstance(arg, ast.Name) and arg.id == 'simulation' for arg in node.args):
+            continue
+        # Helper function receiving the simulation, like calculate_rolling_sum(simulation, 'aah', period)
+        function_dependencies.variables_name.update(arg.s for arg in node.args if isinstance(arg, ast.Str))
+        helper = resolve_function(function, node.func)
+        if helper is not None:
+            called_functions.append((helper, True))
+    # Functions wrapped by a decorator
+    for cell in function.__closure__ or ():
+        if isinstance(cell.cell_contents, types.FunctionType):
+            called_functions.append((cell.cell_contents, False))
+    for called_function, is_helper in called_functions:
+        called_function_dependencies = extract_function_dependencies(called_function,
+            function_dependencies_by_function)
+        if called_function_dependencies is None:
+            function_dependencies_by_function[function] = None
+            return None
+        function_dependencies.variables_name.update(called_function_dependencies.variables_name)
+        function_dependencies.legislation_paths.update(called_function_dependencies.legislation_paths)
+        if called_function_dependencies.is_dynamic:
+            # The names read by a helper may come from the strings of the function calling it.
+            if is_helper:
+                function_dependencies.variables_name.update(called_function_dependencies.literals)
+            else:
+                function_dependencies.literals.update(called_function_dependencies.literals)
+            function_dependencies = function_dependencies._replace(is_dynamic = True)
+    function_dependencies_by_function[function] = function_dependencies
+    return function_dependencies
+
+
+def extract_legislation_paths(tree):
+    """Return the paths of the legislation nodes read in a syntax tree, through simulation.legislation_at(...).
+
+    The path of `simulation.legislation_at(period.start).ir.autre.decote` is ('ir', 'autre', 'decote'). When the
+    legislation is assigned to a variable, the attributes read from this variable are followed too.
+    """
+    parent_by_node = {}
+    for node in ast.walk(tree):
+        for child in ast.iter_child_nodes(node):
+            parent_by_node[child] = node
+
+    def get_attributes_path(node):
+        path = []
+        parent = parent_by_node.get(node)
+        while isinstance(parent, ast.Attribute) and parent.value is node:
+            path.append(parent.attr)
+            node = parent
+            parent = parent_by_node.get(node)
+        return node, tuple(path)
+
+    legislation_paths = set()
+    path_by_alias = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and \
+                node.func.attr == 'legislation_at':
+            node, path = get_attributes_path(node)
+            parent = parent_by_node.get(node)
+            if isinstance(parent, ast.Assign) and len(parent.targets) == 1 and \
+                    isinstance(parent.targets[0], ast.Name):
+                path_by_alias[parent.targets[0].id] = path
+            else:
+                legislation_paths.add(path)
+    if path_by_alias:
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load) and node.id in path_by_alias:
+                legislation_paths.add(path_by_alias[node.id] + get_attributes_path(node)[1])
+    return legislation_paths
+
+
+def get_dependency_graph(tax_benefit_system):
+    """Return the dependency graph of a tax-benefit system, built at first use."""
+    dependency_graph = dependency_graph_by_tax_benefit_system.get(tax_benefit_system)
+    if dependency_graph is None:
+        dependency_graph_by_tax_benefit_system[tax_benefit_system] = dependency_graph = DependencyGraph(
+            tax_benefit_system.column_by_name)
+    return dependency_graph
+
+
+def get_formula_functions(column):
+    """Return the functions of the formulas of a column and the variables read by its entity-to-entity formula."""
+    formula_class = column.formula_class
+    if formula_class is None:
+        return [], []
+    variable_name = getattr(formula_class, 'variable_name', None)
+    if variable_name is not None:
+        return [], [variable_name]
+    dated_formulas_class = getattr(formula_class, 'dated_formulas_class', None)
+    if dated_formulas_class:
+        formulas_class = [
+            dated_formula_class['formula_class']
+            for dated_formula_class in dated_formulas_class
+            ]
+    else:
+        formulas_class = [formula_class]
+    functions = []
+    for formula_class in formulas_class:
+        function = getattr(formula_class, 'function', None)
+        if function is not None:
+            functions.append(getattr(function, 'im_func', function))
+    return functions, []
+
+
+def get_variables_to_recompute(simulation, variables_name):
+    """Return the names of the variables already computed by the simulation that depend on the given variables."""
+    dependency_graph = get_dependency_graph(simulation.tax_benefit_system)
+    variables_to_recompute_name = set()
+    for name in dependency_graph.get_dependents(variables_name):
+        holder = simulation.get_holder(name, None)
+        if holder is not None and (holder._array is not None or holder._array_by_period):
+            variables_to_recompute_name.add(name)
+    return variables_to_recompute_name
+
+
+def invalidate(simulation, variables_name):
+    """Delete the values of the formulas depending on the changed variables, so that they are calculated again.
+
+    Return the names of the invalidated variables.
+    """
+    invalidated_names = get_variables_to_recompute(simulation, variables_name)
+    for name in invalidated_names:
+        simulation.get_holder(name).delete_arrays()
+    changed_names = invalidated_names.union(variables_name)
+    # Values kept by the formulas outside of holders
+    uniform_value_by_key = uniform_formulas.uniform_value_by_key_by_simulation.get(simulation)
+    if uniform_value_by_key is not None:
+        for key in uniform_value_by_key.keys():
+            if key[0] in changed_names:
+                del uniform_value_by_key[key]
+    rolling_sum_by_key = minima_sociaux_base.rolling_sum_by_key_by_simulation.get(simulation)
+    if rolling_sum_by_key is not None:
+        for key in rolling_sum_by_key.keys():
+            if key[0] in changed_names:
+                del rolling_sum_by_key[key]
+    if changed_names:
+        # These amounts are not identified by the variables they read.
+        cotisations_sociales_base.amounts_by_month_by_key_by_simulation.pop(simulation, None)
+    if 'type_sal' in changed_names:
+        cotisations_sociales_base.indices_by_type_sal_by_period_by_simulation.pop(simulation, None)
+    if 'depcom' in changed_names:
+        communes.communes_by_period_by_simulation.pop(simulation, None)
+    return invalidated_names
+
+
+def resolve_function(function, node):
+    """Return the function of a module called by a function, or None."""
+    if isinstance(node, ast.Name):
+        helper = function.__globals__.get(node.id)
+    elif isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name):
+        module = function.__globals__.get(node.value.id)
+        if not isinstance(module, types.ModuleType):
+            return None
+        helper = getattr(module, node.attr, None)
+    else:
+        return None
+    return helper if isinstance(helper, types.FunctionType) else None
+
+
+def set_input_and_invalidate(simulation, variable_name, array, period = None):
+    """Change the values of an input variable and invalidate the variables depending on it."""
+    holder = simulation.get_or_new_holder(variable_name)
+    if period is None:
+        holder.array = array
+    else:
+        holder.set_array(period, array)
+    return invalidate(simulation, [variable_name])
@@ -23,14 +23,15 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
-import collections
 import itertools
 
 from openfisca_core import entities
 
+from . import formulas_registry
+
 
 class Familles(entities.AbstractEntity):
-    column_by_name = collections.OrderedDict()
+    column_by_name = formulas_registry.LazyColumnByName()
     index_for_person_variable_name = 'idfam'
     key_plural = 'familles'
     key_singular = 'famille'
@@ -63,7 +64,7 @@ class Familles(entities.AbstractEntity):
 
 
 class FoyersFiscaux(entities.AbstractEntity):
-    column_by_name = collections.OrderedDict()
+    column_by_name = formulas_registry.LazyColumnByName()
     index_for_person_variable_name = 'idfoy'
     key_plural = 'foyers_fiscaux'
     key_singular = 'foyer_fiscal'
@@ -96,7 +97,7 @@ class FoyersFiscaux(entities.AbstractEntity):
 
 
 class Individus(entities.AbstractEntity):
-    column_by_name = collections.OrderedDict()
+    column_by_name = formulas_registry.LazyColumnByName()
     is_persons_entity = True
     key_plural = 'individus'
     key_singular = 'individu'
@@ -106,7 +107,7 @@ class Individus(entities.AbstractEntity):
 
 
 class Menages(entities.AbstractEntity):
-    column_by_name = collections.OrderedDict()
+    column_by_name = formulas_registry.LazyColumnByName()
     index_for_person_variable_name = 'idmen'
     key_plural = 'menages'
     key_singular = 'menage'
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+
+
+# OpenFisca -- A versatile microsimulation software
+# By: OpenFisca Team <contact@openfisca.fr>
+#
+# Copyright (C) 2011, 2012, 2013, 2014, 2015 OpenFisca Team
+# https://github.com/openfisca
+#
+# This file is part of OpenFisca.
+#
+# OpenFisca is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# OpenFisca is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""Lazy registration of the columns (input variables and formulas) of the French tax-benefit system.
+
+The name, entity and module of every column are listed in a manifest (`model/formulas_manifest.json`, generated by
+`scripts/generate_formulas_manifest.py`). `init_country` declares these columns in the entities without importing
+their modules: a formula module is imported only when one of its columns is requested for the first time.
+
+Iterating over the names of the columns doesn't import anything, but iterating over the columns themselves imports
+every formula module.
+"""
+
+
+import collections
+import contextlib
+import importlib
+import json
+import os
+import sys
+
+
+# Formula modules, imported in this order by `import_formulas_modules`. A module must be listed after the formula
+# modules it imports.
+formulas_modules_name = [
+    'openfisca_france.model.input_variables',
+    'openfisca_france.model.common',
+    'openfisca_france.model.education',
+    'openfisca_france.model.isf',
+    'openfisca_france.model.pfam',
+    'openfisca_france.model.aides_logement',
+    'openfisca_france.model.travailleurs_non_salaries',
+    'openfisca_france.model.th',
+    'openfisca_france.model.cotisations_sociales.allegements',
+    'openfisca_france.model.cotisations_sociales.capital',
+    # 'openfisca_france.model.cotisations_sociales.penalites',
+    'openfisca_france.model.cotisations_sociales.remplacement',
+    'openfisca_france.model.cotisations_sociales.remuneration_prive',
+    'openfisca_france.model.cotisations_sociales.remuneration_public',
+    'openfisca_france.model.cotisations_sociales.travail_fonction_publique',
+    'openfisca_france.model.cotisations_sociales.travail_prive',
+    'openfisca_france.model.cotisations_sociales.travail_totaux',
+    'openfisca_france.model.impot_revenu.charges_deductibles',
+    'openfisca_france.model.impot_revenu.credits_impot',
+    'openfisca_france.model.impot_revenu.ir',
+    'openfisca_france.model.impot_revenu.plus_values_immobilieres',
+    'openfisca_france.model.impot_revenu.reductions_impot',
+    # 'openfisca_france.model.minima_sociaux.aah',
+    'openfisca_france.model.minima_sociaux.asi_aspa',
+    'openfisca_france.model.minima_sociaux.ass',
+    'openfisca_france.model.minima_sociaux.cmu',
+    'openfisca_france.model.minima_sociaux.rsa',
+    'openfisca_france.model.prestations_familiales.aeeh',
+    'openfisca_france.model.prestations_familiales.af',
+    'openfisca_france.model.prestations_familiales.ars',
+    'openfisca_france.model.prestations_familiales.asf',
+    'openfisca_france.model.prestations_familiales.cf',
+    'openfisca_france.model.prestations_familiales.paje',
+    ]
+manifest_file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'model', 'formulas_manifest.json')
+
+
+class LazyColumnByName(collections.OrderedDict):
+    """Ordered dictionary of columns, some of them being only declared and loaded on first access.
+
+    The source of a declared column is either the name of the formula module that defines it (in the column_by_name of
+    an entity) or another LazyColumnByName (in the column_by_name of a tax-benefit system or of a reform entity).
+    """
+    def __init__(self, *args, **kwargs):
+        self.source_by_name = collections.OrderedDict()
+        super(LazyColumnByName, self).__init__(*args, **kwargs)
+
+    def __contains__(self, name):
+        return dict.__contains__(self, name) or self.is_declared(name)
+
+    def __delitem__(self, name):
+        if dict.__contains__(self, name):
+            super(LazyColumnByName, self).__delitem__(name)
+        elif self.source_by_name.pop(name, None) is None:
+            raise KeyError(name)
+
+    def __iter__(self):
+        # Iterate over a copy of the names, because loading a column adds it to the dictionary.
+        return iter(list(super(LazyColumnByName, self).__iter__()) + self.source_by_name.keys())
+
+    def __len__(self):
+        return dict.__len__(self) + len(self.source_by_name)
+
+    def __missing__(self, name):
+        source = self.source_by_name.get(name)
+        if source is None:
+            raise KeyError(name)
+        if isinstance(source, basestring):
+            if source not in sys.modules:
+                importlib.import_module(source)
+            column = dict.get(self, name)
+            if column is None:
+                # The module doesn't define this column anymore.
+                del self.source_by_name[name]
+                raise KeyError(name)
+            return column
+        column = source[name]
+        self[name] = column
+        return column
+
+    def __setitem__(self, name, column):
+        self.source_by_name.pop(name, None)
+        super(LazyColumnByName, self).__setitem__(name, column)
+
+    def copy(self):
+        column_by_name = self.__class__()
+        column_by_name.update_lazily(self)
+        return column_by_name
+
+    def declare(self, name, source):
+        if not dict.__contains__(self, name):
+            self.source_by_name[name] = source
+
+    def get(self, name, default = None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    def is_declared(self, name):
+        """Return True when the column is declared but not loaded yet.
+
+        A column whose module is already imported (or being imported) is not declared anymore: this lets the module
+        register it.
+        """
+        source = self.source_by_name.get(name)
+        if source is None:
+            return False
+        if isinstance(source, basestring):
+            return source not in sys.modules
+        return name in source
+
+    def iter_loaded_items(self):
+        for name in super(LazyColumnByName, self).__iter__():
+            yield name, dict.__getitem__(self, name)
+
+    def update_lazily(self, column_by_name):
+        """Add the columns of another column_by_name, without loading the declared ones."""
+        if not isinstance(column_by_name, LazyColumnByName):
+            self.update(column_by_name)
+            return
+        for name, column in column_by_name.iter_loaded_items():
+            self[name] = column
+        for name in column_by_name.source_by_name:
+            self.declare(name, column_by_name)
+
+
+def declare_columns(entity_class_by_symbol):
+    """Declare in entities the columns listed in the manifest, without importing their formula modules."""
+    with open(manifest_file_path) as manifest_file:
+        manifest = json.load(manifest_file)
+    for entity_symbol, name, module_name in manifest:
+        if module_name in sys.modules:
+            # Module has already been imported, so its columns are already registered.
+            continue
+        entity_class_by_symbol[entity_symbol].column_by_name.declare(name, module_name)
+
+
+@contextlib.contextmanager
+def hidden_declared_columns(entity_classes):
+    """Replace the column_by_name of the entities with their loaded columns only, until the end of the block.
+
+    This lets code that copies the columns of the entities (like `AbstractTaxBenefitSystem.__init__`) run without
+    importing every formula module.
+    """
+    column_by_name_by_entity_class = collections.OrderedDict(
+        (entity_class, entity_class.column_by_name)
+        for entity_class in entity_classes
+        )
+    try:
+        for entity_class, column_by_name in column_by_name_by_entity_class.iteritems():
+            entity_class.column_by_name = collections.OrderedDict(column_by_name.iter_loaded_items())
+        yield
+    finally:
+        for entity_class, column_by_name in column_by_name_by_entity_class.iteritems():
+            entity_class.column_by_name = column_by_name
+
+
+def import_formulas_modules():
+    """Import every formula module, registering all their columns in the entities."""
+    for module_name in formulas_modules_name:
+        importlib.import_module(module_name)
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+
+
+# OpenFisca -- A versatile microsimulation software
+# By: OpenFisca Team <contact@openfisca.fr>
+#
+# Copyright (C) 2011, 2012, 2013, 2014, 2015 OpenFisca Team
+# https://github.com/openfisca
+#
+# This file is part of OpenFisca.
+#
+# OpenFisca is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# OpenFisca is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""On-disk cache of the preprocessed legislation.
+
+When the cache is enabled, parsing, validating and preprocessing `param/param.xml` is done once: the resulting
+legislation JSON is pickled in `cache_dir`, under the hash of the XML file, of the conversion code of OpenFisca-Core
+and of the preprocessing code, and loaded directly by the next processes.
+The cache is disabled by default. Set the environment variable `OPENFISCA_FRANCE_CACHE_DIR` to a directory (for
+example `~/.cache/openfisca-france`) to enable it.
+"""
+
+
+import cPickle
+import hashlib
+import inspect
+import logging
+import os
+import tempfile
+
+from openfisca_core import conv, legislations, legislationsxml
+
+
+cache_dir = os.path.expanduser(os.environ.get('OPENFISCA_FRANCE_CACHE_DIR', '')) or None
+log = logging.getLogger(__name__)
+
+
+def get_cache_key(legislation_xml_file_path, preprocess_legislation = None):
+    """Return the hash of the legislation XML file and of the source files of its conversion and preprocessing.
+
+    The conversion of the XML to JSON is done by OpenFisca-Core: the source of its modules is hashed too, so that the
+    cache is invalidated by an upgrade of OpenFisca-Core.
+    """
+    hash_object = hashlib.sha256()
+    with open(legislation_xml_file_path, 'rb') as xml_file:
+        hash_object.update(xml_file.read())
+    for module in (legislationsxml, legislations):
+        with open(inspect.getsourcefile(module), 'rb') as source_file:
+            hash_object.update(source_file.read())
+    if preprocess_legislation is not None:
+        source_file_path = inspect.getsourcefile(preprocess_legislation)
+        if source_file_path is None:
+            hash_object.update(preprocess_legislation.__code__.co_code)
+        else:
+            with open(source_file_path, 'rb') as source_file:
+                hash_object.update(source_file.read())
+    return hash_object.hexdigest()
+
+
+def load_legislation_json(legislation_xml_file_path, cache_key = None, preprocess_legislation = None):
+    """Return the (preprocessed) legislation JSON, from the cache when it is enabled and when the XML file and the
+    preprocessing are unchanged.
+    """
+    if not cache_dir:
+        return parse_legislation_json(legislation_xml_file_path, preprocess_legislation = preprocess_legislation)
+    if cache_key is None:
+        cache_key = get_cache_key(legislation_xml_file_path, preprocess_legislation = preprocess_legislation)
+    cache_file_path = os.path.join(cache_dir, 'legislation-{}.pickle'.format(cache_key))
+    try:
+        with open(cache_file_path, 'rb') as cache_file:
+            return cPickle.load(cache_file)
+    except IOError:
+        pass
+    except Exception:
+        log.warning(u'Ignoring invalid legislation cache file {}'.format(cache_file_path))
+
+    legislation_json = parse_legislation_json(legislation_xml_file_path,
+        preprocess_legislation = preprocess_legislation)
+    try:
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        # Write to a temporary file then rename it, so that concurrent processes never read a partial file.
+        file_descriptor, temporary_file_path = tempfile.mkstemp(dir = cache_dir, suffix = '.tmp')
+        with os.fdopen(file_descriptor, 'wb') as temporary_file:
+            cPickle.dump(legislation_json, temporary_file, cPickle.HIGHEST_PROTOCOL)
+        os.rename(temporary_file_path, cache_file_path)
+    except (IOError, OSError):
+        log.warning(u'Unable to write legislation cache file {}'.format(cache_file_path))
+    return legislation_json
+
+
+def parse_legislation_json(legislation_xml_file_path, preprocess_legislation = None):
+    legislation_json = conv.check(legislationsxml.xml_legislation_file_path_to_json)(legislation_xml_file_path,
+        state = conv.State())
+    if preprocess_legislation is not None:
+        preprocess_legislation(legislation_json)
+    return legislation_json
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+
+# OpenFisca -- A versatile microsimulation software
+# By: OpenFisca Team <contact@openfisca.fr>
+#
+# Copyright (C) 2011, 2012, 2013, 2014, 2015 OpenFisca Team
+# https://github.com/openfisca
+#
+# This file is part of OpenFisca.
+#
+# OpenFisca is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# OpenFisca is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""Process-wide pool of compact legislations, shared by every tax-benefit system and reform.
+
+A compact legislation (the object returned by `simulation.legislation_at(instant)`) is built once per
+(legislation hash, instant, reform name) and kept in a bounded LRU pool. Tax-benefit systems and reforms built again
+and again (by API workers, batch jobs, etc.) then reuse the same compact legislations instead of regenerating them.
+"""
+
+
+import collections
+import cPickle
+import hashlib
+import os
+import threading
+
+
+class CompactLegislationPool(object):
+    """Bounded pool of compact legislations, evicting the least recently used one."""
+    def __init__(self, max_size = 128):
+        self.compact_legislation_by_key = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.max_size = max_size
+
+    def clear(self):
+        with self.lock:
+            self.compact_legislation_by_key.clear()
+
+    def get(self, key, default = None):
+        with self.lock:
+            compact_legislation = self.compact_legislation_by_key.pop(key, None)
+            if compact_legislation is None:
+                return default
+            # Move the key to the end of the pool: it is the most recently used.
+            self.compact_legislation_by_key[key] = compact_legislation
+            return compact_legislation
+
+    def set(self, key, compact_legislation):
+        with self.lock:
+            self.compact_legislation_by_key.pop(key, None)
+            self.compact_legislation_by_key[key] = compact_legislation
+            while len(self.compact_legislation_by_key) > self.max_size:
+                self.compact_legislation_by_key.popitem(last = False)
+
+
+class PooledCompactLegislationByInstant(object):
+    """Mapping from instant to compact legislation, used as the compact_legislation_by_instant_cache of a tax-benefit
+    system, backed by the process-wide pool.
+    """
+    def __init__(self, legislation_hash, reform_name = None, pool = None):
+        self.legislation_hash = legislation_hash
+        self.pool = pool if pool is not None else compact_legislation_pool
+        self.reform_name = reform_name
+
+    def __contains__(self, instant):
+        return self.get(instant) is not None
+
+    def __getitem__(self, instant):
+        compact_legislation = self.get(instant)
+        if compact_legislation is None:
+            raise KeyError(instant)
+        return compact_legislation
+
+    def __setitem__(self, instant, compact_legislation):
+        self.pool.set((self.legislation_hash, instant, self.reform_name), compact_legislation)
+
+    def get(self, instant, default = None):
+        return self.pool.get((self.legislation_hash, instant, self.reform_name), default)
+
+
+compact_legislation_pool = CompactLegislationPool(
+    max_size = int(os.environ.get('OPENFISCA_FRANCE_LEGISLATION_POOL_SIZE', 128)))
+
+
+def get_legislation_hash(tax_benefit_system):
+    """Return a hash of the legislation of a tax-benefit system, computed once per tax-benefit system."""
+    legislation_hash = getattr(tax_benefit_system, 'legislation_hash', None)
+    if legislation_hash is None:
+        reference = getattr(tax_benefit_system, 'reference', None)
+        if reference is not None and tax_benefit_system.legislation_json is reference.legislation_json:
+            # The reform doesn't change the legislation.
+            legislation_hash = get_legislation_hash(reference)
+        else:
+            legislation_hash = hashlib.sha256(cPickle.dumps(tax_benefit_system.legislation_json,
+                cPickle.HIGHEST_PROTOCOL)).hexdigest()
+        tax_benefit_system.legislation_hash = legislation_hash
+    return legislation_hash
+
+
+def use_pool(tax_benefit_system):
+    """Make a tax-benefit system (or a reform) share its compact legislations through the process-wide pool."""
+    tax_benefit_system.compact_legislation_by_instant_cache = PooledCompactLegislationByInstant(
+        get_legislation_hash(tax_benefit_system),
+        reform_name = getattr(tax_benefit_system, 'name', None),
+        )
+    return tax_benefit_system
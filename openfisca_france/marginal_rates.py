@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+
+# OpenFisca -- A versatile microsimulation software
+# By: OpenFisca Team <contact@openfisca.fr>
+#
+# Copyright (C) 2011, 2012, 2013, 2014, 2015 OpenFisca Team
+# https://github.com/openfisca
+#
+# This file is part of OpenFisca.
+#
+# OpenFisca is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# OpenFisca is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""Marginal effective tax rates of every entity of a simulation, by perturbation of an input variable."""
+
+
+from __future__ import division
+
+import numpy as np
+
+from . import dependency_graph
+
+
+def calculate_marginal_rates(simulation, varying_variable_name, delta = 100, persons_mask = None, period = None,
+        target_variable_name = 'revdisp'):
+    """Return the marginal effective tax rate of each entity of the target, when the varying variable grows by delta.
+
+    The varying variable is increased for every person (or for the persons of persons_mask) of a perturbed copy of the
+    simulation, and the rate of an entity is 1 - (change of the target) / (change of the varying variable of its
+    members). It is NaN for the entities whose varying variable doesn't change.
+
+    The perturbed simulation shares the values already calculated by the simulation, except those depending on the
+    varying variable: only them are calculated again.
+    """
+    target = simulation.calculate(target_variable_name, period)
+    varying_holder = simulation.get_holder(varying_variable_name)
+    perturbation = np.zeros(varying_holder.entity.count)
+    if persons_mask is None:
+        perturbation.fill(delta)
+    else:
+        assert varying_holder.entity.is_persons_entity
+        perturbation[persons_mask] = delta
+    perturbed_simulation = new_perturbed_simulation(simulation, varying_variable_name, perturbation, period = period)
+    perturbed_target = perturbed_simulation.calculate(target_variable_name, period)
+
+    target_entity = simulation.get_holder(target_variable_name).entity
+    if target_entity is not varying_holder.entity:
+        assert varying_holder.entity.is_persons_entity, \
+            u'Variable {} must be an individual variable'.format(varying_variable_name)
+        perturbation = np.bincount(simulation.calculate(target_entity.index_for_person_variable_name),
+            weights = perturbation, minlength = target_entity.count)
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        return np.where(perturbation != 0, 1 - (perturbed_target - target) / perturbation, np.nan)
+
+
+def new_perturbed_simulation(simulation, variable_name, perturbation, period = None):
+    """Return a copy of the simulation where perturbation is added to an input variable.
+
+    Only the values of the variables depending on the perturbed one are deleted from the copy. The other arrays are
+    shared with the simulation.
+    """
+    perturbed_simulation = simulation.clone()
+    array = simulation.calculate(variable_name, period)
+    dependency_graph.set_input_and_invalidate(perturbed_simulation, variable_name,
+        (array + perturbation).astype(array.dtype), period = period)
+    return perturbed_simulation
@@ -27,16 +27,23 @@ from __future__ import division
 
 import csv
 import json
+import os
 import pkg_resources
 
-from numpy import ceil, fromiter, int16, logical_not as not_, logical_or as or_, logical_and as and_, maximum as max_, minimum as min_, round
+import numpy as np
+from numpy import ceil, int16, logical_not as not_, logical_or as or_, logical_and as and_, maximum as max_, minimum as min_, round
 
 import openfisca_france
 from .base import *  # noqa
+from .communes import DEPCOM_CODE_COUNT, depcom_to_code, get_communes
 from .pfam import nb_enf
 
 
-zone_apl_by_depcom = None
+zone_apl_by_depcom_code = None
+zone_apl_by_depcom_code_file_path = pkg_resources.resource_filename(
+    openfisca_france.__name__,
+    'assets/apl/zone_apl_by_depcom_code.npy',
+    )
 
 
 @reference_formula
@@ -518,40 +525,55 @@ class zone_apl(SimpleFormulaColumn):
         en fonction du depcom (code INSEE)
         '''
         period = period
-        depcom = simulation.calculate('depcom', period)
-
-        preload_zone_apl()
-        default_value = 2
-        return period, fromiter(
-            (
-                zone_apl_by_depcom.get(depcom_cell, default_value)
-                for depcom_cell in depcom
-                ),
-            dtype = int16,
-            )
+        communes = get_communes(simulation, period)
+
+        zone_apl_by_commune = communes.get_attribute('zone_apl', get_zone_apl_by_code)
+        return period, zone_apl_by_commune[communes.index]
+
+
+def build_zone_apl_by_depcom_code(csv_file, json_file):
+    """Construit la table des zones APL indexée par code INSEE numérique (0 pour une commune inconnue).
+
+    Les sous-communes (arrondissements et communes associées) ont la même zone que leur commune de rattachement.
+    """
+    zone_apl_by_depcom = {
+        # Keep only first char of Zonage column because of 1bis value considered equivalent to 1.
+        row['CODGEO']: int(row['Zonage'][0])
+        for row in csv.DictReader(csv_file)
+        }
+    for subcommune_depcom, commune_depcom in json.load(json_file).iteritems():
+        zone_apl_by_depcom[subcommune_depcom] = zone_apl_by_depcom[commune_depcom]
+    depcom = np.array(zone_apl_by_depcom.keys(), dtype = '|S5')
+    zone_apl_by_depcom_code = np.zeros(DEPCOM_CODE_COUNT, dtype = np.int8)
+    zone_apl_by_depcom_code[depcom_to_code(depcom)] = zone_apl_by_depcom.values()
+    return zone_apl_by_depcom_code
+
+
+def get_zone_apl_by_code(depcom_code):
+    """Retrouve la zone APL de codes INSEE numériques, 2 pour un code invalide ou une commune inconnue."""
+    preload_zone_apl()
+    default_value = 2
+    zone = zone_apl_by_depcom_code.take(np.maximum(depcom_code, 0)).astype(int16)
+    return np.where((depcom_code >= 0) & (zone > 0), zone, default_value)
 
 
 def preload_zone_apl():
-    global zone_apl_by_depcom
-    if zone_apl_by_depcom is None:
-        with pkg_resources.resource_stream(
-                openfisca_france.__name__,
-                'assets/apl/20110914_zonage.csv',
-                ) as csv_file:
-            csv_reader = csv.DictReader(csv_file)
-            zone_apl_by_depcom = {
-                # Keep only first char of Zonage column because of 1bis value considered equivalent to 1.
-                row['CODGEO']: int(row['Zonage'][0])
-                for row in csv_reader
-                }
-        # Add subcommunes (arrondissements and communes associées), use the same value as their parent commune.
-        with pkg_resources.resource_stream(
-                openfisca_france.__name__,
-                'assets/apl/commune_depcom_by_subcommune_depcom.json',
-                ) as json_file:
-            commune_depcom_by_subcommune_depcom = json.load(json_file)
-            for subcommune_depcom, commune_depcom in commune_depcom_by_subcommune_depcom.iteritems():
-                zone_apl_by_depcom[subcommune_depcom] = zone_apl_by_depcom[commune_depcom]
+    global zone_apl_by_depcom_code
+    if zone_apl_by_depcom_code is None:
+        if os.path.exists(zone_apl_by_depcom_code_file_path):
+            # Table précompilée par assets/apl/compile_zone_apl.py : chargée sans copie.
+            zone_apl_by_depcom_code = np.load(zone_apl_by_depcom_code_file_path, mmap_mode = 'r')
+        else:
+            with pkg_resources.resource_stream(
+                    openfisca_france.__name__,
+                    'assets/apl/20110914_zonage.csv',
+                    ) as csv_file:
+                # Add subcommunes (arrondissements and communes associées).
+                with pkg_resources.resource_stream(
+                        openfisca_france.__name__,
+                        'assets/apl/commune_depcom_by_subcommune_depcom.json',
+                        ) as json_file:
+                    zone_apl_by_depcom_code = build_zone_apl_by_depcom_code(csv_file, json_file)
 
 
 @reference_formula
@@ -26,6 +26,7 @@
 from datetime import date
 import functools
 
+import numpy as np
 from openfisca_core.accessors import law
 from openfisca_core.columns import (AgeCol, BoolCol, build_column, DateCol, EnumCol, FixedStrCol, FloatCol, IntCol,
     PeriodSizeIndependentIntCol, StrCol)
@@ -73,7 +74,9 @@ __all__ = [
     'QUIMEN',
     'reference_formula',
     'reference_input_variable',
+    'roles_mask',
     'SimpleFormulaColumn',
+    'split_by_roles_matrix',
     'StrCol',
     'TAUX_DE_PRIME',
     'VOUS',
@@ -119,3 +122,55 @@ build_column = functools.partial(
     )
 
 reference_formula = make_reference_formula_decorator(entity_class_by_symbol = entity_class_by_symbol)
+
+
+def get_roles_positions(formula, entity = None, roles = None):
+    """Renvoie l'entité, la liste des rôles, puis pour chaque individu ayant l'un de ces rôles : l'indice de son
+    entité, la position de son rôle dans la liste et le filtre booléen (sur les individus) de ces individus.
+    """
+    simulation = formula.holder.entity.simulation
+    persons = simulation.persons
+    if entity is None:
+        entity = formula.holder.entity
+    else:
+        assert entity in simulation.entity_by_key_singular, u"Unknown entity: {}".format(entity).encode('utf-8')
+        entity = simulation.entity_by_key_singular[entity]
+    assert not entity.is_persons_entity
+    if roles is None:
+        # Same default as split_by_roles, to ensure there is always at least 11 roles.
+        roles = range(max(entity.roles_count, 11))
+    role_array = persons.holder_by_name[entity.role_for_person_variable_name].array
+    position_by_role = np.empty(max(max(roles), role_array.max() if role_array.size else 0) + 1, dtype = np.int32)
+    position_by_role.fill(-1)
+    position_by_role[np.asarray(roles)] = np.arange(len(roles))
+    position = position_by_role[role_array]
+    boolean_filter = position >= 0
+    entity_index_array = persons.holder_by_name[entity.index_for_person_variable_name].array
+    return entity, roles, entity_index_array[boolean_filter], position[boolean_filter], boolean_filter
+
+
+def roles_mask(formula, entity = None, roles = None):
+    """Renvoie la matrice booléenne (entités x rôles) des rôles occupés."""
+    entity, roles, entity_index_array, position, _ = get_roles_positions(formula, entity = entity, roles = roles)
+    mask = np.zeros((entity.count, len(roles)), dtype = bool)
+    mask[entity_index_array, position] = True
+    return mask
+
+
+def split_by_roles_matrix(formula, array_or_dated_holder, default = None, entity = None, roles = None):
+    """Projette une variable des individus sur une entité, sous forme d'une matrice (entités x rôles).
+
+    Équivalent vectoriel de `formula.split_by_roles` : la colonne j contient la valeur de l'individu ayant le rôle
+    `roles[j]`, ou `default` quand ce rôle est vacant (voir `roles_mask`). Les fonctions d'agrégation sur les rôles
+    deviennent alors des réductions NumPy selon l'axe 1.
+    """
+    array = getattr(array_or_dated_holder, 'array', array_or_dated_holder)
+    if default is None:
+        column = getattr(array_or_dated_holder, 'column', None)
+        default = column.default if column is not None else 0
+    entity, roles, entity_index_array, position, boolean_filter = get_roles_positions(formula, entity = entity,
+        roles = roles)
+    matrix = np.empty((entity.count, len(roles)), dtype = array.dtype)
+    matrix.fill(default)
+    matrix[entity_index_array, position] = array[boolean_filter]
+    return matrix
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+
+# OpenFisca -- A versatile microsimulation software
+# By: OpenFisca Team <contact@openfisca.fr>
+#
+# Copyright (C) 2011, 2012, 2013, 2014, 2015 OpenFisca Team
+# https://github.com/openfisca
+#
+# This file is part of OpenFisca.
+#
+# OpenFisca is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# OpenFisca is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""Dictionary encoding of the communes (depcom) where the menages live.
+
+The depcom of the menages are encoded once per depcom array: each menage gets the index of its commune in a table of
+the distinct communes, which holds the attributes derived from the INSEE code (numeric code, département, territoire
+d'outre-mer, zone APL…). The geographic variables are then integer gathers from this table, instead of string
+operations over every menage.
+"""
+
+
+from __future__ import division
+
+import weakref
+
+import numpy as np
+
+
+DEPCOM_CODE_COUNT = 102000  # Codes numériques 0 à 99999, puis 2A (100000 à 100999) et 2B (101000 à 101999)
+# Communes of the depcom arrays (see get_communes), by period and by simulation.
+communes_by_period_by_simulation = weakref.WeakKeyDictionary()
+
+
+class Communes(object):
+    """Table of the distinct communes of a depcom array.
+
+    `index` gives, for each cell of the depcom array, the index of its commune in the table. The other arrays have one
+    cell per commune.
+    """
+    def __init__(self, depcom):
+        self.source = depcom
+        self.depcom, index = np.unique(np.asarray(depcom, dtype = '|S5'), return_inverse = True)
+        self.index = index.astype(np.int32)
+        self.attribute_by_name = {}
+        self.code = depcom_to_code(self.depcom)
+        # Code INSEE du département d'outre-mer (971 à 976), 0 en métropole ou pour un code invalide
+        self.territoire = np.where(
+            (self.code >= 97000) & (self.code < 98000),
+            self.code // 100,
+            0,
+            ).astype(np.int16)
+
+    @property
+    def departement(self):
+        """Code of the département of each commune."""
+        return np.where(self.territoire > 0, self.depcom.astype('|S3'), self.depcom.astype('|S2'))
+
+    def get_attribute(self, name, function):
+        """Return an attribute of the communes, computed once from their numeric codes by function."""
+        array = self.attribute_by_name.get(name)
+        if array is None:
+            self.attribute_by_name[name] = array = function(self.code)
+        return array
+
+
+def depcom_to_code(depcom):
+    """Convertit un tableau de codes INSEE (depcom) en entiers, -1 pour un code invalide.
+
+    Les codes corses 2Axxx et 2Bxxx sont convertis en 100xxx et 101xxx.
+    """
+    depcom = np.ascontiguousarray(depcom, dtype = '|S5')
+    chars = depcom.view(np.uint8).reshape(len(depcom), 5).astype(np.int32)
+    digits = chars - ord('0')
+    is_digit = (digits >= 0) & (digits <= 9)
+    code = digits[:, 0] * 10000 + digits[:, 1] * 1000 + digits[:, 2] * 100 + digits[:, 3] * 10 + digits[:, 4]
+    is_corse = (chars[:, 0] == ord('2')) & ((chars[:, 1] == ord('A')) | (chars[:, 1] == ord('B')))
+    code = np.where(
+        is_corse,
+        100000 + (chars[:, 1] - ord('A')) * 1000 + digits[:, 2] * 100 + digits[:, 3] * 10 + digits[:, 4],
+        code,
+        )
+    is_valid = is_digit[:, 2:].all(axis = 1) & (is_corse | is_digit[:, :2].all(axis = 1))
+    return np.where(is_valid, code, -1)
+
+
+def get_communes(simulation, period):
+    """Return the Communes of the depcom of the menages, encoded once per simulation and period.
+
+    The table is encoded again when the holder of depcom has been given a new array. The table of a simulation is also
+    removed when depcom changes (see dependency_graph.invalidate), which covers the depcom arrays modified in place.
+    """
+    depcom = simulation.calculate('depcom', period)
+    communes_by_period = communes_by_period_by_simulation.get(simulation)
+    if communes_by_period is None:
+        communes_by_period_by_simulation[simulation] = communes_by_period = {}
+    communes = communes_by_period.get(period)
+    if communes is None or communes.source is not depcom:
+        communes_by_period[period] = communes = Communes(depcom)
+    return communes
+
+
+def get_territoire(simulation, period):
+    """Return the code of the département d'outre-mer (971 to 976) of each menage, 0 in metropolitan France."""
+    communes = get_communes(simulation, period)
+    return communes.territoire[communes.index]
@@ -26,16 +26,15 @@
 from __future__ import division
 
 
-from functools import partial
 from numpy import (
-    busday_count as original_busday_count, datetime64, logical_not as not_, logical_or as or_, maximum as max_,
-    minimum as min_, round as round_, timedelta64
+    array, datetime64, logical_not as not_, logical_or as or_, maximum as max_, minimum as min_,
+    round as round_, timedelta64, zeros
     )
 
 import logging
 
 from ..base import *  # noqa analysis:ignore
-from ...assets.holidays import holidays
+from .base import busday_count, calculate_by_month, get_amounts_by_month, get_months
 
 log = logging.getLogger(__name__)
 
@@ -66,19 +65,16 @@ class allegement_fillon(DatedFormulaColumn):
     def function(self, simulation, period):
         period = period.start.offset('first-of', 'month').period('month')
         allegement_fillon_mode_recouvrement = simulation.calculate('allegement_fillon_mode_recouvrement', period)
-        allegement = (
-            # en fin d'année
-            allegement_fillon_mode_recouvrement == 0) * (
-                compute_allegement_fillon_annuel(simulation, period)
-                ) + (
-            # anticipé
-            allegement_fillon_mode_recouvrement == 1) * (
-                compute_allegement_fillon_anticipe(simulation, period)
-                ) + (
-            # cumul progressif
-            allegement_fillon_mode_recouvrement == 2) * (
-                compute_allegement_fillon_progressif(simulation, period)
-            )
+        allegement = zeros(len(allegement_fillon_mode_recouvrement))
+        for mode_recouvrement, compute_allegement in (
+                (0, compute_allegement_fillon_annuel),  # en fin d'année
+                (1, compute_allegement_fillon_anticipe),  # anticipé
+                (2, compute_allegement_fillon_progressif),  # cumul progressif
+                ):
+            # Don't compute the modes used by nobody: the regularisations need every month of the year.
+            concernes = allegement_fillon_mode_recouvrement == mode_recouvrement
+            if concernes.any():
+                allegement += concernes * compute_allegement(simulation, period)
         return period, allegement
 
 
@@ -107,7 +103,6 @@ class coefficient_proratisation(SimpleFormulaColumn):
         # Décompte des jours en début et fin de contrat
         # http://www.gestiondelapaie.com/flux-paie/?1029-la-bonne-premiere-paye
 
-        busday_count = partial(original_busday_count, holidays = holidays)
         debut_mois = datetime64(period.start.offset('first-of', 'month'))
         fin_mois = datetime64(period.start.offset('last-of', 'month')) + timedelta64(1, 'D')
 
@@ -175,7 +170,10 @@ class smic_proratise(SimpleFormulaColumn):
     label = u"SMIC annuel proratisé"
 
     def function(self, simulation, period):
-        period = period
+        if period.unit != u'month' or period.size > 1:
+            # coefficient_proratisation ne porte que sur le premier mois de la période : le SMIC proratisé d'une
+            # période de plusieurs mois (cumuls des allègements) est la somme des SMIC proratisés de ses mois.
+            return period, simulation.calculate_add('smic_proratise', period)
         coefficient_proratisation = simulation.calculate('coefficient_proratisation', period)
         smic_horaire_brut = simulation.legislation_at(period.start).cotsoc.gen.smic_h_b
         smic_proratise = coefficient_proratisation * smic_horaire_brut * 35 * 52 / 12
@@ -194,8 +192,10 @@ def compute_allegement_fillon_annuel(simulation, period):
 
 def compute_allegement_fillon_anticipe(simulation, period):
     if period.start.month < 12:
-        return compute_allegement_fillon(simulation, period.start.offset('first-of', 'month').period('month'))
+        return compute_allegement_fillon_mensuel(simulation, period)
     if period.start.month == 12:
+        # Les allègements des mois précédents sont calculés en une passe.
+        get_allegement_fillon_by_month(simulation, period)
         cumul = simulation.calculate_add(
             'allegement_fillon',
             period.start.offset('first-of', 'month').offset(-11, 'month').period('month', 11))
@@ -206,10 +206,11 @@ def compute_allegement_fillon_anticipe(simulation, period):
 
 def compute_allegement_fillon_progressif(simulation, period):
     if period.start.month == 1:
-        return compute_allegement_fillon(simulation, period.start.offset('first-of', 'month').period('month'))
+        return compute_allegement_fillon_mensuel(simulation, period)
 
     if period.start.month > 1:
-        up_to_this_month = period.start.offset('first-of', 'year').period('month', period.start.month)
+        # Les allègements des mois précédents sont calculés en une passe.
+        get_allegement_fillon_by_month(simulation, period)
         up_to_previous_month = period.start.offset('first-of', 'year').period('month', period.start.month - 1)
         cumul = simulation.calculate_add('allegement_fillon', up_to_previous_month)
         up_to_this_month = period.start.offset('first-of', 'year').period('month', period.start.month)
@@ -217,13 +218,53 @@ def compute_allegement_fillon_progressif(simulation, period):
 
 
 def compute_allegement_fillon(simulation, period):
+    assiette_allegement = simulation.calculate('assiette_allegement', period)
+    smic_proratise = simulation.calculate('smic_proratise', period)
+    taille_entreprise = simulation.calculate('taille_entreprise', period)
+    Pf = simulation.legislation_at(period.start).cotsoc.exo_bas_sal.fillon
+    if Pf.seuil <= 1:
+        return 0
+    return calcul_allegement_fillon(assiette_allegement, smic_proratise, taille_entreprise, Pf.seuil, Pf.tx_max,
+        Pf.tx_max2)
+
+
+def compute_allegement_fillon_by_month(simulation, year):
+    """Calcule en une passe l'allègement de chacun des 12 mois de l'année, sous forme de matrice (individus x mois).
+
+    Les allègements calculés sur les cumuls depuis le début de l'année (régularisations) ne sont pas calculés ici :
+    ils le sont par compute_allegement_fillon sur la période cumulée.
+    """
+    months = get_months(year)
+    assiette_allegement = calculate_by_month(simulation, 'assiette_allegement', months)
+    smic_proratise = calculate_by_month(simulation, 'smic_proratise', months)
+    taille_entreprise = calculate_by_month(simulation, 'taille_entreprise', months)
+    Pf_by_month = [
+        simulation.legislation_at(month.start).cotsoc.exo_bas_sal.fillon
+        for month in months
+        ]
+    return calcul_allegement_fillon(
+        assiette_allegement,
+        smic_proratise,
+        taille_entreprise,
+        array([Pf_month.seuil for Pf_month in Pf_by_month]),
+        array([Pf_month.tx_max for Pf_month in Pf_by_month]),
+        array([Pf_month.tx_max2 for Pf_month in Pf_by_month]),
+        )
+
+
+def compute_allegement_fillon_mensuel(simulation, period):
+    # Use the amounts of the whole year when they have already been computed by a regularisation.
+    allegement_fillon_by_month = get_allegement_fillon_by_month(simulation, period, compute = False)
+    if allegement_fillon_by_month is not None:
+        return allegement_fillon_by_month[:, period.start.month - 1]
+    return compute_allegement_fillon(simulation, period.start.offset('first-of', 'month').period('month'))
+
+
+def calcul_allegement_fillon(assiette_allegement, smic_proratise, taille_entreprise, seuil, tx_max, tx_max2):
     '''
     Exonération Fillon
     http://www.securite-sociale.fr/comprendre/dossiers/exocotisations/exoenvigueur/fillon.htm
     '''
-    assiette_allegement = simulation.calculate('assiette_allegement', period)
-    smic_proratise = simulation.calculate('smic_proratise', period)
-    taille_entreprise = simulation.calculate('taille_entreprise', period)
     majoration = (taille_entreprise <= 2)  # majoration éventuelle pour les petites entreprises
     # Calcul du taux
     # La divison par zéro engendre un warning
@@ -235,20 +276,27 @@ def compute_allegement_fillon(simulation, period):
     # Ce montant est majoré de 10 % pour les entreprises de travail temporaire
     # au titre des salariés temporaires pour lesquels elle est tenue à
     # l’obligation d’indemnisation compensatrice de congés payés.
-    Pf = simulation.legislation_at(period.start).cotsoc.exo_bas_sal.fillon
-    seuil = Pf.seuil
-    tx_max = (Pf.tx_max * not_(majoration) + Pf.tx_max2 * majoration)
-    if seuil <= 1:
-        return 0
+    tx_max = (tx_max * not_(majoration) + tx_max2 * majoration)
     ratio_smic_salaire = smic_proratise / (assiette_allegement + 1e-16)
     # règle d'arrondi: 4 décimales au dix-millième le plus proche
-    taux_fillon = round_(tx_max * min_(1, max_(seuil * ratio_smic_salaire - 1, 0) / (seuil - 1)), 4)
+    # Pas d'allègement quand le seuil n'est pas supérieur à 1.
+    taux_fillon = (seuil > 1) * round_(
+        tx_max * min_(1, max_(seuil * ratio_smic_salaire - 1, 0) / max_(seuil - 1, 1e-16)), 4)
 
     # Montant de l'allegment
     allegement_fillon = taux_fillon * assiette_allegement
     return allegement_fillon
 
 
+def get_allegement_fillon_by_month(simulation, period, compute = True):
+    year = period.start.offset('first-of', 'year').period('year')
+    return get_amounts_by_month(
+        simulation,
+        (year, 'allegement_fillon'),
+        compute_amounts = (lambda: compute_allegement_fillon_by_month(simulation, year)) if compute else None,
+        )
+
+
 def taux_exo_cice(assiette_allegement, smic_proratise, P):
     Pc = P.exo_bas_sal.cice
     taux_cice = ((assiette_allegement / (smic_proratise + 1e-16)) <= Pc.max) * Pc.taux
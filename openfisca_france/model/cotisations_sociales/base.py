@@ -23,11 +23,41 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
-from numpy import zeros
+import collections
+import weakref
 
+from numpy import (arange, argsort, asarray, bincount, busday_count as original_busday_count, column_stack,
+    concatenate, cumsum, datetime64, empty, int64, is_busday, ndarray, zeros)
+
+from ...assets.holidays import holidays
 from ..base import CAT
 
 
+# Number of business days between busday_count_origin and each day up to busday_count_stop (see busday_count),
+# computed at first use.
+busday_count_origin = datetime64('1900-01-01')
+busday_count_stop = datetime64('2100-01-01')
+cumulated_busdays = None
+# Amounts computed for the 12 months of a year at once (see get_amounts_by_month), by simulation.
+amounts_by_month_by_key_by_simulation = weakref.WeakKeyDictionary()
+# Categories of employees (type_sal) for which a contribution may not be zero. Contributions not listed here may be
+# non-zero for every category.
+titulaires_cnracl_ou_etat = ('public_titulaire_etat', 'public_titulaire_territoriale', 'public_titulaire_hospitaliere')
+type_sal_names_by_component_name = dict(
+    contribution_exceptionnelle_solidarite_employe = titulaires_cnracl_ou_etat + ('public_non_titulaire',),
+    fonds_emploi_hospitalier = ('public_titulaire_hospitaliere',),
+    ircantec_employe = ('public_non_titulaire',),
+    ircantec_employeur = ('public_non_titulaire',),
+    pension_civile_employe = titulaires_cnracl_ou_etat,
+    pension_civile_employeur = titulaires_cnracl_ou_etat,
+    rafp_employe = titulaires_cnracl_ou_etat,
+    rafp_employeur = titulaires_cnracl_ou_etat,
+    )
+# Partition of individuals by type_sal (see get_indices_by_type_sal), with the type_sal array it was built from, by
+# period of type_sal and by simulation.
+indices_by_type_sal_by_period_by_simulation = weakref.WeakKeyDictionary()
+
+
 def apply_bareme_for_relevant_type_sal(
         bareme_by_type_sal_name = None,
         bareme_name = None,
@@ -35,26 +65,182 @@ def apply_bareme_for_relevant_type_sal(
         base = None,
         plafond_securite_sociale = None,
         round_base_decimals = 2,
+        period = None,
+        simulation = None,
+        indices_by_type_sal = None,
         ):
     assert bareme_by_type_sal_name is not None
     assert bareme_name is not None
     assert base is not None
     assert plafond_securite_sociale is not None
-    assert type_sal is not None
+    assert type_sal is not None or indices_by_type_sal is not None
     cotisation = zeros(len(base))
+    if indices_by_type_sal is None:
+        indices_by_type_sal = get_indices_by_type_sal(type_sal, period = period, simulation = simulation)
     for type_sal_name, type_sal_index in CAT:
         if type_sal_name not in bareme_by_type_sal_name:  # to deal with public_titulaire_militaire
             continue
         bareme = bareme_by_type_sal_name[type_sal_name].get(bareme_name)  # TODO; should have better warnings
-        if bareme is not None:
-            cotisation += bareme.calc(
-                base * (type_sal == type_sal_index),
-                factor = plafond_securite_sociale,
+        indices = indices_by_type_sal.get(type_sal_index)
+        if bareme is not None and indices is not None:
+            # Evaluate the barème only on the individuals of this type_sal.
+            if isinstance(plafond_securite_sociale, ndarray):
+                factor = plafond_securite_sociale[indices]
+            else:
+                factor = plafond_securite_sociale
+            cotisation[indices] = bareme.calc(
+                base[indices],
+                factor = factor,
                 round_base_decimals = round_base_decimals,
                 )
     return - cotisation
 
 
+def busday_count(begin_dates, end_dates):
+    """Count the business days (neither week-end days nor holidays) in [begin_dates, end_dates).
+
+    Same result as numpy.busday_count(begin_dates, end_dates, holidays = holidays), but using a table of the
+    cumulated number of business days since busday_count_origin: a count is two lookups and a subtraction.
+    """
+    global cumulated_busdays
+    if cumulated_busdays is None:
+        cumulated_busdays = concatenate((
+            [0],
+            cumsum(is_busday(arange(busday_count_origin, busday_count_stop), holidays = holidays), dtype = int64),
+            ))
+    begin_dates = asarray(begin_dates, dtype = 'datetime64[D]')
+    end_dates = asarray(end_dates, dtype = 'datetime64[D]')
+    begin_indices = (begin_dates - busday_count_origin).astype(int64)
+    end_indices = (end_dates - busday_count_origin).astype(int64)
+    in_table = (
+        (begin_indices >= 0) & (begin_indices < len(cumulated_busdays)) &
+        (end_indices >= 0) & (end_indices < len(cumulated_busdays))
+        )
+    if in_table.all():
+        return cumulated_busdays[end_indices] - cumulated_busdays[begin_indices]
+    # Dates outside the table
+    count = empty(in_table.shape, dtype = int64)
+    count[in_table] = cumulated_busdays[end_indices[in_table]] - cumulated_busdays[begin_indices[in_table]]
+    count[~in_table] = original_busday_count(begin_dates[~in_table], end_dates[~in_table], holidays = holidays)
+    return count
+
+
+def calculate_by_month(simulation, variable_name, months, add = False):
+    """Return the values of a variable for each of the given months, as a (individus x mois) matrix."""
+    calculate = simulation.calculate_add if add else simulation.calculate
+    return column_stack([
+        calculate(variable_name, month)
+        for month in months
+        ])
+
+
+def get_amounts_by_month(simulation, key, compute_amounts = None):
+    """Return the amounts computed at once for the 12 months of a year, identified by key.
+
+    The amounts are computed by compute_amounts() the first time they are requested for a simulation. When
+    compute_amounts is None, return None instead.
+    """
+    amounts_by_month_by_key = amounts_by_month_by_key_by_simulation.get(simulation)
+    if amounts_by_month_by_key is None:
+        if compute_amounts is None:
+            return None
+        amounts_by_month_by_key_by_simulation[simulation] = amounts_by_month_by_key = {}
+    amounts_by_month = amounts_by_month_by_key.get(key)
+    if amounts_by_month is None and compute_amounts is not None:
+        amounts_by_month_by_key[key] = amounts_by_month = compute_amounts()
+    return amounts_by_month
+
+
+def get_indices_by_type_sal(type_sal, period = None, simulation = None):
+    """Return the indices of the individuals of each type_sal, as a dict {type_sal index: indices array}.
+
+    The partition is computed with a single sort. When the simulation and the period of type_sal are given, it is
+    cached by simulation and period, so that the many contributions computed for the same period share it. The cached
+    partition is used only for the type_sal array it was built from: it is computed again when the holder of type_sal
+    has been given a new array. The cache of a simulation is also cleared when type_sal changes (see
+    dependency_graph.invalidate).
+    """
+    if simulation is not None and period is not None:
+        indices_by_type_sal_by_period = indices_by_type_sal_by_period_by_simulation.get(simulation)
+        if indices_by_type_sal_by_period is None:
+            indices_by_type_sal_by_period_by_simulation[simulation] = indices_by_type_sal_by_period = {}
+        cached = indices_by_type_sal_by_period.get(period)
+        if cached is not None:
+            cached_type_sal, indices_by_type_sal = cached
+            if cached_type_sal is type_sal:
+                return indices_by_type_sal
+        indices_by_type_sal = get_indices_by_type_sal(type_sal)
+        indices_by_type_sal_by_period[period] = (type_sal, indices_by_type_sal)
+        return indices_by_type_sal
+    order = argsort(type_sal, kind = 'mergesort')
+    counts = bincount(type_sal, minlength = len(CAT._vars))
+    stops = cumsum(counts)
+    indices_by_type_sal = dict(
+        (type_sal_index, order[stop - count:stop])
+        for type_sal_index, (count, stop) in enumerate(zip(counts, stops))
+        if count > 0
+        )
+    return indices_by_type_sal
+
+
+def get_indices_by_type_sal_by_month(simulation, months):
+    """Return the partition by type_sal of the flattened (individus x mois) matrix of the given months.
+
+    The partition is built from the partitions of each month (see get_indices_by_type_sal): the cell (individu, mois)
+    of the flattened matrix has the index individu * len(months) + mois.
+    """
+    months_count = len(months)
+    indices_list_by_type_sal = collections.defaultdict(list)
+    for month_index, month in enumerate(months):
+        type_sal = simulation.calculate('type_sal', month)
+        for type_sal_index, indices in get_indices_by_type_sal(type_sal, period = month,
+                simulation = simulation).iteritems():
+            indices_list_by_type_sal[type_sal_index].append(indices * months_count + month_index)
+    return dict(
+        (type_sal_index, concatenate(indices_list))
+        for type_sal_index, indices_list in indices_list_by_type_sal.iteritems()
+        )
+
+
+def get_months(year):
+    return [
+        year.start.offset(month_index, 'month').period('month')
+        for month_index in range(12)
+        ]
+
+
+def get_present_type_sal(simulation, period):
+    """Return, for each type_sal, whether an individual belongs to it during at least a month of the period."""
+    months_count = period.size * 12 if period.unit == u'year' else period.size
+    present_type_sal = zeros(len(CAT._vars), dtype = bool)
+    for month_index in range(months_count):
+        month = period.start.offset(month_index, 'month').period('month')
+        present_type_sal |= bincount(simulation.calculate('type_sal', month), minlength = len(CAT._vars)) > 0
+    return present_type_sal
+
+
+def group_months_by_bareme(bareme_by_type_sal_name_by_month, bareme_name):
+    """Group the indices of the months whose barèmes are identical, so that they are evaluated together.
+
+    Return a list of (months indices, bareme_by_type_sal_name) couples.
+    """
+    months_index_by_key = collections.OrderedDict()
+    bareme_by_type_sal_name_by_key = {}
+    for month_index, bareme_by_type_sal_name in enumerate(bareme_by_type_sal_name_by_month):
+        key = []
+        for type_sal_name, type_sal_index in CAT:
+            bareme = bareme_by_type_sal_name[type_sal_name].get(bareme_name) \
+                if type_sal_name in bareme_by_type_sal_name else None
+            key.append(None if bareme is None else (tuple(bareme.thresholds), tuple(bareme.rates)))
+        key = tuple(key)
+        months_index_by_key.setdefault(key, []).append(month_index)
+        bareme_by_type_sal_name_by_key.setdefault(key, bareme_by_type_sal_name)
+    return [
+        (months_index, bareme_by_type_sal_name_by_key[months_key])
+        for months_key, months_index in months_index_by_key.iteritems()
+        ]
+
+
 def montant_csg_crds(
         law_node = None,
         base_avec_abattement = None,
@@ -79,3 +265,40 @@ def montant_csg_crds(
         return -law_node.taux * base
     else:
         return - (law_node.taux_plein * indicatrice_taux_plein + law_node.taux_reduit * indicatrice_taux_reduit) * base
+
+
+def sum_components(simulation, period, components_name, add = False, subtracted_components_name = ()):
+    """Return the sum of individual variables, minus the subtracted ones, accumulated in a single array.
+
+    The components are calculated with simulation.calculate (or simulation.calculate_add when add is True). A
+    component calculated with another method is given as a (name, method) pair, like
+    ('tehr', simulation.calculate_divide).
+
+    A component listed in type_sal_names_by_component_name is not calculated when no individual belongs to one of its
+    categories during the period, because it is zero for everybody.
+    """
+    default_calculate = simulation.calculate_add if add else simulation.calculate
+    present_type_sal = None
+    total = None
+    for sign, names in ((1, components_name), (-1, subtracted_components_name)):
+        for name in names:
+            if isinstance(name, tuple):
+                name, calculate = name
+            else:
+                calculate = default_calculate
+            type_sal_names = type_sal_names_by_component_name.get(name)
+            if type_sal_names is not None:
+                if present_type_sal is None:
+                    present_type_sal = get_present_type_sal(simulation, period)
+                if not any(present_type_sal[CAT[type_sal_name]] for type_sal_name in type_sal_names):
+                    continue
+            component = calculate(name, period)
+            if total is None:
+                total = component.copy() if sign > 0 else -component
+            elif sign > 0:
+                total += component
+            else:
+                total -= component
+    if total is None:
+        total = zeros(simulation.persons.count)
+    return total
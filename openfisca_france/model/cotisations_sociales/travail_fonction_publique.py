@@ -53,14 +53,18 @@ class allocations_temporaires_invalidite(SimpleFormulaColumn):
             bareme_by_type_sal_name = _P.cotsoc.cotisations_employeur,
             bareme_name = "ati",
             base = base,
+            period = period,
             plafond_securite_sociale = plafond_securite_sociale,
+            simulation = simulation,
             type_sal = type_sal,
             )
         cotisation_collectivites_locales = apply_bareme_for_relevant_type_sal(
             bareme_by_type_sal_name = _P.cotsoc.cotisations_employeur,
             bareme_name = "atiacl",
             base = base,
+            period = period,
             plafond_securite_sociale = plafond_securite_sociale,
+            simulation = simulation,
             type_sal = type_sal,
             )
         return period, cotisation_etat + cotisation_collectivites_locales
@@ -111,7 +115,9 @@ class contribution_exceptionnelle_solidarite_employe(SimpleFormulaColumn):
                     ),
                 _P.cotsoc.sal.fonc.commun.plafond_base_solidarite,
                 ),
+            period = period,
             plafond_securite_sociale = plafond_securite_sociale,
+            simulation = simulation,
             type_sal = type_sal,
             )
         return period, cotisation
@@ -134,7 +140,9 @@ class fonds_emploi_hospitalier(SimpleFormulaColumn):
             bareme_by_type_sal_name = _P.cotsoc.cotisations_employeur,
             bareme_name = "feh",
             base = assiette_cotisations_sociales_public,  # salbrut + indemnite_residence TODO check base
+            period = period,
             plafond_securite_sociale = plafond_securite_sociale,
+            simulation = simulation,
             type_sal = type_sal,
             )
         return period, cotisation
@@ -171,7 +179,9 @@ class ircantec_employe(SimpleFormulaColumn):
             bareme_by_type_sal_name = _P.cotsoc.cotisations_salarie,
             bareme_name = "ircantec",
             base = assiette_cotisations_sociales,
+            period = period,
             plafond_securite_sociale = plafond_securite_sociale,
+            simulation = simulation,
             type_sal = type_sal,
             )
         return period, ircantec
@@ -194,7 +204,9 @@ class ircantec_employeur(SimpleFormulaColumn):
             bareme_by_type_sal_name = _P.cotsoc.cotisations_employeur,
             bareme_name = "ircantec",
             base = assiette_cotisations_sociales,
+            period = period,
             plafond_securite_sociale = plafond_securite_sociale,
+            simulation = simulation,
             type_sal = type_sal,
             )
         return period, ircantec
@@ -28,14 +28,15 @@ from __future__ import division
 import logging
 
 
-from numpy import int16, maximum as max_, minimum as min_, logical_not as not_, ones, round as round_
+from numpy import int16, maximum as max_, minimum as min_, logical_not as not_, ones, round as round_, zeros
 from openfisca_core.enumerations import Enum
 from openfisca_core.columns import EnumCol, FloatCol
 from openfisca_core.formulas import SimpleFormulaColumn
 
 
 from ..base import *  # noqa analysis:ignore
-from .base import apply_bareme_for_relevant_type_sal
+from .base import (apply_bareme_for_relevant_type_sal, calculate_by_month, get_amounts_by_month,
+    get_indices_by_type_sal_by_month, get_months, group_months_by_bareme)
 
 
 log = logging.getLogger(__name__)
@@ -79,10 +80,7 @@ def compute_cotisation(simulation, period, cotisation_type = None, bareme_name =
 
     assert cotisation_type is not None
     law = simulation.legislation_at(period.start)
-    if cotisation_type == "employeur":
-        bareme_by_type_sal_name = law.cotsoc.cotisations_employeur
-    elif cotisation_type == "salarie":
-        bareme_by_type_sal_name = law.cotsoc.cotisations_salarie
+    bareme_by_type_sal_name = get_bareme_by_type_sal_name(law, cotisation_type)
     assert bareme_name is not None
 
     assiette_cotisations_sociales = simulation.calculate_add('assiette_cotisations_sociales', period)
@@ -93,7 +91,9 @@ def compute_cotisation(simulation, period, cotisation_type = None, bareme_name =
         bareme_by_type_sal_name = bareme_by_type_sal_name,
         bareme_name = bareme_name,
         base = assiette_cotisations_sociales,
+        period = period,
         plafond_securite_sociale = plafond_securite_sociale,
+        simulation = simulation,
         type_sal = type_sal,
         )
     return cotisation
@@ -103,16 +103,26 @@ def compute_cotisation_annuelle(simulation, period, cotisation_type = None, bare
     if period.start.month < 12:
         return 0
     if period.start.month == 12:
-        return compute_cotisation(
+        return get_cotisation_by_month(
             simulation,
-            period = period.start.offset('first-of', 'year').period('year'),
+            period,
             cotisation_type = cotisation_type,
             bareme_name = bareme_name,
-            )
+            )['annuelle']
 
 
 def compute_cotisation_anticipee(simulation, period, cotisation_type = None, bareme_name = None, variable_name = None):
     if period.start.month < 12:
+        # Use the amounts of the whole year when they have already been computed by the regularisation.
+        cotisation_by_month = get_cotisation_by_month(
+            simulation,
+            period,
+            cotisation_type = cotisation_type,
+            bareme_name = bareme_name,
+            compute = False,
+            )
+        if cotisation_by_month is not None:
+            return cotisation_by_month['mensuelle'][:, period.start.month - 1]
         return compute_cotisation(
             simulation,
             period = period.start.offset('first-of', 'month').period('month'),
@@ -120,15 +130,81 @@ def compute_cotisation_anticipee(simulation, period, cotisation_type = None, bar
             bareme_name = bareme_name,
             )
     if period.start.month == 12:
+        # The regularisation needs every month of the year: compute them at once, before the cumul of the previous
+        # months.
+        cotisation_annuelle = get_cotisation_by_month(
+            simulation,
+            period,
+            cotisation_type = cotisation_type,
+            bareme_name = bareme_name,
+            )['annuelle']
         cumul = simulation.calculate_add(variable_name, period.start.offset('first-of', 'month').offset(
             -11, 'month').period('month', 11))
 
-        return compute_cotisation(
+        return cotisation_annuelle - cumul
+
+
+def compute_cotisation_by_month(simulation, year, cotisation_type = None, bareme_name = None):
+    """Calcule en une passe les cotisations mensuelles des 12 mois de l'année, ainsi que la cotisation annuelle.
+
+    Les mois dont les barèmes sont identiques (en général toute l'année) sont évalués ensemble, sur la matrice
+    (individus x mois) aplatie.
+    """
+    months = get_months(year)
+    assiette_cotisations_sociales = calculate_by_month(simulation, 'assiette_cotisations_sociales', months,
+        add = True)
+    plafond_securite_sociale = calculate_by_month(simulation, 'plafond_securite_sociale', months, add = True)
+
+    cotisation_mensuelle = zeros(assiette_cotisations_sociales.shape)
+    for months_index, bareme_by_type_sal_name in group_months_by_bareme(
+            [
+                get_bareme_by_type_sal_name(simulation.legislation_at(month.start), cotisation_type)
+                for month in months
+                ],
+            bareme_name,
+            ):
+        shape = (len(cotisation_mensuelle), len(months_index))
+        cotisation_mensuelle[:, months_index] = apply_bareme_for_relevant_type_sal(
+            bareme_by_type_sal_name = bareme_by_type_sal_name,
+            bareme_name = bareme_name,
+            base = assiette_cotisations_sociales[:, months_index].ravel(),
+            indices_by_type_sal = get_indices_by_type_sal_by_month(
+                simulation,
+                [months[month_index] for month_index in months_index],
+                ),
+            plafond_securite_sociale = plafond_securite_sociale[:, months_index].ravel(),
+            ).reshape(shape)
+
+    return dict(
+        annuelle = compute_cotisation(
+            simulation,
+            period = year,
+            cotisation_type = cotisation_type,
+            bareme_name = bareme_name,
+            ),
+        mensuelle = cotisation_mensuelle,
+        )
+
+
+def get_bareme_by_type_sal_name(law, cotisation_type):
+    if cotisation_type == "employeur":
+        return law.cotsoc.cotisations_employeur
+    elif cotisation_type == "salarie":
+        return law.cotsoc.cotisations_salarie
+
+
+def get_cotisation_by_month(simulation, period, cotisation_type = None, bareme_name = None, compute = True):
+    year = period.start.offset('first-of', 'year').period('year')
+    return get_amounts_by_month(
+        simulation,
+        (year, cotisation_type, bareme_name),
+        compute_amounts = (lambda: compute_cotisation_by_month(
             simulation,
-            period = period.start.offset('first-of', 'year').period('year'),
+            year,
             cotisation_type = cotisation_type,
             bareme_name = bareme_name,
-            ) - cumul
+            )) if compute else None,
+        )
 
 
 # Cotisations proprement dites
@@ -185,7 +261,9 @@ class agff_tranche_a_employeur(SimpleFormulaColumn):
             bareme_by_type_sal_name = law.cotsoc.cotisations_employeur,
             bareme_name = "agffnc",
             base = assiette_cotisations_sociales,
+            period = period,
             plafond_securite_sociale = plafond_securite_sociale,
+            simulation = simulation,
             type_sal = type_sal,
             )
 
@@ -193,7 +271,9 @@ class agff_tranche_a_employeur(SimpleFormulaColumn):
             bareme_by_type_sal_name = law.cotsoc.cotisations_employeur,
             bareme_name = "agffc",
             base = assiette_cotisations_sociales,
+            period = period,
             plafond_securite_sociale = plafond_securite_sociale,
+            simulation = simulation,
             type_sal = type_sal,
             )
         return period, cotisation_cadre + cotisation_non_cadre
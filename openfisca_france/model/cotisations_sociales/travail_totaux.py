@@ -30,7 +30,7 @@ import logging
 
 
 from ..base import *  # noqa analysis:ignore
-from .base import montant_csg_crds
+from .base import montant_csg_crds, sum_components
 
 
 log = logging.getLogger(__name__)
@@ -48,16 +48,11 @@ class cotisations_patronales(SimpleFormulaColumn):
 
     def function(self, simulation, period):
         period = period
-        cotisations_patronales_contributives = simulation.calculate('cotisations_patronales_contributives', period)
-        cotisations_patronales_non_contributives = simulation.calculate(
-            'cotisations_patronales_non_contributives', period)
-        cotisations_patronales_main_d_oeuvre = simulation.calculate('cotisations_patronales_main_d_oeuvre', period)
-
-        return period, (
-            cotisations_patronales_contributives +
-            cotisations_patronales_non_contributives +
-            cotisations_patronales_main_d_oeuvre
-            )
+        return period, sum_components(simulation, period, (
+            'cotisations_patronales_contributives',
+            'cotisations_patronales_non_contributives',
+            'cotisations_patronales_main_d_oeuvre',
+            ))
 
 
 @reference_formula
@@ -68,37 +63,22 @@ class cotisations_patronales_contributives(SimpleFormulaColumn):
 
     def function(self, simulation, period):
         period = period
-        ags = simulation.calculate('ags', period)
-        agff_tranche_a_employeur = simulation.calculate('agff_tranche_a_employeur', period)
-        apec_employeur = simulation.calculate('apec_employeur', period)
-        arrco_tranche_a_employeur = simulation.calculate('arrco_tranche_a_employeur', period)
-        assedic_employeur = simulation.calculate('assedic_employeur', period)
-        cotisation_exceptionnelle_temporaire_employeur = simulation.calculate(
-            'cotisation_exceptionnelle_temporaire_employeur', period)
-        fonds_emploi_hospitalier = simulation.calculate('fonds_emploi_hospitalier', period)
-        ircantec_employeur = simulation.calculate('ircantec_employeur', period)
-        pension_civile_employeur = simulation.calculate('pension_civile_employeur', period)
-        rafp_employeur = simulation.calculate('rafp_employeur', period)
-        vieillesse_deplafonnee_employeur = simulation.calculate('vieillesse_deplafonnee_employeur', period)
-        vieillesse_plafonnee_employeur = simulation.calculate('vieillesse_plafonnee_employeur', period)
-
-        cotisations_patronales_contributives = (
+        return period, sum_components(simulation, period, (
             # prive
-            ags +
-            agff_tranche_a_employeur +
-            apec_employeur +
-            arrco_tranche_a_employeur +
-            assedic_employeur +
-            cotisation_exceptionnelle_temporaire_employeur +
-            vieillesse_deplafonnee_employeur +
-            vieillesse_plafonnee_employeur +
+            'ags',
+            'agff_tranche_a_employeur',
+            'apec_employeur',
+            'arrco_tranche_a_employeur',
+            'assedic_employeur',
+            'cotisation_exceptionnelle_temporaire_employeur',
+            'vieillesse_deplafonnee_employeur',
+            'vieillesse_plafonnee_employeur',
             # public
-            fonds_emploi_hospitalier +
-            ircantec_employeur +
-            pension_civile_employeur +
-            rafp_employeur
-            )
-        return period, cotisations_patronales_contributives
+            'fonds_emploi_hospitalier',
+            'ircantec_employeur',
+            'pension_civile_employeur',
+            'rafp_employeur',
+            ))
 
 
 @reference_formula
@@ -109,33 +89,20 @@ class cotisations_patronales_main_d_oeuvre(SimpleFormulaColumn):
 
     def function(self, simulation, period):
         period = period
-        conge_individuel_formation_cdd = simulation.calculate('conge_individuel_formation_cdd', period)
-        contribution_developpement_apprentissage = simulation.calculate(
-            'contribution_developpement_apprentissage', period)
-        contribution_solidarite_autonomie = simulation.calculate('contribution_solidarite_autonomie', period)
-        contribution_supplementaire_apprentissage = simulation.calculate(
-            'contribution_supplementaire_apprentissage', period)
-        fnal_tranche_a = simulation.calculate('fnal_tranche_a', period)
-        fnal_tranche_a_plus_20 = simulation.calculate('fnal_tranche_a_plus_20', period)
-        formation_professionnelle = simulation.calculate('formation_professionnelle', period)
-        participation_effort_construction = simulation.calculate('participation_effort_construction', period)
-        prevoyance_obligatoire_cadre = simulation.calculate('prevoyance_obligatoire_cadre')
-        taxe_apprentissage = simulation.calculate('taxe_apprentissage', period)
-        versement_transport = simulation.calculate('versement_transport', period)
-
-        cotisations_patronales_main_d_oeuvre = (
-            conge_individuel_formation_cdd +
-            contribution_developpement_apprentissage +
-            contribution_solidarite_autonomie +
-            contribution_supplementaire_apprentissage +
-            formation_professionnelle +
-            fnal_tranche_a +
-            fnal_tranche_a_plus_20 +
-            participation_effort_construction +
-            prevoyance_obligatoire_cadre +
-            taxe_apprentissage +
-            versement_transport
-            )
+        cotisations_patronales_main_d_oeuvre = sum_components(simulation, period, (
+            'conge_individuel_formation_cdd',
+            'contribution_developpement_apprentissage',
+            'contribution_solidarite_autonomie',
+            'contribution_supplementaire_apprentissage',
+            'formation_professionnelle',
+            'fnal_tranche_a',
+            'fnal_tranche_a_plus_20',
+            'participation_effort_construction',
+            'taxe_apprentissage',
+            'versement_transport',
+            ))
+        # Read at the period of the simulation, not at the period of the formula like the components summed above.
+        cotisations_patronales_main_d_oeuvre += simulation.calculate('prevoyance_obligatoire_cadre')
         return period, cotisations_patronales_main_d_oeuvre
 
 
@@ -147,20 +114,13 @@ class cotisations_patronales_non_contributives(SimpleFormulaColumn):
 
     def function(self, simulation, period):
         period = period
-        accident_du_travail = simulation.calculate('accident_du_travail', period)
-        allocations_temporaires_invalidite = simulation.calculate('allocations_temporaires_invalidite', period)
-        famille = simulation.calculate('famille', period)
-        maladie_employeur = simulation.calculate('maladie_employeur', period)
-        taxe_salaires = simulation.calculate('taxe_salaires', period)
-
-        cotisations_patronales_non_contributives = (
-            allocations_temporaires_invalidite +
-            accident_du_travail +
-            famille +
-            maladie_employeur +
-            taxe_salaires
-            )
-        return period, cotisations_patronales_non_contributives
+        return period, sum_components(simulation, period, (
+            'allocations_temporaires_invalidite',
+            'accident_du_travail',
+            'famille',
+            'maladie_employeur',
+            'taxe_salaires',
+            ))
 
 
 @reference_formula
@@ -171,36 +131,21 @@ class cotisations_salariales_contributives(SimpleFormulaColumn):
 
     def function(self, simulation, period):
         period = period
-        agff_tranche_a_employe = simulation.calculate_add('agff_tranche_a_employe', period)
-        agirc_tranche_b_employe = simulation.calculate_add('agirc_tranche_b_employe', period)
-        apec_employe = simulation.calculate_add('apec_employe', period)
-        arrco_tranche_a_employe = simulation.calculate_add('arrco_tranche_a_employe', period)
-        assedic_employe = simulation.calculate_add('assedic_employe', period)
-        cotisation_exceptionnelle_temporaire_employe = simulation.calculate_add(
-            'cotisation_exceptionnelle_temporaire_employe', period)
-        ircantec_employe = simulation.calculate_add('ircantec_employe', period)
-        pension_civile_employe = simulation.calculate_add('pension_civile_employe', period)
-        rafp_employe = simulation.calculate_add('rafp_employe', period)
-        vieillesse_deplafonnee_employe = simulation.calculate_add('vieillesse_deplafonnee_employe', period)
-        vieillesse_plafonnee_employe = simulation.calculate_add('vieillesse_plafonnee_employe', period)
-
-        cotisations_salariales_contributives = (
+        return period, sum_components(simulation, period, (
             # prive
-            agff_tranche_a_employe +
-            agirc_tranche_b_employe +
-            apec_employe +
-            arrco_tranche_a_employe +
-            assedic_employe +
-            cotisation_exceptionnelle_temporaire_employe +
-            vieillesse_deplafonnee_employe +
-            vieillesse_plafonnee_employe +
+            'agff_tranche_a_employe',
+            'agirc_tranche_b_employe',
+            'apec_employe',
+            'arrco_tranche_a_employe',
+            'assedic_employe',
+            'cotisation_exceptionnelle_temporaire_employe',
+            'vieillesse_deplafonnee_employe',
+            'vieillesse_plafonnee_employe',
             # public
-            ircantec_employe +
-            pension_civile_employe +
-            rafp_employe
-            )
-
-        return period, cotisations_salariales_contributives
+            'ircantec_employe',
+            'pension_civile_employe',
+            'rafp_employe',
+            ), add = True)
 
 
 @reference_formula
@@ -211,18 +156,12 @@ class cotisations_salariales_non_contributives(SimpleFormulaColumn):
 
     def function(self, simulation, period):
         period = period
-        contribution_exceptionnelle_solidarite_employe = simulation.calculate_add(
-            'contribution_exceptionnelle_solidarite_employe', period)
-        maladie_employe = simulation.calculate_add('maladie_employe', period)
-
-        cotisations_salariales_non_contributives = (
+        return period, sum_components(simulation, period, (
             # prive
-            maladie_employe +
+            'maladie_employe',
             # public
-            contribution_exceptionnelle_solidarite_employe
-            )
-
-        return period, cotisations_salariales_non_contributives
+            'contribution_exceptionnelle_solidarite_employe',
+            ), add = True)
 
 
 @reference_formula
@@ -233,11 +172,10 @@ class cotisations_salariales(SimpleFormulaColumn):
 
     def function(self, simulation, period):
         period = period
-        cotisations_salariales_contributives = simulation.calculate('cotisations_salariales_contributives', period)
-        cotisations_salariales_non_contributives = simulation.calculate(
-            'cotisations_salariales_non_contributives', period)
-
-        return period, cotisations_salariales_contributives + cotisations_salariales_non_contributives
+        return period, sum_components(simulation, period, (
+            'cotisations_salariales_contributives',
+            'cotisations_salariales_non_contributives',
+            ))
 
 
 @reference_formula
@@ -439,30 +377,26 @@ class salsuperbrut(SimpleFormulaColumn):
 
     def function(self, simulation, period):
         period = period
-        salaire_de_base = simulation.calculate('salaire_de_base', period)
-        primes_fonction_publique = simulation.calculate('primes_fonction_publique', period)
-        indemnite_residence = simulation.calculate('indemnite_residence', period)
-        supp_familial_traitement = simulation.calculate('supp_familial_traitement', period)
-        cotisations_patronales = simulation.calculate('cotisations_patronales', period)
-        depense_cantine_titre_restaurant_employeur = simulation.calculate(
-            'depense_cantine_titre_restaurant_employeur', period)
-        allegement_fillon = simulation.calculate('allegement_fillon', period)
-        credit_impot_competitivite_emploi = simulation.calculate('credit_impot_competitivite_emploi', period)
-        reintegration_titre_restaurant_employeur = simulation.calculate(
-            'reintegration_titre_restaurant_employeur', period)
-        remuneration_principale = simulation.calculate('remuneration_principale', period)
-
-        taxe_salaires = simulation.calculate('taxe_salaires', period)
-        tehr = simulation.calculate_divide('tehr', period)
-
-        salsuperbrut = (
-            salaire_de_base + depense_cantine_titre_restaurant_employeur - reintegration_titre_restaurant_employeur +
-            remuneration_principale +
-            primes_fonction_publique + indemnite_residence + supp_familial_traitement +
-            - cotisations_patronales
-            - allegement_fillon - credit_impot_competitivite_emploi - taxe_salaires - tehr
+        salsuperbrut = sum_components(
+            simulation,
+            period,
+            (
+                'salaire_de_base',
+                'depense_cantine_titre_restaurant_employeur',
+                'remuneration_principale',
+                'primes_fonction_publique',
+                'indemnite_residence',
+                'supp_familial_traitement',
+                ),
+            subtracted_components_name = (
+                'reintegration_titre_restaurant_employeur',
+                'cotisations_patronales',
+                'allegement_fillon',
+                'credit_impot_competitivite_emploi',
+                'taxe_salaires',
+                ('tehr', simulation.calculate_divide),
+                ),
             )
-
         return period, salsuperbrut
 
 
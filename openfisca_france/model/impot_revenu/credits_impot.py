@@ -30,6 +30,7 @@ import logging
 from numpy import logical_not as not_, maximum as max_, minimum as min_, around, logical_or as or_
 
 from ..base import *  # noqa analysis:ignore
+from ..uniform_formulas import use_uniform_short_circuit
 
 log = logging.getLogger(__name__)
 
@@ -1708,3 +1709,7 @@ class saldom2(DatedFormulaColumn):
         maxEffectif = maxNonInv * not_(isinvalid) + P.max3 * isinvalid
 
         return period, P.taux * min_(f7db, maxEffectif)
+
+
+# Most foyers fill none of the boxes read by these formulas.
+use_uniform_short_circuit(__name__)
@@ -30,6 +30,8 @@ import logging
 from numpy import minimum as min_, maximum as max_, logical_not as not_, around
 
 from ..base import *  # noqa analysis:ignore
+from ..sparse_inputs import calculate_sparse
+from ..uniform_formulas import use_uniform_short_circuit
 
 
 log = logging.getLogger(__name__)
@@ -1002,13 +1004,13 @@ class doment(DatedFormulaColumn):
         Investissements dans les DOM-TOM dans le cadre d'une entrepise.
         '''
         period = period.start.offset('first-of', 'month').period('year')
-        f7ur = simulation.calculate('f7ur', period)
-        f7oz = simulation.calculate('f7oz', period)
-        f7pz = simulation.calculate('f7pz', period)
-        f7qz = simulation.calculate('f7qz', period)
-        f7rz = simulation.calculate('f7rz', period)
+        f7ur = calculate_sparse(simulation, 'f7ur', period)
+        f7oz = calculate_sparse(simulation, 'f7oz', period)
+        f7pz = calculate_sparse(simulation, 'f7pz', period)
+        f7qz = calculate_sparse(simulation, 'f7qz', period)
+        f7rz = calculate_sparse(simulation, 'f7rz', period)
 
-        return period,  f7ur + f7oz + f7pz + f7qz + f7rz
+        return period, (f7ur + f7oz + f7pz + f7qz + f7rz).toarray()
 
     @dated_function(start = date(2006, 1, 1), stop = date(2008, 12, 31))
     def function_20060101_20081231(self, simulation, period):
@@ -1016,14 +1018,14 @@ class doment(DatedFormulaColumn):
         Investissements dans les DOM-TOM dans le cadre d'une entrepise.
         '''
         period = period.start.offset('first-of', 'month').period('year')
-        f7ur = simulation.calculate('f7ur', period)
-        f7oz = simulation.calculate('f7oz', period)
-        f7pz = simulation.calculate('f7pz', period)
-        f7qz = simulation.calculate('f7qz', period)
-        f7rz = simulation.calculate('f7rz', period)
-        f7sz = simulation.calculate('f7sz', period)
+        f7ur = calculate_sparse(simulation, 'f7ur', period)
+        f7oz = calculate_sparse(simulation, 'f7oz', period)
+        f7pz = calculate_sparse(simulation, 'f7pz', period)
+        f7qz = calculate_sparse(simulation, 'f7qz', period)
+        f7rz = calculate_sparse(simulation, 'f7rz', period)
+        f7sz = calculate_sparse(simulation, 'f7sz', period)
 
-        return period,  f7ur + f7oz + f7pz + f7qz + f7rz + f7sz
+        return period, (f7ur + f7oz + f7pz + f7qz + f7rz + f7sz).toarray()
 
     @dated_function(start = date(2009, 1, 1), stop = date(2009, 12, 31))
     def function_20090101_20091231(self, simulation, period):
@@ -1031,19 +1033,19 @@ class doment(DatedFormulaColumn):
         Investissements dans les DOM-TOM dans le cadre d'une entrepise.
         '''
         period = period.start.offset('first-of', 'month').period('year')
-        f7oz = simulation.calculate('f7oz', period)
-        f7pz = simulation.calculate('f7pz', period)
-        f7qz = simulation.calculate('f7qz', period)
-        f7rz = simulation.calculate('f7rz', period)
-        f7sz = simulation.calculate('f7sz', period)
-        f7qe = simulation.calculate('f7qe', period)
-        f7qf = simulation.calculate('f7qf', period)
-        f7qg = simulation.calculate('f7qg', period)
-        f7qh = simulation.calculate('f7qh', period)
-        f7qi = simulation.calculate('f7qi', period)
-        f7qj = simulation.calculate('f7qj', period)
+        f7oz = calculate_sparse(simulation, 'f7oz', period)
+        f7pz = calculate_sparse(simulation, 'f7pz', period)
+        f7qz = calculate_sparse(simulation, 'f7qz', period)
+        f7rz = calculate_sparse(simulation, 'f7rz', period)
+        f7sz = calculate_sparse(simulation, 'f7sz', period)
+        f7qe = calculate_sparse(simulation, 'f7qe', period)
+        f7qf = calculate_sparse(simulation, 'f7qf', period)
+        f7qg = calculate_sparse(simulation, 'f7qg', period)
+        f7qh = calculate_sparse(simulation, 'f7qh', period)
+        f7qi = calculate_sparse(simulation, 'f7qi', period)
+        f7qj = calculate_sparse(simulation, 'f7qj', period)
 
-        return period,  f7oz + f7pz + f7qz + f7rz + f7sz + f7qe + f7qf + f7qg + f7qh + f7qi + f7qj
+        return period, (f7oz + f7pz + f7qz + f7rz + f7sz + f7qe + f7qf + f7qg + f7qh + f7qi + f7qj).toarray()
 
     @dated_function(start = date(2010, 1, 1), stop = date(2010, 12, 31))
     def function_20100101_20101231(self, simulation, period):
@@ -1051,29 +1053,29 @@ class doment(DatedFormulaColumn):
         Investissements dans les DOM-TOM dans le cadre d'une entrepise.
         '''
         period = period.start.offset('first-of', 'month').period('year')
-        f7oz = simulation.calculate('f7oz', period)
-        f7pz = simulation.calculate('f7pz', period)
-        f7qz = simulation.calculate('f7qz', period)
-        f7rz = simulation.calculate('f7rz', period)
-        f7qe = simulation.calculate('f7qe', period)
-        f7qf = simulation.calculate('f7qf', period)
-        f7qg = simulation.calculate('f7qg', period)
-        f7qh = simulation.calculate('f7qh', period)
-        f7qi = simulation.calculate('f7qi', period)
-        f7qj = simulation.calculate('f7qj', period)
-        f7qo = simulation.calculate('f7qo', period)
-        f7qp = simulation.calculate('f7qp', period)
-        f7qq = simulation.calculate('f7qq', period)
-        f7qr = simulation.calculate('f7qr', period)
-        f7qs = simulation.calculate('f7qs', period)
-        f7mm = simulation.calculate('f7mm', period)
-        f7ma = simulation.calculate('f7ma', period)
-        f7lg = simulation.calculate('f7lg', period)
-        f7ks = simulation.calculate('f7ks', period)
-        f7ls = simulation.calculate('f7ls', period)
+        f7oz = calculate_sparse(simulation, 'f7oz', period)
+        f7pz = calculate_sparse(simulation, 'f7pz', period)
+        f7qz = calculate_sparse(simulation, 'f7qz', period)
+        f7rz = calculate_sparse(simulation, 'f7rz', period)
+        f7qe = calculate_sparse(simulation, 'f7qe', period)
+        f7qf = calculate_sparse(simulation, 'f7qf', period)
+        f7qg = calculate_sparse(simulation, 'f7qg', period)
+        f7qh = calculate_sparse(simulation, 'f7qh', period)
+        f7qi = calculate_sparse(simulation, 'f7qi', period)
+        f7qj = calculate_sparse(simulation, 'f7qj', period)
+        f7qo = calculate_sparse(simulation, 'f7qo', period)
+        f7qp = calculate_sparse(simulation, 'f7qp', period)
+        f7qq = calculate_sparse(simulation, 'f7qq', period)
+        f7qr = calculate_sparse(simulation, 'f7qr', period)
+        f7qs = calculate_sparse(simulation, 'f7qs', period)
+        f7mm = calculate_sparse(simulation, 'f7mm', period)
+        f7ma = calculate_sparse(simulation, 'f7ma', period)
+        f7lg = calculate_sparse(simulation, 'f7lg', period)
+        f7ks = calculate_sparse(simulation, 'f7ks', period)
+        f7ls = calculate_sparse(simulation, 'f7ls', period)
 
         return period, (f7oz + f7pz + f7qz + f7rz + f7qe + f7qf + f7qg + f7qh + f7qi + f7qj + f7qo + f7qp + f7qq + f7qr + f7qs +
-                    f7mm + f7ma + f7lg + f7ks + f7ls)
+                    f7mm + f7ma + f7lg + f7ks + f7ls).toarray()
 
     @dated_function(start = date(2011, 1, 1), stop = date(2011, 12, 31))
     def function_20110101_20111231(self, simulation, period):
@@ -1081,43 +1083,43 @@ class doment(DatedFormulaColumn):
         Investissements dans les DOM-TOM dans le cadre d'une entrepise.
         '''
         period = period.start.offset('first-of', 'month').period('year')
-        f7ks = simulation.calculate('f7ks', period)
-        f7kt = simulation.calculate('f7kt', period)
-        f7ku = simulation.calculate('f7ku', period)
-        f7lg = simulation.calculate('f7lg', period)
-        f7lh = simulation.calculate('f7lh', period)
-        f7li = simulation.calculate('f7li', period)
-        f7mm = simulation.calculate('f7mm', period)
-        f7ma = simulation.calculate('f7ma', period)
-        f7mb = simulation.calculate('f7mb', period)
-        f7mc = simulation.calculate('f7mc', period)
-        f7mn = simulation.calculate('f7mn', period)
-        f7oz = simulation.calculate('f7oz', period)
-        f7pa = simulation.calculate('f7pa', period)
-        f7pb = simulation.calculate('f7pb', period)
-        f7pd = simulation.calculate('f7pd', period)
-        f7pe = simulation.calculate('f7pe', period)
-        f7pf = simulation.calculate('f7pf', period)
-        f7ph = simulation.calculate('f7ph', period)
-        f7pi = simulation.calculate('f7pi', period)
-        f7pj = simulation.calculate('f7pj', period)
-        f7pl = simulation.calculate('f7pl', period)
-        f7pz = simulation.calculate('f7pz', period)
-        f7qz = simulation.calculate('f7qz', period)
-        f7qe = simulation.calculate('f7qe', period)
-        f7qf = simulation.calculate('f7qf', period)
-        f7qg = simulation.calculate('f7qg', period)
-        f7qh = simulation.calculate('f7qh', period)
-        f7qi = simulation.calculate('f7qi', period)
-        f7qo = simulation.calculate('f7qo', period)
-        f7qp = simulation.calculate('f7qp', period)
-        f7qq = simulation.calculate('f7qq', period)
-        f7qr = simulation.calculate('f7qr', period)
-        f7qv = simulation.calculate('f7qv', period)
+        f7ks = calculate_sparse(simulation, 'f7ks', period)
+        f7kt = calculate_sparse(simulation, 'f7kt', period)
+        f7ku = calculate_sparse(simulation, 'f7ku', period)
+        f7lg = calculate_sparse(simulation, 'f7lg', period)
+        f7lh = calculate_sparse(simulation, 'f7lh', period)
+        f7li = calculate_sparse(simulation, 'f7li', period)
+        f7mm = calculate_sparse(simulation, 'f7mm', period)
+        f7ma = calculate_sparse(simulation, 'f7ma', period)
+        f7mb = calculate_sparse(simulation, 'f7mb', period)
+        f7mc = calculate_sparse(simulation, 'f7mc', period)
+        f7mn = calculate_sparse(simulation, 'f7mn', period)
+        f7oz = calculate_sparse(simulation, 'f7oz', period)
+        f7pa = calculate_sparse(simulation, 'f7pa', period)
+        f7pb = calculate_sparse(simulation, 'f7pb', period)
+        f7pd = calculate_sparse(simulation, 'f7pd', period)
+        f7pe = calculate_sparse(simulation, 'f7pe', period)
+        f7pf = calculate_sparse(simulation, 'f7pf', period)
+        f7ph = calculate_sparse(simulation, 'f7ph', period)
+        f7pi = calculate_sparse(simulation, 'f7pi', period)
+        f7pj = calculate_sparse(simulation, 'f7pj', period)
+        f7pl = calculate_sparse(simulation, 'f7pl', period)
+        f7pz = calculate_sparse(simulation, 'f7pz', period)
+        f7qz = calculate_sparse(simulation, 'f7qz', period)
+        f7qe = calculate_sparse(simulation, 'f7qe', period)
+        f7qf = calculate_sparse(simulation, 'f7qf', period)
+        f7qg = calculate_sparse(simulation, 'f7qg', period)
+        f7qh = calculate_sparse(simulation, 'f7qh', period)
+        f7qi = calculate_sparse(simulation, 'f7qi', period)
+        f7qo = calculate_sparse(simulation, 'f7qo', period)
+        f7qp = calculate_sparse(simulation, 'f7qp', period)
+        f7qq = calculate_sparse(simulation, 'f7qq', period)
+        f7qr = calculate_sparse(simulation, 'f7qr', period)
+        f7qv = calculate_sparse(simulation, 'f7qv', period)
 
         return period, (f7ks + f7kt + f7ku + f7lg + f7lh + f7li + f7mb + f7mn + f7mc + f7mm + f7ma +  f7oz + f7pa + f7pb + f7pd +
                     f7pe + f7pf + f7ph + f7pi + f7pj + f7pl + f7pz + f7qz + f7qf + f7qg + f7qh + f7qi + f7qo +
-                    f7qp + f7qq + f7qr + f7qe + f7qv)
+                    f7qp + f7qq + f7qr + f7qe + f7qv).toarray()
 
     @dated_function(start = date(2012, 1, 1), stop = date(2012, 12, 31))
     def function_20120101_20121231(self, simulation, period):
@@ -1125,72 +1127,73 @@ class doment(DatedFormulaColumn):
         Investissements dans les DOM-TOM dans le cadre d'une entrepise.
         '''
         period = period.start.offset('first-of', 'month').period('year')
-        f7ks = simulation.calculate('f7ks', period)
-        f7kt = simulation.calculate('f7kt', period)
-        f7ku = simulation.calculate('f7ku', period)
-        f7lg = simulation.calculate('f7lg', period)
-        f7lh = simulation.calculate('f7lh', period)
-        f7li = simulation.calculate('f7li', period)
-        f7ma = simulation.calculate('f7ma', period)
-        f7mb = simulation.calculate('f7mb', period)
-        f7mc = simulation.calculate('f7mc', period)
-        f7mm = simulation.calculate('f7mm', period)
-        f7mn = simulation.calculate('f7mn', period)
-        f7nu = simulation.calculate('f7nu', period)
-        f7nv = simulation.calculate('f7nv', period)
-        f7nw = simulation.calculate('f7nw', period)
-        f7ny = simulation.calculate('f7ny', period)
-        f7pa = simulation.calculate('f7pa', period)
-        f7pb = simulation.calculate('f7pb', period)
-        f7pd = simulation.calculate('f7pd', period)
-        f7pe = simulation.calculate('f7pe', period)
-        f7pf = simulation.calculate('f7pf', period)
-        f7ph = simulation.calculate('f7ph', period)
-        f7pi = simulation.calculate('f7pi', period)
-        f7pj = simulation.calculate('f7pj', period)
-        f7pl = simulation.calculate('f7pl', period)
-        f7pm = simulation.calculate('f7pm', period)
-        f7pn = simulation.calculate('f7pn', period)
-        f7po = simulation.calculate('f7po', period)
-        f7pp = simulation.calculate('f7pp', period)
-        f7pr = simulation.calculate('f7pr', period)
-        f7ps = simulation.calculate('f7ps', period)
-        f7pt = simulation.calculate('f7pt', period)
-        f7pu = simulation.calculate('f7pu', period)
-        f7pw = simulation.calculate('f7pw', period)
-        f7px = simulation.calculate('f7px', period)
-        f7py = simulation.calculate('f7py', period)
-        f7pz = simulation.calculate('f7pz', period)
-        f7qe = simulation.calculate('f7qe', period)
-        f7qf = simulation.calculate('f7qf', period)
-        f7qg = simulation.calculate('f7qg', period)
-        f7qi = simulation.calculate('f7qi', period)
-        f7qo = simulation.calculate('f7qo', period)
-        f7qp = simulation.calculate('f7qp', period)
-        f7qr = simulation.calculate('f7qr', period)
-        f7qv = simulation.calculate('f7qv', period)
-        f7qz = simulation.calculate('f7qz', period)
-        f7rg = simulation.calculate('f7rg', period)
-        f7ri = simulation.calculate('f7ri', period)
-        f7rj = simulation.calculate('f7rj', period)
-        f7rk = simulation.calculate('f7rk', period)
-        f7rl = simulation.calculate('f7rl', period)
-        f7rm = simulation.calculate('f7rm', period)
-        f7ro = simulation.calculate('f7ro', period)
-        f7rp = simulation.calculate('f7rp', period)
-        f7rq = simulation.calculate('f7rq', period)
-        f7rr = simulation.calculate('f7rr', period)
-        f7rt = simulation.calculate('f7rt', period)
-        f7ru = simulation.calculate('f7ru', period)
-        f7rv = simulation.calculate('f7rv', period)
-        f7rw = simulation.calculate('f7rw', period)
-        f7rx = simulation.calculate('f7rx', period)
-        f7ry = simulation.calculate('f7ry', period)
+        f7ks = calculate_sparse(simulation, 'f7ks', period)
+        f7kt = calculate_sparse(simulation, 'f7kt', period)
+        f7ku = calculate_sparse(simulation, 'f7ku', period)
+        f7lg = calculate_sparse(simulation, 'f7lg', period)
+        f7lh = calculate_sparse(simulation, 'f7lh', period)
+        f7li = calculate_sparse(simulation, 'f7li', period)
+        f7ma = calculate_sparse(simulation, 'f7ma', period)
+        f7mb = calculate_sparse(simulation, 'f7mb', period)
+        f7mc = calculate_sparse(simulation, 'f7mc', period)
+        f7mm = calculate_sparse(simulation, 'f7mm', period)
+        f7mn = calculate_sparse(simulation, 'f7mn', period)
+        f7nu = calculate_sparse(simulation, 'f7nu', period)
+        f7nv = calculate_sparse(simulation, 'f7nv', period)
+        f7nw = calculate_sparse(simulation, 'f7nw', period)
+        f7ny = calculate_sparse(simulation, 'f7ny', period)
+        f7pa = calculate_sparse(simulation, 'f7pa', period)
+        f7pb = calculate_sparse(simulation, 'f7pb', period)
+        f7pd = calculate_sparse(simulation, 'f7pd', period)
+        f7pe = calculate_sparse(simulation, 'f7pe', period)
+        f7pf = calculate_sparse(simulation, 'f7pf', period)
+        f7ph = calculate_sparse(simulation, 'f7ph', period)
+        f7pi = calculate_sparse(simulation, 'f7pi', period)
+        f7pj = calculate_sparse(simulation, 'f7pj', period)
+        f7pl = calculate_sparse(simulation, 'f7pl', period)
+        f7pm = calculate_sparse(simulation, 'f7pm', period)
+        f7pn = calculate_sparse(simulation, 'f7pn', period)
+        f7po = calculate_sparse(simulation, 'f7po', period)
+        f7pp = calculate_sparse(simulation, 'f7pp', period)
+        f7pr = calculate_sparse(simulation, 'f7pr', period)
+        f7ps = calculate_sparse(simulation, 'f7ps', period)
+        f7pt = calculate_sparse(simulation, 'f7pt', period)
+        f7pu = calculate_sparse(simulation, 'f7pu', period)
+        f7pw = calculate_sparse(simulation, 'f7pw', period)
+        f7px = calculate_sparse(simulation, 'f7px', period)
+        f7py = calculate_sparse(simulation, 'f7py', period)
+        f7pz = calculate_sparse(simulation, 'f7pz', period)
+        f7qe = calculate_sparse(simulation, 'f7qe', period)
+        f7qf = calculate_sparse(simulation, 'f7qf', period)
+        f7qg = calculate_sparse(simulation, 'f7qg', period)
+        f7qi = calculate_sparse(simulation, 'f7qi', period)
+        f7qo = calculate_sparse(simulation, 'f7qo', period)
+        f7qp = calculate_sparse(simulation, 'f7qp', period)
+        f7qr = calculate_sparse(simulation, 'f7qr', period)
+        f7qv = calculate_sparse(simulation, 'f7qv', period)
+        f7qz = calculate_sparse(simulation, 'f7qz', period)
+        f7rg = calculate_sparse(simulation, 'f7rg', period)
+        f7ri = calculate_sparse(simulation, 'f7ri', period)
+        f7rj = calculate_sparse(simulation, 'f7rj', period)
+        f7rk = calculate_sparse(simulation, 'f7rk', period)
+        f7rl = calculate_sparse(simulation, 'f7rl', period)
+        f7rm = calculate_sparse(simulation, 'f7rm', period)
+        f7ro = calculate_sparse(simulation, 'f7ro', period)
+        f7rp = calculate_sparse(simulation, 'f7rp', period)
+        f7rq = calculate_sparse(simulation, 'f7rq', period)
+        f7rr = calculate_sparse(simulation, 'f7rr', period)
+        f7rt = calculate_sparse(simulation, 'f7rt', period)
+        f7ru = calculate_sparse(simulation, 'f7ru', period)
+        f7rv = calculate_sparse(simulation, 'f7rv', period)
+        f7rw = calculate_sparse(simulation, 'f7rw', period)
+        f7rx = calculate_sparse(simulation, 'f7rx', period)
+        f7ry = calculate_sparse(simulation, 'f7ry', period)
 
         return period, (f7ks + f7kt + f7ku + f7lg + f7lh + f7li + f7ma + f7mb + f7mc + f7mm + f7mn +  f7pz + f7nu + f7nv + f7nw +
                     f7ny + f7pa + f7pb + f7pd + f7pe + f7pf + f7ph + f7pi + f7pj + f7pl + f7pm + f7pn + f7po + f7pp + f7pr +
                     f7ps + f7pt + f7pu + f7pw + f7px + f7py + f7qe + f7qf + f7qg + f7qi + f7qo + f7qp + f7qr + f7qv + f7qz +
-                    f7rg + f7ri + f7rj + f7rk + f7rl + f7rm + f7ro + f7rp + f7rq + f7rr + f7rt + f7ru + f7rv + f7rw)
+                    f7rg + f7ri + f7rj + f7rk + f7rl + f7rm + f7ro + f7rp + f7rq + f7rr + f7rt + f7ru + f7rv +
+                    f7rw).toarray()
 
     @dated_function(start = date(2013, 1, 1), stop = date(2013, 12, 31))
     def function_20130101_20131231(self, simulation, period):
@@ -1198,95 +1201,95 @@ class doment(DatedFormulaColumn):
         Investissements dans les DOM-TOM dans le cadre d'une entrepise.
         '''
         period = period.start.offset('first-of', 'month').period('year')
-        fhsa = simulation.calculate('fhsa', period)
-        fhsb = simulation.calculate('fhsb', period)
-        fhsf = simulation.calculate('fhsf', period)
-        fhsg = simulation.calculate('fhsg', period)
-        fhsc = simulation.calculate('fhsc', period)
-        fhsh = simulation.calculate('fhsh', period)
-        fhse = simulation.calculate('fhse', period)
-        fhsj = simulation.calculate('fhsj', period)
-        fhsk = simulation.calculate('fhsk', period)
-        fhsl = simulation.calculate('fhsl', period)
-        fhsp = simulation.calculate('fhsp', period)
-        fhsq = simulation.calculate('fhsq', period)
-        fhsm = simulation.calculate('fhsm', period)
-        fhsr = simulation.calculate('fhsr', period)
-        fhso = simulation.calculate('fhso', period)
-        fhst = simulation.calculate('fhst', period)
-        fhsu = simulation.calculate('fhsu', period)
-        fhsv = simulation.calculate('fhsv', period)
-        fhsw = simulation.calculate('fhsw', period)
-        fhsz = simulation.calculate('fhsz', period)
-        fhta = simulation.calculate('fhta', period)
-        fhtb = simulation.calculate('fhtb', period)
-        fhtd = simulation.calculate('fhtd', period)
-        f7ks = simulation.calculate('f7ks', period)
-        f7kt = simulation.calculate('f7kt', period)
-        f7ku = simulation.calculate('f7ku', period)
-        f7lg = simulation.calculate('f7lg', period)
-        f7lh = simulation.calculate('f7lh', period)
-        f7li = simulation.calculate('f7li', period)
-        f7ma = simulation.calculate('f7ma', period)
-        f7mb = simulation.calculate('f7mb', period)
-        f7mc = simulation.calculate('f7mc', period)
-        f7mm = simulation.calculate('f7mm', period)
-        f7mn = simulation.calculate('f7mn', period)
-        f7nu = simulation.calculate('f7nu', period)
-        f7nv = simulation.calculate('f7nv', period)
-        f7nw = simulation.calculate('f7nw', period)
-        f7ny = simulation.calculate('f7ny', period)
-        f7pa = simulation.calculate('f7pa', period)
-        f7pb = simulation.calculate('f7pb', period)
-        f7pd = simulation.calculate('f7pd', period)
-        f7pe = simulation.calculate('f7pe', period)
-        f7pf = simulation.calculate('f7pf', period)
-        f7ph = simulation.calculate('f7ph', period)
-        f7pi = simulation.calculate('f7pi', period)
-        f7pj = simulation.calculate('f7pj', period)
-        f7pl = simulation.calculate('f7pl', period)
-        f7pm = simulation.calculate('f7pm', period)
-        f7pn = simulation.calculate('f7pn', period)
-        f7po = simulation.calculate('f7po', period)
-        f7pp = simulation.calculate('f7pp', period)
-        f7pr = simulation.calculate('f7pr', period)
-        f7ps = simulation.calculate('f7ps', period)
-        f7pt = simulation.calculate('f7pt', period)
-        f7pu = simulation.calculate('f7pu', period)
-        f7pw = simulation.calculate('f7pw', period)
-        f7px = simulation.calculate('f7px', period)
-        f7py = simulation.calculate('f7py', period)
-        f7qe = simulation.calculate('f7qe', period)
-        f7qf = simulation.calculate('f7qf', period)
-        f7qg = simulation.calculate('f7qg', period)
-        f7qi = simulation.calculate('f7qi', period)
-        f7qo = simulation.calculate('f7qo', period)
-        f7qp = simulation.calculate('f7qp', period)
-        f7qr = simulation.calculate('f7qr', period)
-        f7qv = simulation.calculate('f7qv', period)
-        f7qz = simulation.calculate('f7qz', period)
-        f7rg = simulation.calculate('f7rg', period)
-        f7ri = simulation.calculate('f7ri', period)
-        f7rj = simulation.calculate('f7rj', period)
-        f7rk = simulation.calculate('f7rk', period)
-        f7rl = simulation.calculate('f7rl', period)
-        f7rm = simulation.calculate('f7rm', period)
-        f7ro = simulation.calculate('f7ro', period)
-        f7rp = simulation.calculate('f7rp', period)
-        f7rq = simulation.calculate('f7rq', period)
-        f7rr = simulation.calculate('f7rr', period)
-        f7rt = simulation.calculate('f7rt', period)
-        f7ru = simulation.calculate('f7ru', period)
-        f7rv = simulation.calculate('f7rv', period)
-        f7rw = simulation.calculate('f7rw', period)
-        f7ry = simulation.calculate('f7ry', period)
+        fhsa = calculate_sparse(simulation, 'fhsa', period)
+        fhsb = calculate_sparse(simulation, 'fhsb', period)
+        fhsf = calculate_sparse(simulation, 'fhsf', period)
+        fhsg = calculate_sparse(simulation, 'fhsg', period)
+        fhsc = calculate_sparse(simulation, 'fhsc', period)
+        fhsh = calculate_sparse(simulation, 'fhsh', period)
+        fhse = calculate_sparse(simulation, 'fhse', period)
+        fhsj = calculate_sparse(simulation, 'fhsj', period)
+        fhsk = calculate_sparse(simulation, 'fhsk', period)
+        fhsl = calculate_sparse(simulation, 'fhsl', period)
+        fhsp = calculate_sparse(simulation, 'fhsp', period)
+        fhsq = calculate_sparse(simulation, 'fhsq', period)
+        fhsm = calculate_sparse(simulation, 'fhsm', period)
+        fhsr = calculate_sparse(simulation, 'fhsr', period)
+        fhso = calculate_sparse(simulation, 'fhso', period)
+        fhst = calculate_sparse(simulation, 'fhst', period)
+        fhsu = calculate_sparse(simulation, 'fhsu', period)
+        fhsv = calculate_sparse(simulation, 'fhsv', period)
+        fhsw = calculate_sparse(simulation, 'fhsw', period)
+        fhsz = calculate_sparse(simulation, 'fhsz', period)
+        fhta = calculate_sparse(simulation, 'fhta', period)
+        fhtb = calculate_sparse(simulation, 'fhtb', period)
+        fhtd = calculate_sparse(simulation, 'fhtd', period)
+        f7ks = calculate_sparse(simulation, 'f7ks', period)
+        f7kt = calculate_sparse(simulation, 'f7kt', period)
+        f7ku = calculate_sparse(simulation, 'f7ku', period)
+        f7lg = calculate_sparse(simulation, 'f7lg', period)
+        f7lh = calculate_sparse(simulation, 'f7lh', period)
+        f7li = calculate_sparse(simulation, 'f7li', period)
+        f7ma = calculate_sparse(simulation, 'f7ma', period)
+        f7mb = calculate_sparse(simulation, 'f7mb', period)
+        f7mc = calculate_sparse(simulation, 'f7mc', period)
+        f7mm = calculate_sparse(simulation, 'f7mm', period)
+        f7mn = calculate_sparse(simulation, 'f7mn', period)
+        f7nu = calculate_sparse(simulation, 'f7nu', period)
+        f7nv = calculate_sparse(simulation, 'f7nv', period)
+        f7nw = calculate_sparse(simulation, 'f7nw', period)
+        f7ny = calculate_sparse(simulation, 'f7ny', period)
+        f7pa = calculate_sparse(simulation, 'f7pa', period)
+        f7pb = calculate_sparse(simulation, 'f7pb', period)
+        f7pd = calculate_sparse(simulation, 'f7pd', period)
+        f7pe = calculate_sparse(simulation, 'f7pe', period)
+        f7pf = calculate_sparse(simulation, 'f7pf', period)
+        f7ph = calculate_sparse(simulation, 'f7ph', period)
+        f7pi = calculate_sparse(simulation, 'f7pi', period)
+        f7pj = calculate_sparse(simulation, 'f7pj', period)
+        f7pl = calculate_sparse(simulation, 'f7pl', period)
+        f7pm = calculate_sparse(simulation, 'f7pm', period)
+        f7pn = calculate_sparse(simulation, 'f7pn', period)
+        f7po = calculate_sparse(simulation, 'f7po', period)
+        f7pp = calculate_sparse(simulation, 'f7pp', period)
+        f7pr = calculate_sparse(simulation, 'f7pr', period)
+        f7ps = calculate_sparse(simulation, 'f7ps', period)
+        f7pt = calculate_sparse(simulation, 'f7pt', period)
+        f7pu = calculate_sparse(simulation, 'f7pu', period)
+        f7pw = calculate_sparse(simulation, 'f7pw', period)
+        f7px = calculate_sparse(simulation, 'f7px', period)
+        f7py = calculate_sparse(simulation, 'f7py', period)
+        f7qe = calculate_sparse(simulation, 'f7qe', period)
+        f7qf = calculate_sparse(simulation, 'f7qf', period)
+        f7qg = calculate_sparse(simulation, 'f7qg', period)
+        f7qi = calculate_sparse(simulation, 'f7qi', period)
+        f7qo = calculate_sparse(simulation, 'f7qo', period)
+        f7qp = calculate_sparse(simulation, 'f7qp', period)
+        f7qr = calculate_sparse(simulation, 'f7qr', period)
+        f7qv = calculate_sparse(simulation, 'f7qv', period)
+        f7qz = calculate_sparse(simulation, 'f7qz', period)
+        f7rg = calculate_sparse(simulation, 'f7rg', period)
+        f7ri = calculate_sparse(simulation, 'f7ri', period)
+        f7rj = calculate_sparse(simulation, 'f7rj', period)
+        f7rk = calculate_sparse(simulation, 'f7rk', period)
+        f7rl = calculate_sparse(simulation, 'f7rl', period)
+        f7rm = calculate_sparse(simulation, 'f7rm', period)
+        f7ro = calculate_sparse(simulation, 'f7ro', period)
+        f7rp = calculate_sparse(simulation, 'f7rp', period)
+        f7rq = calculate_sparse(simulation, 'f7rq', period)
+        f7rr = calculate_sparse(simulation, 'f7rr', period)
+        f7rt = calculate_sparse(simulation, 'f7rt', period)
+        f7ru = calculate_sparse(simulation, 'f7ru', period)
+        f7rv = calculate_sparse(simulation, 'f7rv', period)
+        f7rw = calculate_sparse(simulation, 'f7rw', period)
+        f7ry = calculate_sparse(simulation, 'f7ry', period)
 
         return period, (fhsa + fhsb + fhsf + fhsg + fhsc + fhsh + fhse + fhsj + fhsk + fhsl + fhsp + fhsq + fhsm + fhsr + fhso +
                     fhst + fhsu + fhsv + fhsw + fhsz + fhta + fhtb + fhtd + f7ks + f7kt + f7ku + f7lg + f7lh + f7li + f7ma +
                     f7mb + f7mc + f7mm + f7mn + f7nu + f7nv + f7nw + f7ny + f7pa + f7pb + f7pd + f7pe + f7pf + f7ph + f7pi +
                     f7pj + f7pl + f7pm + f7pn + f7po + f7pp + f7pr + f7ps + f7pt + f7pu + f7pw + f7px + f7py + f7qe + f7qf +
                     f7qg + f7qi + f7qo + f7qp + f7qr + f7qv + f7qz + f7rg + f7ri + f7rj + f7rk + f7rl + f7rm + f7ro + f7rp +
-                    f7rq + f7rr + f7rt + f7ru + f7rv + f7rw)
+                    f7rq + f7rr + f7rt + f7ru + f7rv + f7rw).toarray()
 
 
 #TODO: vérifier pour 2002
@@ -1386,14 +1389,14 @@ class domlog(DatedFormulaColumn):
         TODO: Plafonnement sur la notice
         '''
         period = period.start.offset('first-of', 'month').period('year')
-        f7qb = simulation.calculate('f7qb', period)
-        f7qc = simulation.calculate('f7qc', period)
-        f7qd = simulation.calculate('f7qd', period)
-        f7ql = simulation.calculate('f7ql', period)
-        f7qt = simulation.calculate('f7qt', period)
-        f7qm = simulation.calculate('f7qm', period)
+        f7qb = calculate_sparse(simulation, 'f7qb', period)
+        f7qc = calculate_sparse(simulation, 'f7qc', period)
+        f7qd = calculate_sparse(simulation, 'f7qd', period)
+        f7ql = calculate_sparse(simulation, 'f7ql', period)
+        f7qt = calculate_sparse(simulation, 'f7qt', period)
+        f7qm = calculate_sparse(simulation, 'f7qm', period)
 
-        return period, f7qb + f7qc + f7qd + f7ql + f7qt + f7qm
+        return period, (f7qb + f7qc + f7qd + f7ql + f7qt + f7qm).toarray()
 
     @dated_function(start = date(2011, 1, 1), stop = date(2011, 12, 31))
     def function_20110101_20111231(self, simulation, period):
@@ -1403,21 +1406,22 @@ class domlog(DatedFormulaColumn):
         TODO: Plafonnement sur la notice
         '''
         period = period.start.offset('first-of', 'month').period('year')
-        f7qb = simulation.calculate('f7qb', period)
-        f7qc = simulation.calculate('f7qc', period)
-        f7qd = simulation.calculate('f7qd', period)
-        f7ql = simulation.calculate('f7ql', period)
-        f7qm = simulation.calculate('f7qm', period)
-        f7qt = simulation.calculate('f7qt', period)
-        f7oa = simulation.calculate('f7oa', period)
-        f7ob = simulation.calculate('f7ob', period)
-        f7oc = simulation.calculate('f7oc', period)
-        f7oh = simulation.calculate('f7oh', period)
-        f7oi = simulation.calculate('f7oi', period)
-        f7oj = simulation.calculate('f7oj', period)
-        f7ok = simulation.calculate('f7ok', period)
-
-        return period, f7qb + f7qc + f7qd + f7ql + f7qm + f7qt + f7oa + f7ob + f7oc + f7oh + f7oi + f7oj + f7ok
+        f7qb = calculate_sparse(simulation, 'f7qb', period)
+        f7qc = calculate_sparse(simulation, 'f7qc', period)
+        f7qd = calculate_sparse(simulation, 'f7qd', period)
+        f7ql = calculate_sparse(simulation, 'f7ql', period)
+        f7qm = calculate_sparse(simulation, 'f7qm', period)
+        f7qt = calculate_sparse(simulation, 'f7qt', period)
+        f7oa = calculate_sparse(simulation, 'f7oa', period)
+        f7ob = calculate_sparse(simulation, 'f7ob', period)
+        f7oc = calculate_sparse(simulation, 'f7oc', period)
+        f7oh = calculate_sparse(simulation, 'f7oh', period)
+        f7oi = calculate_sparse(simulation, 'f7oi', period)
+        f7oj = calculate_sparse(simulation, 'f7oj', period)
+        f7ok = calculate_sparse(simulation, 'f7ok', period)
+
+        return period, (f7qb + f7qc + f7qd + f7ql + f7qm + f7qt + f7oa + f7ob + f7oc + f7oh + f7oi + f7oj +
+                    f7ok).toarray()
 
     @dated_function(start = date(2012, 1, 1), stop = date(2012, 12, 31))
     def function_20120101_20121231(self, simulation, period):
@@ -1427,34 +1431,34 @@ class domlog(DatedFormulaColumn):
         TODO: Plafonnement sur la notice
         '''
         period = period.start.offset('first-of', 'month').period('year')
-        f7qb = simulation.calculate('f7qb', period)
-        f7qc = simulation.calculate('f7qc', period)
-        f7qd = simulation.calculate('f7qd', period)
-        f7ql = simulation.calculate('f7ql', period)
-        f7qm = simulation.calculate('f7qm', period)
-        f7qt = simulation.calculate('f7qt', period)
-        f7oa = simulation.calculate('f7oa', period)
-        f7ob = simulation.calculate('f7ob', period)
-        f7oc = simulation.calculate('f7oc', period)
-        f7oh = simulation.calculate('f7oh', period)
-        f7oi = simulation.calculate('f7oi', period)
-        f7oj = simulation.calculate('f7oj', period)
-        f7ok = simulation.calculate('f7ok', period)
-        f7ol = simulation.calculate('f7ol', period)
-        f7om = simulation.calculate('f7om', period)
-        f7on = simulation.calculate('f7on', period)
-        f7oo = simulation.calculate('f7oo', period)
-        f7op = simulation.calculate('f7op', period)
-        f7oq = simulation.calculate('f7oq', period)
-        f7or = simulation.calculate('f7or', period)
-        f7os = simulation.calculate('f7os', period)
-        f7ot = simulation.calculate('f7ot', period)
-        f7ou = simulation.calculate('f7ou', period)
-        f7ov = simulation.calculate('f7ov', period)
-        f7ow = simulation.calculate('f7ow', period)
+        f7qb = calculate_sparse(simulation, 'f7qb', period)
+        f7qc = calculate_sparse(simulation, 'f7qc', period)
+        f7qd = calculate_sparse(simulation, 'f7qd', period)
+        f7ql = calculate_sparse(simulation, 'f7ql', period)
+        f7qm = calculate_sparse(simulation, 'f7qm', period)
+        f7qt = calculate_sparse(simulation, 'f7qt', period)
+        f7oa = calculate_sparse(simulation, 'f7oa', period)
+        f7ob = calculate_sparse(simulation, 'f7ob', period)
+        f7oc = calculate_sparse(simulation, 'f7oc', period)
+        f7oh = calculate_sparse(simulation, 'f7oh', period)
+        f7oi = calculate_sparse(simulation, 'f7oi', period)
+        f7oj = calculate_sparse(simulation, 'f7oj', period)
+        f7ok = calculate_sparse(simulation, 'f7ok', period)
+        f7ol = calculate_sparse(simulation, 'f7ol', period)
+        f7om = calculate_sparse(simulation, 'f7om', period)
+        f7on = calculate_sparse(simulation, 'f7on', period)
+        f7oo = calculate_sparse(simulation, 'f7oo', period)
+        f7op = calculate_sparse(simulation, 'f7op', period)
+        f7oq = calculate_sparse(simulation, 'f7oq', period)
+        f7or = calculate_sparse(simulation, 'f7or', period)
+        f7os = calculate_sparse(simulation, 'f7os', period)
+        f7ot = calculate_sparse(simulation, 'f7ot', period)
+        f7ou = calculate_sparse(simulation, 'f7ou', period)
+        f7ov = calculate_sparse(simulation, 'f7ov', period)
+        f7ow = calculate_sparse(simulation, 'f7ow', period)
 
         return period, (f7qb + f7qc + f7qd + f7ql + f7qm + f7qt + f7oa + f7ob + f7oc + f7oh + f7oi + f7oj + f7ok + f7ol + f7om +
-                    f7on + f7oo + f7op + f7oq + f7or + f7os + f7ot + f7ou + f7ov + f7ow)
+                    f7on + f7oo + f7op + f7oq + f7or + f7os + f7ot + f7ou + f7ov + f7ow).toarray()
 
     @dated_function(start = date(2013, 1, 1), stop = date(2013, 12, 31))
     def function_20130101_20131231(self, simulation, period):
@@ -1464,42 +1468,42 @@ class domlog(DatedFormulaColumn):
         TODO: Plafonnement sur la notice
         '''
         period = period.start.offset('first-of', 'month').period('year')
-        fhod = simulation.calculate('fhod', period)
-        fhoe = simulation.calculate('fhoe', period)
-        fhof = simulation.calculate('fhof', period)
-        fhog = simulation.calculate('fhog', period)
-        fhox = simulation.calculate('fhox', period)
-        fhoy = simulation.calculate('fhoy', period)
-        fhoz = simulation.calculate('fhoz', period)
-        f7qb = simulation.calculate('f7qb', period)
-        f7qc = simulation.calculate('f7qc', period)
-        f7qd = simulation.calculate('f7qd', period)
-        f7ql = simulation.calculate('f7ql', period)
-        f7qm = simulation.calculate('f7qm', period)
-        f7qt = simulation.calculate('f7qt', period)
-        f7oa = simulation.calculate('f7oa', period)
-        f7ob = simulation.calculate('f7ob', period)
-        f7oc = simulation.calculate('f7oc', period)
-        f7oh = simulation.calculate('f7oh', period)
-        f7oi = simulation.calculate('f7oi', period)
-        f7oj = simulation.calculate('f7oj', period)
-        f7ok = simulation.calculate('f7ok', period)
-        f7ol = simulation.calculate('f7ol', period)
-        f7om = simulation.calculate('f7om', period)
-        f7on = simulation.calculate('f7on', period)
-        f7oo = simulation.calculate('f7oo', period)
-        f7op = simulation.calculate('f7op', period)
-        f7oq = simulation.calculate('f7oq', period)
-        f7or = simulation.calculate('f7or', period)
-        f7os = simulation.calculate('f7os', period)
-        f7ot = simulation.calculate('f7ot', period)
-        f7ou = simulation.calculate('f7ou', period)
-        f7ov = simulation.calculate('f7ov', period)
-        f7ow = simulation.calculate('f7ow', period)
+        fhod = calculate_sparse(simulation, 'fhod', period)
+        fhoe = calculate_sparse(simulation, 'fhoe', period)
+        fhof = calculate_sparse(simulation, 'fhof', period)
+        fhog = calculate_sparse(simulation, 'fhog', period)
+        fhox = calculate_sparse(simulation, 'fhox', period)
+        fhoy = calculate_sparse(simulation, 'fhoy', period)
+        fhoz = calculate_sparse(simulation, 'fhoz', period)
+        f7qb = calculate_sparse(simulation, 'f7qb', period)
+        f7qc = calculate_sparse(simulation, 'f7qc', period)
+        f7qd = calculate_sparse(simulation, 'f7qd', period)
+        f7ql = calculate_sparse(simulation, 'f7ql', period)
+        f7qm = calculate_sparse(simulation, 'f7qm', period)
+        f7qt = calculate_sparse(simulation, 'f7qt', period)
+        f7oa = calculate_sparse(simulation, 'f7oa', period)
+        f7ob = calculate_sparse(simulation, 'f7ob', period)
+        f7oc = calculate_sparse(simulation, 'f7oc', period)
+        f7oh = calculate_sparse(simulation, 'f7oh', period)
+        f7oi = calculate_sparse(simulation, 'f7oi', period)
+        f7oj = calculate_sparse(simulation, 'f7oj', period)
+        f7ok = calculate_sparse(simulation, 'f7ok', period)
+        f7ol = calculate_sparse(simulation, 'f7ol', period)
+        f7om = calculate_sparse(simulation, 'f7om', period)
+        f7on = calculate_sparse(simulation, 'f7on', period)
+        f7oo = calculate_sparse(simulation, 'f7oo', period)
+        f7op = calculate_sparse(simulation, 'f7op', period)
+        f7oq = calculate_sparse(simulation, 'f7oq', period)
+        f7or = calculate_sparse(simulation, 'f7or', period)
+        f7os = calculate_sparse(simulation, 'f7os', period)
+        f7ot = calculate_sparse(simulation, 'f7ot', period)
+        f7ou = calculate_sparse(simulation, 'f7ou', period)
+        f7ov = calculate_sparse(simulation, 'f7ov', period)
+        f7ow = calculate_sparse(simulation, 'f7ow', period)
 
         return period, (f7qb + f7qc + f7qd + f7ql + f7qm + f7qt + f7oa + f7ob + f7oc + f7oh + f7oi + f7oj + f7ok + f7ol + f7om +
                     f7on + f7oo + f7op + f7oq + f7or + f7os + f7ot + f7ou + f7ov + f7ow + fhod + fhoe +
-                    fhof + fhog + fhox + fhoy + fhoz)
+                    fhof + fhog + fhox + fhoy + fhoz).toarray()
 
 
 #En accord avec la DGFiP mais pas de 7ub et 7uj dans la notice
@@ -1519,18 +1523,18 @@ class domsoc(DatedFormulaColumn):
         TODO plafonnement à 15% f7qa / liens avec autres investissments ?
         '''
         period = period.start.offset('first-of', 'month').period('year')
-        f7qn = simulation.calculate('f7qn', period)
-        f7qk = simulation.calculate('f7qk', period)
-        f7qu = simulation.calculate('f7qu', period)
-        f7kg = simulation.calculate('f7kg', period)
-        f7kh = simulation.calculate('f7kh', period)
-        f7ki = simulation.calculate('f7ki', period)
-        f7qj = simulation.calculate('f7qj', period)
-        f7qs = simulation.calculate('f7qs', period)
-        f7qw = simulation.calculate('f7qw', period)
-        f7qx = simulation.calculate('f7qx', period)
+        f7qn = calculate_sparse(simulation, 'f7qn', period)
+        f7qk = calculate_sparse(simulation, 'f7qk', period)
+        f7qu = calculate_sparse(simulation, 'f7qu', period)
+        f7kg = calculate_sparse(simulation, 'f7kg', period)
+        f7kh = calculate_sparse(simulation, 'f7kh', period)
+        f7ki = calculate_sparse(simulation, 'f7ki', period)
+        f7qj = calculate_sparse(simulation, 'f7qj', period)
+        f7qs = calculate_sparse(simulation, 'f7qs', period)
+        f7qw = calculate_sparse(simulation, 'f7qw', period)
+        f7qx = calculate_sparse(simulation, 'f7qx', period)
 
-        return period,  f7qn + f7qk + f7qu + f7kg + f7kh + f7ki + f7qj + f7qs + f7qw + f7qx
+        return period, (f7qn + f7qk + f7qu + f7kg + f7kh + f7ki + f7qj + f7qs + f7qw + f7qx).toarray()
 
     @dated_function(start = date(2013, 1, 1), stop = date(2013, 12, 31))
     def function_20130101_20131231(self, simulation, period):
@@ -1540,22 +1544,23 @@ class domsoc(DatedFormulaColumn):
         TODO plafonnement à 15% f7qa / liens avec autres investissments ?
         '''
         period = period.start.offset('first-of', 'month').period('year')
-        fhra = simulation.calculate('fhra', period)
-        fhrb = simulation.calculate('fhrb', period)
-        fhrc = simulation.calculate('fhrc', period)
-        fhrd = simulation.calculate('fhrd', period)
-        f7qn = simulation.calculate('f7qn', period)
-        f7qk = simulation.calculate('f7qk', period)
-        f7qu = simulation.calculate('f7qu', period)
-        f7kg = simulation.calculate('f7kg', period)
-        f7kh = simulation.calculate('f7kh', period)
-        f7ki = simulation.calculate('f7ki', period)
-        f7qj = simulation.calculate('f7qj', period)
-        f7qs = simulation.calculate('f7qs', period)
-        f7qw = simulation.calculate('f7qw', period)
-        f7qx = simulation.calculate('f7qx', period)
+        fhra = calculate_sparse(simulation, 'fhra', period)
+        fhrb = calculate_sparse(simulation, 'fhrb', period)
+        fhrc = calculate_sparse(simulation, 'fhrc', period)
+        fhrd = calculate_sparse(simulation, 'fhrd', period)
+        f7qn = calculate_sparse(simulation, 'f7qn', period)
+        f7qk = calculate_sparse(simulation, 'f7qk', period)
+        f7qu = calculate_sparse(simulation, 'f7qu', period)
+        f7kg = calculate_sparse(simulation, 'f7kg', period)
+        f7kh = calculate_sparse(simulation, 'f7kh', period)
+        f7ki = calculate_sparse(simulation, 'f7ki', period)
+        f7qj = calculate_sparse(simulation, 'f7qj', period)
+        f7qs = calculate_sparse(simulation, 'f7qs', period)
+        f7qw = calculate_sparse(simulation, 'f7qw', period)
+        f7qx = calculate_sparse(simulation, 'f7qx', period)
 
-        return period,  fhra + fhrb + fhrc + fhrd + f7qn + f7qk + f7qu + f7kg + f7kh + f7ki + f7qj + f7qs + f7qw + f7qx
+        return period, (fhra + fhrb + fhrc + fhrd + f7qn + f7qk + f7qu + f7kg + f7kh + f7ki + f7qj + f7qs + f7qw +
+                    f7qx).toarray()
 
 
 @reference_formula
@@ -3154,3 +3159,7 @@ def maxi(a, b, *args):
         return max_(a, b)
     else:
         return max_(a, maxi(b, *args))
+
+
+# Most foyers fill none of the boxes read by these formulas.
+use_uniform_short_circuit(__name__)
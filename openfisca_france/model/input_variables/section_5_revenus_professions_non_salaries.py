@@ -24,6 +24,7 @@
 
 
 from ..base import *  # noqa
+from ..sparse_inputs import use_sparse_storage
 
 
 # TODO: 5QL
@@ -977,3 +978,7 @@ build_column('f5mt', IntCol(entity = 'foy',
                 val_type = "monetary",
                 start = date(2007, 1, 1),
                 cerfa_field = u'5MT'))
+
+
+# Cerfa boxes are left at their default value by almost every foyer.
+use_sparse_storage(__name__)
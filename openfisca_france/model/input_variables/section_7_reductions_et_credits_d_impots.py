@@ -24,6 +24,7 @@
 
 
 from ..base import *  # noqa
+from ..sparse_inputs import use_sparse_storage
 
 
 # Dons à des organismes établis en France
@@ -2546,3 +2547,7 @@ build_column('f7gi', IntCol(entity = 'foy',
                 val_type = "monetary",
                 start = date(2013, 1, 1),
                 cerfa_field = u'7GI'))
+
+
+# Cerfa boxes are left at their default value by almost every foyer.
+use_sparse_storage(__name__)
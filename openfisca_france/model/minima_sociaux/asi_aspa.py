@@ -28,6 +28,7 @@ from __future__ import division
 from numpy import (maximum as max_, logical_not as not_, logical_or as or_)
 
 from ..base import *  # noqa
+from .base import calculate_rolling_sum
 
 
 reference_input_variable(
@@ -46,37 +47,41 @@ class br_mv_i(SimpleFormulaColumn):
 
     def function(self, simulation, period):
         period = period.start.offset('first-of', 'month').period('month')
-        three_previous_months = period.start.period('month', 3).offset(-3)
         aspa_elig = simulation.calculate('aspa_elig', period)
-        salnet = simulation.calculate('salnet', three_previous_months)
-        chonet = simulation.calculate('chonet', three_previous_months)
-        rstnet = simulation.calculate('rstnet', three_previous_months)
-        pensions_alimentaires_percues = simulation.calculate('pensions_alimentaires_percues', three_previous_months)
-        rto_declarant1 = simulation.calculate_add_divide('rto_declarant1', three_previous_months)
-        rpns = simulation.calculate_add_divide('rpns', three_previous_months)
-        rev_cap_bar_holder = simulation.compute_add_divide('rev_cap_bar', three_previous_months)
-        rev_cap_lib_holder = simulation.compute_add_divide('rev_cap_lib', three_previous_months)
-        rfon_ms = simulation.calculate_add_divide('rfon_ms', three_previous_months)
-        div_ms = simulation.calculate_add_divide('div_ms', three_previous_months)
-        revenus_stage_formation_pro = simulation.calculate('revenus_stage_formation_pro', three_previous_months)
-        allocation_securisation_professionnelle = simulation.calculate('allocation_securisation_professionnelle', three_previous_months)
-        prime_forfaitaire_mensuelle_reprise_activite = simulation.calculate('prime_forfaitaire_mensuelle_reprise_activite', three_previous_months)
-        dedommagement_victime_amiante = simulation.calculate('dedommagement_victime_amiante', three_previous_months)
-        prestation_compensatoire = simulation.calculate('prestation_compensatoire', three_previous_months)
-        pensions_invalidite = simulation.calculate('pensions_invalidite', three_previous_months)
-        gains_exceptionnels = simulation.calculate('gains_exceptionnels', three_previous_months)
-        indemnites_journalieres_maternite = simulation.calculate('indemnites_journalieres_maternite', three_previous_months)
-        indemnites_journalieres_maladie = simulation.calculate('indemnites_journalieres_maladie', three_previous_months)
-        indemnites_journalieres_maladie_professionnelle = simulation.calculate('indemnites_journalieres_maladie_professionnelle', three_previous_months)
-        indemnites_journalieres_accident_travail = simulation.calculate('indemnites_journalieres_accident_travail', three_previous_months)
-        indemnites_chomage_partiel = simulation.calculate('indemnites_chomage_partiel', three_previous_months)
-        indemnites_volontariat = simulation.calculate('indemnites_volontariat', three_previous_months)
-        tns_total_revenus = simulation.calculate_add('tns_total_revenus', three_previous_months)
-        rsa_base_ressources_patrimoine_i = simulation.calculate_add('rsa_base_ressources_patrimoine_i', three_previous_months)
-        aah = simulation.calculate('aah', three_previous_months)
-
-        rev_cap_bar = self.cast_from_entity_to_role(rev_cap_bar_holder, role = VOUS)
-        rev_cap_lib = self.cast_from_entity_to_role(rev_cap_lib_holder, role = VOUS)
+        salnet = calculate_rolling_sum(simulation, 'salnet', period)
+        chonet = calculate_rolling_sum(simulation, 'chonet', period)
+        rstnet = calculate_rolling_sum(simulation, 'rstnet', period)
+        pensions_alimentaires_percues = calculate_rolling_sum(simulation, 'pensions_alimentaires_percues', period)
+        rto_declarant1 = calculate_rolling_sum(simulation, 'rto_declarant1', period, divide = True)
+        rpns = calculate_rolling_sum(simulation, 'rpns', period, divide = True)
+        rev_cap_bar_foyer = calculate_rolling_sum(simulation, 'rev_cap_bar', period, divide = True)
+        rev_cap_lib_foyer = calculate_rolling_sum(simulation, 'rev_cap_lib', period, divide = True)
+        rfon_ms = calculate_rolling_sum(simulation, 'rfon_ms', period, divide = True)
+        div_ms = calculate_rolling_sum(simulation, 'div_ms', period, divide = True)
+        revenus_stage_formation_pro = calculate_rolling_sum(simulation, 'revenus_stage_formation_pro', period)
+        allocation_securisation_professionnelle = calculate_rolling_sum(
+            simulation, 'allocation_securisation_professionnelle', period)
+        prime_forfaitaire_mensuelle_reprise_activite = calculate_rolling_sum(
+            simulation, 'prime_forfaitaire_mensuelle_reprise_activite', period)
+        dedommagement_victime_amiante = calculate_rolling_sum(simulation, 'dedommagement_victime_amiante', period)
+        prestation_compensatoire = calculate_rolling_sum(simulation, 'prestation_compensatoire', period)
+        pensions_invalidite = calculate_rolling_sum(simulation, 'pensions_invalidite', period)
+        gains_exceptionnels = calculate_rolling_sum(simulation, 'gains_exceptionnels', period)
+        indemnites_journalieres_maternite = calculate_rolling_sum(
+            simulation, 'indemnites_journalieres_maternite', period)
+        indemnites_journalieres_maladie = calculate_rolling_sum(simulation, 'indemnites_journalieres_maladie', period)
+        indemnites_journalieres_maladie_professionnelle = calculate_rolling_sum(
+            simulation, 'indemnites_journalieres_maladie_professionnelle', period)
+        indemnites_journalieres_accident_travail = calculate_rolling_sum(
+            simulation, 'indemnites_journalieres_accident_travail', period)
+        indemnites_chomage_partiel = calculate_rolling_sum(simulation, 'indemnites_chomage_partiel', period)
+        indemnites_volontariat = calculate_rolling_sum(simulation, 'indemnites_volontariat', period)
+        tns_total_revenus = calculate_rolling_sum(simulation, 'tns_total_revenus', period)
+        rsa_base_ressources_patrimoine_i = calculate_rolling_sum(simulation, 'rsa_base_ressources_patrimoine_i', period)
+        aah = calculate_rolling_sum(simulation, 'aah', period)
+
+        rev_cap_bar = self.cast_from_entity_to_role(rev_cap_bar_foyer, entity = 'foyer_fiscal', role = VOUS)
+        rev_cap_lib = self.cast_from_entity_to_role(rev_cap_lib_foyer, entity = 'foyer_fiscal', role = VOUS)
 
         # Inclus l'AAH si conjoint non pensionné ASPA, retraite et pension invalidité
         aah = aah * or_(not_(aspa_elig), pensions_invalidite + rstnet == 0)
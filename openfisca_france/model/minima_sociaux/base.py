@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+
+
+# OpenFisca -- A versatile microsimulation software
+# By: OpenFisca Team <contact@openfisca.fr>
+#
+# Copyright (C) 2011, 2012, 2013, 2014 OpenFisca Team
+# https://github.com/openfisca
+#
+# This file is part of OpenFisca.
+#
+# OpenFisca is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# OpenFisca is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from __future__ import division
+
+import collections
+import weakref
+
+
+# Rolling sums of monthly values (see calculate_rolling_sum), by (variable name, months count, divide) and by
+# simulation.
+rolling_sum_by_key_by_simulation = weakref.WeakKeyDictionary()
+
+
+class RollingSum(object):
+    """Sum of the monthly values of a variable over a window of consecutive months.
+
+    When the window moves forward by one month, the sum is updated by adding the value of the new month and removing
+    the value of the month that left the window, instead of adding again every month of the window. The sum is
+    computed again from the monthly values each time the window has been entirely renewed, so that the rounding
+    errors of the float32 arrays don't accumulate.
+
+    The monthly values are the arrays kept by the holder of the variable: when the holder doesn't contain them anymore
+    (its arrays have been deleted or replaced), the sum is computed again.
+
+    The simulation is given to each call instead of being kept by the rolling sum, because the rolling sums are the
+    values of a dictionary weakly keyed by the simulation.
+    """
+    def __init__(self, variable_name, months_count, divide = False):
+        self.divide = divide
+        self.first_month = None
+        self.months = collections.deque()
+        self.months_count = months_count
+        self.monthly_values = collections.deque()
+        self.shifts_count = 0
+        self.sum = None
+        self.variable_name = variable_name
+
+    def calculate_month(self, simulation, month):
+        if self.divide:
+            return simulation.calculate_add_divide(self.variable_name, month)
+        return simulation.calculate_add(self.variable_name, month)
+
+    def calculate_window(self, simulation, first_month):
+        if self.first_month is not None and not self.is_up_to_date(simulation.get_or_new_holder(self.variable_name)):
+            self.first_month = None
+        if self.first_month is not None and first_month == self.first_month.offset(1):
+            month = first_month.offset(self.months_count - 1)
+            value = self.calculate_month(simulation, month)
+            self.months.popleft()
+            self.months.append(month)
+            removed_value = self.monthly_values.popleft()
+            self.monthly_values.append(value)
+            self.shifts_count += 1
+            if self.shifts_count % self.months_count == 0:
+                self.sum = sum(self.monthly_values)
+            else:
+                # Don't modify the sum in place, because it may have been returned to a formula.
+                self.sum = self.sum - removed_value + value
+        elif first_month != self.first_month:
+            self.months.clear()
+            self.monthly_values.clear()
+            month = first_month
+            for index in range(self.months_count):
+                self.months.append(month)
+                self.monthly_values.append(self.calculate_month(simulation, month))
+                month = month.offset(1)
+            self.shifts_count = 0
+            self.sum = sum(self.monthly_values)
+        self.first_month = first_month
+        return self.sum
+
+    def is_up_to_date(self, holder):
+        """Return True when the holder still contains the monthly values of the window."""
+        return all(
+            holder.get_array(month) is value
+            for month, value in zip(self.months, self.monthly_values)
+            )
+
+
+def calculate_rolling_sum(simulation, variable_name, period, months_count = 3, divide = False):
+    """Return the sum of the values of a variable during the months_count months preceding the month of period.
+
+    When a value is given for the whole window (for example for the period "2014-07:3", or for the year starting 12
+    months before period), it is returned. Otherwise, the monthly values are computed with calculate_add (or
+    calculate_add_divide when divide is True). The sum is kept by simulation, so that computing the resources of
+    consecutive months costs one month of computation per variable.
+    """
+    first_month = period.start.period('month').offset(-months_count)
+    holder = simulation.get_or_new_holder(variable_name)
+    if not holder.column.is_permanent:
+        windows = [first_month.start.period('month', months_count)]
+        if months_count == 12:
+            windows.append(first_month.start.period('year'))
+        for window in windows:
+            array = holder.get_array(window)
+            if array is not None:
+                return array
+    rolling_sum_by_key = rolling_sum_by_key_by_simulation.get(simulation)
+    if rolling_sum_by_key is None:
+        rolling_sum_by_key_by_simulation[simulation] = rolling_sum_by_key = {}
+    key = (variable_name, months_count, divide)
+    rolling_sum = rolling_sum_by_key.get(key)
+    if rolling_sum is None:
+        rolling_sum_by_key[key] = rolling_sum = RollingSum(variable_name, months_count, divide = divide)
+    return rolling_sum.calculate_window(simulation, first_month)
@@ -30,6 +30,7 @@ from numpy import (apply_along_axis, array, int32, logical_not as not_, maximum
     logical_or as or_)
 
 from ..base import *  # noqa
+from .base import calculate_rolling_sum
 
 
 @reference_formula
@@ -182,34 +183,46 @@ class cmu_base_ressources_i(SimpleFormulaColumn):
 
     def function(self, simulation, period):
         period = period.start.offset('first-of', 'month').period('month')
-        previous_year = period.start.period('year').offset(-1)
         last_month = period.start.period('month').offset(-1)
 
         activite = simulation.calculate('activite', period)
-        salnet = simulation.calculate('salnet', previous_year)
-        chonet = simulation.calculate('chonet', previous_year)
-        rstnet = simulation.calculate('rstnet', previous_year)
-        pensions_alimentaires_percues = simulation.calculate('pensions_alimentaires_percues', previous_year)
-        rsa_base_ressources_patrimoine_i = simulation.calculate_add('rsa_base_ressources_patrimoine_i', previous_year)
-        aah = simulation.calculate('aah', previous_year)
-        indemnites_journalieres_maternite = simulation.calculate('indemnites_journalieres_maternite', previous_year)
-        indemnites_journalieres_maladie = simulation.calculate('indemnites_journalieres_maladie', previous_year)
-        indemnites_journalieres_maladie_professionnelle = simulation.calculate('indemnites_journalieres_maladie_professionnelle', previous_year)
-        indemnites_journalieres_accident_travail = simulation.calculate('indemnites_journalieres_accident_travail', previous_year)
-        indemnites_stage = simulation.calculate('indemnites_stage', previous_year)
-        revenus_stage_formation_pro_annee = simulation.calculate('revenus_stage_formation_pro', previous_year)
+        salnet = calculate_rolling_sum(simulation, 'salnet', period, months_count = 12)
+        chonet = calculate_rolling_sum(simulation, 'chonet', period, months_count = 12)
+        rstnet = calculate_rolling_sum(simulation, 'rstnet', period, months_count = 12)
+        pensions_alimentaires_percues = calculate_rolling_sum(
+            simulation, 'pensions_alimentaires_percues', period, months_count = 12)
+        rsa_base_ressources_patrimoine_i = calculate_rolling_sum(
+            simulation, 'rsa_base_ressources_patrimoine_i', period, months_count = 12)
+        aah = calculate_rolling_sum(simulation, 'aah', period, months_count = 12)
+        indemnites_journalieres_maternite = calculate_rolling_sum(
+            simulation, 'indemnites_journalieres_maternite', period, months_count = 12)
+        indemnites_journalieres_maladie = calculate_rolling_sum(
+            simulation, 'indemnites_journalieres_maladie', period, months_count = 12)
+        indemnites_journalieres_maladie_professionnelle = calculate_rolling_sum(
+            simulation, 'indemnites_journalieres_maladie_professionnelle', period, months_count = 12)
+        indemnites_journalieres_accident_travail = calculate_rolling_sum(
+            simulation, 'indemnites_journalieres_accident_travail', period, months_count = 12)
+        indemnites_stage = calculate_rolling_sum(simulation, 'indemnites_stage', period, months_count = 12)
+        revenus_stage_formation_pro_annee = calculate_rolling_sum(
+            simulation, 'revenus_stage_formation_pro', period, months_count = 12)
         revenus_stage_formation_pro_dernier_mois = simulation.calculate('revenus_stage_formation_pro', last_month)
-        allocation_securisation_professionnelle = simulation.calculate('allocation_securisation_professionnelle', previous_year)
-        prime_forfaitaire_mensuelle_reprise_activite = simulation.calculate('prime_forfaitaire_mensuelle_reprise_activite', previous_year)
-        dedommagement_victime_amiante = simulation.calculate('dedommagement_victime_amiante', previous_year)
-        prestation_compensatoire = simulation.calculate('prestation_compensatoire', previous_year)
-        retraite_combattant = simulation.calculate('retraite_combattant', previous_year)
-        pensions_invalidite = simulation.calculate('pensions_invalidite', previous_year)
-        indemnites_chomage_partiel = simulation.calculate('indemnites_chomage_partiel', previous_year)
-        bourse_enseignement_sup = simulation.calculate('bourse_enseignement_sup', previous_year)
-        bourse_recherche = simulation.calculate('bourse_recherche', previous_year)
-        gains_exceptionnels = simulation.calculate('gains_exceptionnels', previous_year)
-        tns_total_revenus = simulation.calculate_add('tns_total_revenus', previous_year)
+        allocation_securisation_professionnelle = calculate_rolling_sum(
+            simulation, 'allocation_securisation_professionnelle', period, months_count = 12)
+        prime_forfaitaire_mensuelle_reprise_activite = calculate_rolling_sum(
+            simulation, 'prime_forfaitaire_mensuelle_reprise_activite', period, months_count = 12)
+        dedommagement_victime_amiante = calculate_rolling_sum(
+            simulation, 'dedommagement_victime_amiante', period, months_count = 12)
+        prestation_compensatoire = calculate_rolling_sum(
+            simulation, 'prestation_compensatoire', period, months_count = 12)
+        retraite_combattant = calculate_rolling_sum(simulation, 'retraite_combattant', period, months_count = 12)
+        pensions_invalidite = calculate_rolling_sum(simulation, 'pensions_invalidite', period, months_count = 12)
+        indemnites_chomage_partiel = calculate_rolling_sum(
+            simulation, 'indemnites_chomage_partiel', period, months_count = 12)
+        bourse_enseignement_sup = calculate_rolling_sum(
+            simulation, 'bourse_enseignement_sup', period, months_count = 12)
+        bourse_recherche = calculate_rolling_sum(simulation, 'bourse_recherche', period, months_count = 12)
+        gains_exceptionnels = calculate_rolling_sum(simulation, 'gains_exceptionnels', period, months_count = 12)
+        tns_total_revenus = calculate_rolling_sum(simulation, 'tns_total_revenus', period, months_count = 12)
         P = simulation.legislation_at(period.start).cmu
 
         # Revenus de stage de formation professionnelle exclus si plus perçus depuis 1 mois
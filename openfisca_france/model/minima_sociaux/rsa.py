@@ -29,6 +29,7 @@ from numpy import (floor, maximum as max_, logical_not as not_, logical_and as a
 
 from ..base import *  # noqa
 from ..pfam import nb_enf, age_en_mois_benjamin
+from .base import calculate_rolling_sum
 
 
 @reference_formula
@@ -371,15 +372,14 @@ class br_rmi_ms(SimpleFormulaColumn):
 
     def function(self, simulation, period):
         period = period.start.offset('first-of', 'month').period('month')
-        three_previous_months = period.start.period('month', 3).offset(-3)
         aspa = simulation.calculate('aspa', period)
         asi = simulation.calculate('asi', period)
         ass = simulation.calculate('ass', period)
-        aah_holder = simulation.compute('aah', three_previous_months)
-        caah_holder = simulation.compute('caah', three_previous_months)
+        aah_i = calculate_rolling_sum(simulation, 'aah', period)
+        caah_i = calculate_rolling_sum(simulation, 'caah', period)
 
-        aah = self.sum_by_entity(aah_holder)
-        caah = self.sum_by_entity(caah_holder)
+        aah = self.sum_by_entity(aah_i)
+        caah = self.sum_by_entity(caah_i)
         return period, aspa + asi + ass + aah + caah
 
 
@@ -393,26 +393,25 @@ class br_rmi_i(SimpleFormulaColumn):
         period = period.start.offset('first-of', 'month').period('month')
         three_previous_months = period.start.period('month', 3).offset(-3)
         ra_rsa_i = simulation.calculate('ra_rsa_i', period)
-        chonet = simulation.calculate('chonet', three_previous_months)
-        rstnet = simulation.calculate('rstnet', three_previous_months)
-        pensions_alimentaires_percues = simulation.calculate('pensions_alimentaires_percues', three_previous_months)
+        chonet = calculate_rolling_sum(simulation, 'chonet', period)
+        rstnet = calculate_rolling_sum(simulation, 'rstnet', period)
+        pensions_alimentaires_percues = calculate_rolling_sum(simulation, 'pensions_alimentaires_percues', period)
         rto_declarant1 = simulation.calculate('rto_declarant1', three_previous_months)
         rev_cap_bar_holder = simulation.compute('rev_cap_bar', three_previous_months)
         rev_cap_lib_holder = simulation.compute('rev_cap_lib', three_previous_months)
         rfon_ms = simulation.calculate('rfon_ms', three_previous_months)
         div_ms = simulation.calculate('div_ms', three_previous_months)
-        gains_exceptionnels = simulation.calculate('gains_exceptionnels', three_previous_months)
-        dedommagement_victime_amiante = simulation.calculate('dedommagement_victime_amiante', three_previous_months)
-        pensions_invalidite = simulation.calculate('pensions_invalidite', three_previous_months)
-        allocation_aide_retour_emploi = simulation.calculate('allocation_aide_retour_emploi', three_previous_months)
-
-        allocation_securisation_professionnelle = simulation.calculate(
-            'allocation_securisation_professionnelle', three_previous_months)
-        prestation_compensatoire = simulation.calculate('prestation_compensatoire', three_previous_months)
-        bourse_enseignement_sup = simulation.calculate('bourse_enseignement_sup', three_previous_months)
-        bourse_recherche = simulation.calculate('bourse_recherche', three_previous_months)
-        rsa_base_ressources_patrimoine_i = simulation.calculate(
-            'rsa_base_ressources_patrimoine_i', three_previous_months)
+        gains_exceptionnels = calculate_rolling_sum(simulation, 'gains_exceptionnels', period)
+        dedommagement_victime_amiante = calculate_rolling_sum(simulation, 'dedommagement_victime_amiante', period)
+        pensions_invalidite = calculate_rolling_sum(simulation, 'pensions_invalidite', period)
+        allocation_aide_retour_emploi = calculate_rolling_sum(simulation, 'allocation_aide_retour_emploi', period)
+
+        allocation_securisation_professionnelle = calculate_rolling_sum(
+            simulation, 'allocation_securisation_professionnelle', period)
+        prestation_compensatoire = calculate_rolling_sum(simulation, 'prestation_compensatoire', period)
+        bourse_enseignement_sup = calculate_rolling_sum(simulation, 'bourse_enseignement_sup', period)
+        bourse_recherche = calculate_rolling_sum(simulation, 'bourse_recherche', period)
+        rsa_base_ressources_patrimoine_i = calculate_rolling_sum(simulation, 'rsa_base_ressources_patrimoine_i', period)
 
         rev_cap_bar = self.cast_from_entity_to_role(rev_cap_bar_holder, role = VOUS)
         rev_cap_lib = self.cast_from_entity_to_role(rev_cap_lib_holder, role = VOUS)
@@ -514,27 +513,25 @@ class ra_rsa_i(SimpleFormulaColumn):
 
     def function(self, simulation, period):
         period = period.start.offset('first-of', 'month').period('month')
-        three_previous_months = period.start.period('month', 3).offset(-3)
-        salnet = simulation.calculate('salnet', three_previous_months)
-        hsup = simulation.calculate('hsup', three_previous_months)
-        rpns = simulation.calculate_add_divide('rpns', three_previous_months)
-        etr = simulation.calculate('etr', three_previous_months)
-        indemnites_chomage_partiel = simulation.calculate('indemnites_chomage_partiel', three_previous_months)
-        indemnites_journalieres_maternite = simulation.calculate(
-            'indemnites_journalieres_maternite', three_previous_months)
-        indemnites_journalieres_paternite = simulation.calculate(
-            'indemnites_journalieres_paternite', three_previous_months)
-        indemnites_journalieres_adoption = simulation.calculate(
-            'indemnites_journalieres_adoption', three_previous_months)
-        indemnites_journalieres_maladie = simulation.calculate('indemnites_journalieres_maladie', three_previous_months)
-        indemnites_journalieres_accident_travail = simulation.calculate(
-            'indemnites_journalieres_accident_travail', three_previous_months)
-        indemnites_journalieres_maladie_professionnelle = simulation.calculate(
-            'indemnites_journalieres_maladie_professionnelle', three_previous_months)
-        indemnites_volontariat = simulation.calculate('indemnites_volontariat', three_previous_months)
-        revenus_stage_formation_pro = simulation.calculate('revenus_stage_formation_pro', three_previous_months)
-        indemnites_stage = simulation.calculate('indemnites_stage', three_previous_months)
-        tns_total_revenus = simulation.calculate_add('tns_total_revenus', three_previous_months)
+        salnet = calculate_rolling_sum(simulation, 'salnet', period)
+        hsup = calculate_rolling_sum(simulation, 'hsup', period)
+        rpns = calculate_rolling_sum(simulation, 'rpns', period, divide = True)
+        etr = calculate_rolling_sum(simulation, 'etr', period)
+        indemnites_chomage_partiel = calculate_rolling_sum(simulation, 'indemnites_chomage_partiel', period)
+        indemnites_journalieres_maternite = calculate_rolling_sum(
+            simulation, 'indemnites_journalieres_maternite', period)
+        indemnites_journalieres_paternite = calculate_rolling_sum(
+            simulation, 'indemnites_journalieres_paternite', period)
+        indemnites_journalieres_adoption = calculate_rolling_sum(simulation, 'indemnites_journalieres_adoption', period)
+        indemnites_journalieres_maladie = calculate_rolling_sum(simulation, 'indemnites_journalieres_maladie', period)
+        indemnites_journalieres_accident_travail = calculate_rolling_sum(
+            simulation, 'indemnites_journalieres_accident_travail', period)
+        indemnites_journalieres_maladie_professionnelle = calculate_rolling_sum(
+            simulation, 'indemnites_journalieres_maladie_professionnelle', period)
+        indemnites_volontariat = calculate_rolling_sum(simulation, 'indemnites_volontariat', period)
+        revenus_stage_formation_pro = calculate_rolling_sum(simulation, 'revenus_stage_formation_pro', period)
+        indemnites_stage = calculate_rolling_sum(simulation, 'indemnites_stage', period)
+        tns_total_revenus = calculate_rolling_sum(simulation, 'tns_total_revenus', period)
 
         return period, (
             salnet + hsup + rpns + etr + indemnites_chomage_partiel + indemnites_journalieres_maternite +
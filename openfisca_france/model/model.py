@@ -23,51 +23,12 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
-from . import (  # noqa analysis:ignore
-    common,
-    education,
-    input_variables,
-    isf,
-    aides_logement,
-    pfam,
-    travailleurs_non_salaries,
-    th,
-    )
+"""Import every formula module, to register all the input and output variables in entities without waiting for them
+to be used.
+"""
 
-from .cotisations_sociales import (  # noqa analysis:ignore
-    allegements,
-    capital,
-    # penalites,
-    remplacement,
-    remuneration_prive,
-    remuneration_public,
-    travail_fonction_publique,
-    travail_prive,
-    travail_totaux,
-    )
 
-from .impot_revenu import (  # noqa analysis:ignore
-    ir,
-    charges_deductibles,
-    credits_impot,
-    ir,
-    plus_values_immobilieres,
-    reductions_impot,
-    )
+from ..formulas_registry import import_formulas_modules
 
-from .minima_sociaux import (  # noqa analysis:ignore
-    # aah,
-    asi_aspa,
-    ass,
-    cmu,
-    rsa,
-    )
 
-from .prestations_familiales import (  # noqa analysis:ignore
-    aeeh,
-    af,
-    ars,
-    asf,
-    paje,
-    cf,
-    )
+import_formulas_modules()
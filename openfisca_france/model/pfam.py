@@ -25,10 +25,10 @@
 
 from __future__ import division
 
-from numpy import int32, logical_not as not_, zeros
-from numpy.core.defchararray import startswith
+from numpy import column_stack, int32, logical_not as not_, where
 
 from .base import *  # noqa
+from .communes import get_territoire
 
 
 @reference_formula
@@ -38,11 +38,11 @@ class residence_guadeloupe(SimpleFormulaColumn):
 
     def function(self, simulation, period):
         period = period
-        depcom_holder = simulation.compute('depcom', period)
+        territoire = get_territoire(simulation, period)
 
-        depcom = self.cast_from_entity_to_roles(depcom_holder)
-        depcom = self.filter_role(depcom, role = CHEF)
-        return period, startswith(depcom, '971')
+        territoire = self.cast_from_entity_to_roles(territoire, entity = 'menage')
+        territoire = self.filter_role(territoire, role = CHEF)
+        return period, territoire == 971
 
 
 @reference_formula
@@ -52,11 +52,11 @@ class residence_martinique(SimpleFormulaColumn):
 
     def function(self, simulation, period):
         period = period
-        depcom_holder = simulation.compute('depcom', period)
+        territoire = get_territoire(simulation, period)
 
-        depcom = self.cast_from_entity_to_roles(depcom_holder)
-        depcom = self.filter_role(depcom, role = CHEF)
-        return period, startswith(depcom, '972')
+        territoire = self.cast_from_entity_to_roles(territoire, entity = 'menage')
+        territoire = self.filter_role(territoire, role = CHEF)
+        return period, territoire == 972
 
 
 @reference_formula
@@ -66,11 +66,11 @@ class residence_guyane(SimpleFormulaColumn):
 
     def function(self, simulation, period):
         period = period
-        depcom_holder = simulation.compute('depcom', period)
+        territoire = get_territoire(simulation, period)
 
-        depcom = self.cast_from_entity_to_roles(depcom_holder)
-        depcom = self.filter_role(depcom, role = CHEF)
-        return period, startswith(depcom, '973')
+        territoire = self.cast_from_entity_to_roles(territoire, entity = 'menage')
+        territoire = self.filter_role(territoire, role = CHEF)
+        return period, territoire == 973
 
 
 @reference_formula
@@ -80,11 +80,11 @@ class residence_reunion(SimpleFormulaColumn):
 
     def function(self, simulation, period):
         period = period
-        depcom_holder = simulation.compute('depcom', period)
+        territoire = get_territoire(simulation, period)
 
-        depcom = self.cast_from_entity_to_roles(depcom_holder)
-        depcom = self.filter_role(depcom, role = CHEF)
-        return period, startswith(depcom, '974')
+        territoire = self.cast_from_entity_to_roles(territoire, entity = 'menage')
+        territoire = self.filter_role(territoire, role = CHEF)
+        return period, territoire == 974
 
 
 @reference_formula
@@ -94,11 +94,11 @@ class residence_mayotte(SimpleFormulaColumn):
 
     def function(self, simulation, period):
         period = period
-        depcom_holder = simulation.compute('depcom', period)
+        territoire = get_territoire(simulation, period)
 
-        depcom = self.cast_from_entity_to_roles(depcom_holder)
-        depcom = self.filter_role(depcom, role = CHEF)
-        return period, startswith(depcom, '976')
+        territoire = self.cast_from_entity_to_roles(territoire, entity = 'menage')
+        territoire = self.filter_role(territoire, role = CHEF)
+        return period, territoire == 976
 
 
 @reference_formula
@@ -360,11 +360,9 @@ def nb_enf(ages, smic55, ag1, ag2):
 #        Un enfant est reconnu à charge pour le versement des prestations
 #        jusqu'au mois précédant son age limite supérieur (ag2 + 1) mais
 #        le versement à lieu en début de mois suivant
-    res = None
-    for key, age in ages.iteritems():
-        if res is None: res = zeros(len(age), dtype = int32)
-        res += (ag1 <= age) & (age <= ag2) & not_(smic55[key])
-    return res
+    ages = stack_roles(ages)
+    smic55 = stack_roles(smic55)
+    return ((ag1 <= ages) & (ages <= ag2) & not_(smic55)).sum(axis = 1).astype(int32)
 
 
 def age_aine(ages, smic55, ag1, ag2):
@@ -372,20 +370,25 @@ def age_aine(ages, smic55, ag1, ag2):
     Renvoie un vecteur avec l'âge de l'ainé (au sens des allocations
     familiales) de chaque famille
     '''
-    ageaine = -9999
-    for key, age in ages.iteritems():
-        ispacaf = (ag1 <= age) & (age <= ag2) & not_(smic55[key])
-        isaine = ispacaf & (age > ageaine)
-        ageaine = isaine * age + not_(isaine) * ageaine
-    return ageaine
+    ages = stack_roles(ages)
+    smic55 = stack_roles(smic55)
+    ispacaf = (ag1 <= ages) & (ages <= ag2) & not_(smic55)
+    return where(ispacaf, ages, -9999).max(axis = 1)
 
 
 def age_en_mois_benjamin(agems):
     '''
     Renvoie un vecteur (une entree pour chaque famille) avec l'age du benjamin.  # TODO check agem > 0
     '''
-    agem_benjamin = 12 * 9999
-    for agem in agems.itervalues():
-        isbenjamin = (agem < agem_benjamin) & (agem != -9999)
-        agem_benjamin = isbenjamin * agem + not_(isbenjamin) * agem_benjamin
-    return agem_benjamin
+    agems = stack_roles(agems)
+    return where(agems != -9999, agems, 12 * 9999).min(axis = 1)
+
+
+def stack_roles(array_or_array_by_role):
+    """
+    Renvoie la matrice (entités x rôles) d'une variable, qu'elle vienne de split_by_roles (dictionnaire par rôle) ou
+    de split_by_roles_matrix.
+    """
+    if isinstance(array_or_array_by_role, dict):
+        return column_stack([array_or_array_by_role[role] for role in sorted(array_or_array_by_role)])
+    return array_or_array_by_role
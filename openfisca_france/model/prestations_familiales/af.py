@@ -44,8 +44,8 @@ class af_nbenf(SimpleFormulaColumn):
         smic55_holder = simulation.compute('smic55', period.offset(-1), accept_other_period = True)
         P = simulation.legislation_at(period.start).fam.af
 
-        age = self.split_by_roles(age_holder, roles = ENFS)
-        smic55 = self.split_by_roles(smic55_holder, roles = ENFS)
+        age = split_by_roles_matrix(self, age_holder, roles = ENFS)
+        smic55 = split_by_roles_matrix(self, smic55_holder, roles = ENFS)
         af_nbenf = nb_enf(age, smic55, P.age1, P.age2)
 
         return period, af_nbenf
@@ -114,8 +114,8 @@ class af_majo(SimpleFormulaColumn):
         af_nbenf = simulation.calculate('af_nbenf', period)
         P = simulation.legislation_at(period.start).fam.af
 
-        age = self.split_by_roles(age_holder, roles = ENFS)
-        smic55 = self.split_by_roles(smic55_holder, roles = ENFS)
+        age = split_by_roles_matrix(self, age_holder, roles = ENFS)
+        smic55 = split_by_roles_matrix(self, smic55_holder, roles = ENFS)
         # TODO: Date d'entrée en vigueur de la nouvelle majoration
         # enfants nés après le "1997-04-30"
         bmaf = P.bmaf
@@ -152,8 +152,8 @@ class af_forf(SimpleFormulaColumn):
         smic55_holder = simulation.compute('smic55', period)
         P = simulation.legislation_at(period.start).fam.af
 
-        age = self.split_by_roles(age_holder, roles = ENFS)
-        smic55 = self.split_by_roles(smic55_holder, roles = ENFS)
+        age = split_by_roles_matrix(self, age_holder, roles = ENFS)
+        smic55 = split_by_roles_matrix(self, smic55_holder, roles = ENFS)
         bmaf = P.bmaf
         nbenf_forf = nb_enf(age, smic55, P.age3, P.age3)
         af_forfait = round(bmaf * P.taux.forfait, 2)
@@ -52,8 +52,8 @@ class ars(SimpleFormulaColumn):
         # TODO: convention sur la mensualisation
         # On tient compte du fait qu'en cas de léger dépassement du plafond, une allocation dégressive
         # (appelée allocation différentielle), calculée en fonction des revenus, peut être versée.
-        age = self.split_by_roles(age_holder, roles = ENFS)
-        smic55 = self.split_by_roles(smic55_holder, roles = ENFS)
+        age = split_by_roles_matrix(self, age_holder, roles = ENFS)
+        smic55 = split_by_roles_matrix(self, smic55_holder, roles = ENFS)
 
         bmaf = P.af.bmaf
         # On doit prendre l'âge en septembre
@@ -80,8 +80,8 @@ class asf_nbenf(SimpleFormulaColumn):
 
         # TODO: Ajouter orphelin recueilli, soustraction à l'obligation d'entretien (et date de celle-ci),
         # action devant le TGI pour complêter l'éligibilité
-        age = self.split_by_roles(age_holder, roles = ENFS)
-        smic55 = self.split_by_roles(smic55_holder, roles = ENFS)
+        age = split_by_roles_matrix(self, age_holder, roles = ENFS)
+        smic55 = split_by_roles_matrix(self, smic55_holder, roles = ENFS)
 
         return period, nb_enf(age, smic55, P.af.age1, P.af.age3)
 
@@ -59,8 +59,8 @@ class cf_temp(SimpleFormulaColumn):
         smic55_holder = simulation.compute('smic55', period, accept_other_period = True)
         P = simulation.legislation_at(period.start).fam
 
-        age = self.split_by_roles(age_holder, roles = ENFS)
-        smic55 = self.split_by_roles(smic55_holder, roles = ENFS)
+        age = split_by_roles_matrix(self, age_holder, roles = ENFS)
+        smic55 = split_by_roles_matrix(self, smic55_holder, roles = ENFS)
 
         bmaf = P.af.bmaf
         bmaf2 = P.af.bmaf_n_2
@@ -78,8 +78,8 @@ class paje_base_temp(SimpleFormulaColumn):
         # TODO : théorie, il faut comparer les revenus de l'année n-2 à la bmaf de
         # l'année n-2 pour déterminer l'éligibilité avec le cf_seuil. Il faudrait
         # pouvoir déflater les revenus de l'année courante pour en tenir compte.
-        age = self.split_by_roles(age_holder, roles = ENFS)
-        smic55 = self.split_by_roles(smic55_holder, roles = ENFS)
+        age = split_by_roles_matrix(self, age_holder, roles = ENFS)
+        smic55 = split_by_roles_matrix(self, smic55_holder, roles = ENFS)
 
         bmaf = P.af.bmaf
         bmaf2 = P.af.bmaf_n_2
@@ -124,21 +124,18 @@ class paje_nais(SimpleFormulaColumn):
         biact = simulation.calculate('biact', period)
         P = simulation.legislation_at(period.start).fam
 
-        age = self.split_by_roles(age_holder, roles = ENFS)
-        agem = self.split_by_roles(agem_holder, roles = ENFS)
+        age = split_by_roles_matrix(self, age_holder, roles = ENFS)
+        agem = split_by_roles_matrix(self, agem_holder, roles = ENFS)
 
         bmaf = P.af.bmaf
         nais_prime = round(100 * P.paje.nais.prime_tx * bmaf) / 100
         # Versée au 7e mois de grossesse dans l'année
         # donc les enfants concernés sont les enfants qui ont -2 mois
-        nbnais = 0
-        for age_m in agem.itervalues():
-            # nbnais += (age_m == -2) cas mensuel
-            nbnais += (age_m >= -2) * (age_m < 10)
+        # nbnais = ((agem == -2)).sum(axis = 1) cas mensuel
+        nbnais = ((agem >= -2) * (agem < 10)).sum(axis = 1)
 
-        nbaf = 0  # Et on compte le nombre d'enfants AF présents  pour le seul mois de la prime
-        for age_m in agem.itervalues():
-            nbaf += (age_m >= 10)
+        # Et on compte le nombre d'enfants AF présents  pour le seul mois de la prime
+        nbaf = (agem >= 10).sum(axis = 1)
 
         nbenf = nbaf + nbnais  # On ajoute l'enfant à  naître;
 
@@ -190,7 +187,7 @@ class paje_clca(SimpleFormulaColumn):
         partiel2 = simulation.calculate('partiel2', period)
         P = simulation.legislation_at(period.start).fam
 
-        agem = self.split_by_roles(agem_holder, roles = ENFS)
+        agem = split_by_roles_matrix(self, agem_holder, roles = ENFS)
 
         paje = paje_base >= 0
         # durée de versement :
@@ -303,11 +300,11 @@ class paje_clmg(SimpleFormulaColumn):
         paje_clca_taux_plein = simulation.calculate('paje_clca_taux_plein', period)
         P = simulation.legislation_at(period.start).fam
 
-        age = self.split_by_roles(age_holder, roles = ENFS)
+        age = split_by_roles_matrix(self, age_holder, roles = ENFS)
         etu = self.split_by_roles(etu_holder, roles = [CHEF, PART])
         hsup = self.split_by_roles(hsup_holder, roles = [CHEF, PART])
         sal = self.split_by_roles(sal_holder, roles = [CHEF, PART])
-        smic55 = self.split_by_roles(smic55_holder, roles = ENFS)
+        smic55 = split_by_roles_matrix(self, smic55_holder, roles = ENFS)
         aah = self.sum_by_entity(aah_holder)
 
         # condition de revenu minimal
@@ -373,7 +370,7 @@ class paje_colca(SimpleFormulaColumn):
         paje_base = simulation.calculate('paje_base', period)
         P = simulation.legislation_at(period.start).fam
 
-        agem = self.split_by_roles(agem_holder, roles = ENFS)
+        agem = split_by_roles_matrix(self, agem_holder, roles = ENFS)
 
         age_m_benjamin = age_en_mois_benjamin(agem)
         condition = (age_m_benjamin < 12 * P.paje.colca.age) * (age_m_benjamin >= 0)
@@ -412,8 +409,8 @@ def _afeama(self, age_holder, smic55_holder, ape, af_nbenf, br_pf, P = law.fam):
     '''
     Aide à la famille pour l'emploi d'une assistante maternelle agréée
     '''
-    age = self.split_by_roles(age_holder, roles = ENFS)
-    smic55 = self.split_by_roles(smic55_holder, roles = ENFS)
+    age = split_by_roles_matrix(self, age_holder, roles = ENFS)
+    smic55 = split_by_roles_matrix(self, smic55_holder, roles = ENFS)
 
     # TODO http://web.archive.org/web/20080205163300/http://www.caf.fr/wps/portal/particuliers/catalogue/metropole/afeama
     # Les seuils sont de 80 et 110 % de l'ARS
@@ -472,8 +469,8 @@ def _aged(self, age_holder, smic55_holder, br_pf, ape_taux_partiel, dep_trim, P
     la CAF prend en charge 50% des charges sociales (plafonné à 553 € par trimestre)
     '''
     # TODO: trimestrialiser
-    age = self.split_by_roles(age_holder, roles = ENFS)
-    smic55 = self.split_by_roles(smic55_holder, roles = ENFS)
+    age = split_by_roles_matrix(self, age_holder, roles = ENFS)
+    smic55 = split_by_roles_matrix(self, smic55_holder, roles = ENFS)
 
     nbenf = nb_enf(age, smic55, 0, P.aged.age1 - 1)
     nbenf2 = nb_enf(age, smic55, 0, P.aged.age2 - 1)
@@ -531,8 +528,8 @@ class ape_temp(SimpleFormulaColumn):
         partiel2 = simulation.calculate('partiel2', period)
         P = simulation.legislation_at(period.start).fam
 
-        age = self.split_by_roles(age_holder, roles = ENFS)
-        smic55 = self.split_by_roles(smic55_holder, roles = ENFS)
+        age = split_by_roles_matrix(self, age_holder, roles = ENFS)
+        smic55 = split_by_roles_matrix(self, smic55_holder, roles = ENFS)
 
         elig = (nb_enf(age, smic55, 0, P.ape.age - 1) >= 1) & (nb_enf(age, smic55, 0, P.af.age2) >= 2)
         # Inactif
@@ -573,8 +570,8 @@ class apje_temp(SimpleFormulaColumn):
         biact = simulation.calculate('biact', period)
         P = simulation.legislation_at(period.start).fam
 
-        age = self.split_by_roles(age_holder, roles = ENFS)
-        smic55 = self.split_by_roles(smic55_holder, roles = ENFS)
+        age = split_by_roles_matrix(self, age_holder, roles = ENFS)
+        smic55 = split_by_roles_matrix(self, smic55_holder, roles = ENFS)
 
         # TODO: APJE courte voir doc ERF 2006
         nbenf = nb_enf(age, smic55, 0, P.apje.age - 1)
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+
+
+# OpenFisca -- A versatile microsimulation software
+# By: OpenFisca Team <contact@openfisca.fr>
+#
+# Copyright (C) 2011, 2012, 2013, 2014, 2015 OpenFisca Team
+# https://github.com/openfisca
+#
+# This file is part of OpenFisca.
+#
+# OpenFisca is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# OpenFisca is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""Sparse storage of input variables that are left at their default value by almost every entity.
+
+Most cerfa boxes of the income tax return (2042, 2042 C, 2042 PRO…) are filled by very few foyers. Their inputs are
+stored in the holder as a SparseArray (the indices and values of the cells that differ from the default) and are
+converted to a dense array only when a formula reads them.
+"""
+
+
+from __future__ import division
+
+import operator
+
+import numpy as np
+from openfisca_core import formulas
+
+from ..entities import entity_class_by_symbol
+
+
+# Inputs denser than this ratio of non-default cells are stored as dense arrays.
+max_density = 0.25
+
+
+class SparseArray(object):
+    """Array whose cells are all equal to default, except the cells at indices, which are equal to values.
+
+    Indices are sorted. Arithmetic with scalars and with other sparse arrays keeps the result sparse; arithmetic with
+    dense arrays returns a dense array.
+    """
+    def __init__(self, size, indices = None, values = None, default = 0, dtype = None):
+        if indices is None:
+            indices = np.zeros(0, dtype = np.int32)
+        if values is None:
+            values = np.zeros(0, dtype = dtype or np.float32)
+        assert len(indices) == len(values)
+        self.default = default
+        self.dtype = np.dtype(dtype) if dtype is not None else values.dtype
+        self.indices = indices
+        self.size = size
+        self.values = values
+
+    def __add__(self, other):
+        return self.apply(operator.add, other)
+
+    def __mul__(self, other):
+        return self.apply(operator.mul, other)
+
+    def __neg__(self):
+        return SparseArray(self.size, self.indices, -self.values, default = -self.default)
+
+    def __radd__(self, other):
+        return self.apply(operator.add, other)
+
+    def __rmul__(self, other):
+        return self.apply(operator.mul, other)
+
+    def __rsub__(self, other):
+        return self.apply(lambda value, other_value: other_value - value, other)
+
+    def __sub__(self, other):
+        return self.apply(operator.sub, other)
+
+    def apply(self, function, other):
+        """Apply a binary function cell by cell, keeping the result sparse when other is a scalar or sparse."""
+        if isinstance(other, SparseArray):
+            assert other.size == self.size
+            indices = np.union1d(self.indices, other.indices)
+            values = function(self.take(indices), other.take(indices))
+            return SparseArray(self.size, indices, values, default = function(self.default, other.default))
+        if np.isscalar(other):
+            return SparseArray(self.size, self.indices, function(self.values, other),
+                default = function(self.default, other))
+        return function(self.toarray(), other)
+
+    @property
+    def density(self):
+        return len(self.indices) / self.size if self.size else 0
+
+    @classmethod
+    def from_array(cls, array, default = 0):
+        indices = (array != default).nonzero()[0].astype(np.int32)
+        return cls(array.size, indices, array[indices], default = default, dtype = array.dtype)
+
+    def is_default(self):
+        """Return True when every cell is equal to the default value."""
+        return len(self.indices) == 0
+
+    def take(self, indices):
+        """Return the values of the cells at the given sorted indices."""
+        result = np.empty(len(indices), dtype = self.dtype)
+        result.fill(self.default)
+        if len(self.indices):
+            positions = np.searchsorted(self.indices, indices).clip(max = len(self.indices) - 1)
+            found = self.indices[positions] == indices
+            result[found] = self.values[positions[found]]
+        return result
+
+    def toarray(self):
+        array = np.empty(self.size, dtype = self.dtype)
+        array.fill(self.default)
+        array[self.indices] = self.values
+        return array
+
+
+def calculate_sparse(simulation, column_name, period):
+    """Return the value of an input variable as a SparseArray, without converting a sparse input to a dense array."""
+    from .uniform_formulas import UniformSimulation
+    if isinstance(simulation, UniformSimulation):
+        # Formula evaluated on a single cell: the variable is read as a single-cell array, if it is uniform.
+        return SparseArray.from_array(simulation.calculate(column_name, period))
+    holder = simulation.get_or_new_holder(column_name)
+    sparse_array = get_sparse_array(holder, period)
+    if sparse_array is not None:
+        return sparse_array
+    return SparseArray.from_array(simulation.calculate(column_name, period), default = holder.column.default)
+
+
+def get_sparse_array(holder, period):
+    """Return the SparseArray stored by set_input_sparse for exactly this period, or None.
+
+    Storing a SparseArray removes the dense array of the period, so a dense array stored for the period is either the
+    conversion of the SparseArray or a later input set directly in the holder (holder.array = …): in both cases, it
+    takes precedence.
+    """
+    sparse_array_by_period = getattr(holder, 'sparse_array_by_period', None)
+    if sparse_array_by_period is None:
+        return None
+    sparse_array = sparse_array_by_period.get(period)
+    if sparse_array is None or holder.get_array(period) is not None:
+        return None
+    return sparse_array
+
+
+def requested_period_sparse_value(formula, simulation, period):
+    """Base function of sparse input variables: convert the sparse input of the period to a dense array."""
+    sparse_array = get_sparse_array(formula.holder, period)
+    if sparse_array is None:
+        return formulas.requested_period_default_value(formula, simulation, period)
+    return period, sparse_array.toarray()
+
+
+def set_input_sparse(formula, period, array):
+    """Set input hook storing the arrays having few non-default cells as SparseArray."""
+    holder = formula.holder
+    column = holder.column
+    sparse_array = SparseArray.from_array(np.asarray(array, dtype = column.dtype), default = column.default)
+    if sparse_array.density > max_density:
+        set_sparse_array(holder, period, None)
+        holder.set_array(period, array)
+        return
+    set_sparse_array(holder, period, sparse_array)
+
+
+def set_input_array(holder, array):
+    """Set the input of the period of the simulation, storing sparsely the cerfa boxes (see use_sparse_storage).
+
+    Unlike holder.array = array, this goes through the set input hook of the sparse input variables, so that the
+    inputs of the surveys are stored as the inputs of the test cases.
+    """
+    formula = holder.formula
+    if formula is not None and getattr(formula.set_input, 'im_func', None) is set_input_sparse:
+        formula.set_input(holder.entity.simulation.period, array)
+    else:
+        holder.array = array
+
+
+def set_sparse_array(holder, period, sparse_array):
+    """Store the SparseArray of a period (or remove it when sparse_array is None), replacing its dense array."""
+    # The holders of a cloned simulation share the dictionary of the original ones: don't modify it in place.
+    sparse_array_by_period = dict(getattr(holder, 'sparse_array_by_period', None) or {})
+    if sparse_array is None:
+        sparse_array_by_period.pop(period, None)
+    else:
+        sparse_array_by_period[period] = sparse_array
+        # The dense array converted from a previous input of the period is obsolete.
+        array_by_period = holder._array_by_period
+        if array_by_period is not None:
+            array_by_period.pop(period, None)
+    holder.sparse_array_by_period = sparse_array_by_period
+
+
+def use_sparse_storage(module_name):
+    """Store sparsely the inputs of the cerfa boxes defined by the given input variables module."""
+    for entity_class in entity_class_by_symbol.itervalues():
+        for name, column in entity_class.column_by_name.iter_loaded_items():
+            formula_class = column.formula_class
+            if formula_class.__module__ != module_name or column.cerfa_field is None or column.is_permanent or \
+                    column.is_period_size_independent:
+                continue
+            formula_class.base_function = requested_period_sparse_value
+            formula_class.set_input = set_input_sparse
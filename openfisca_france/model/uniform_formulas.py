@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+
+
+# OpenFisca -- A versatile microsimulation software
+# By: OpenFisca Team <contact@openfisca.fr>
+#
+# Copyright (C) 2011, 2012, 2013, 2014, 2015 OpenFisca Team
+# https://github.com/openfisca
+#
+# This file is part of OpenFisca.
+#
+# OpenFisca is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# OpenFisca is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""Short-circuit of the formulas whose inputs are all uniform.
+
+When every variable read by a formula has the same value for every entity (typically the default value of the input
+variables, as for most foyers of the tax reductions and credits), the formula is evaluated on a single cell and its
+result is broadcast to every entity. The uniform results are remembered, so that the formulas reading them are
+short-circuited too.
+"""
+
+
+import functools
+import weakref
+
+import numpy as np
+from openfisca_core import formulas
+
+from ..entities import entity_class_by_symbol
+from .sparse_inputs import get_sparse_array, requested_period_sparse_value
+
+
+# Functions using these names work on whole holders or entities and can't be evaluated on a single cell.
+non_uniform_names = frozenset([
+    'any_by_roles',
+    'cast_from_entity_to_role',
+    'cast_from_entity_to_roles',
+    'compute',
+    'compute_add',
+    'compute_add_divide',
+    'compute_divide',
+    'entity',
+    'filter_role',
+    'get_or_new_holder',
+    'holder',
+    'split_by_roles',
+    'sum_by_entity',
+    ])
+# Single-cell values of the variables known to be uniform, by (variable name, period) and by simulation.
+uniform_value_by_key_by_simulation = weakref.WeakKeyDictionary()
+
+
+class NotUniform(Exception):
+    pass
+
+
+class UniformSimulation(object):
+    """Simulation given to a formula evaluated on a single cell: it returns single-cell arrays of uniform variables.
+
+    Reading a variable that is not uniform raises NotUniform.
+    """
+    def __init__(self, simulation):
+        self.period = simulation.period
+        self.simulation = simulation
+
+    def __getattr__(self, name):
+        raise NotUniform(name)
+
+    def calculate(self, column_name, period = None, **kwargs):
+        return self.get_uniform_array(self.simulation.calculate, column_name, period, **kwargs)
+
+    def calculate_add(self, column_name, period = None, **kwargs):
+        return self.get_uniform_array(self.simulation.calculate_add, column_name, period, **kwargs)
+
+    def calculate_add_divide(self, column_name, period = None, **kwargs):
+        return self.get_uniform_array(self.simulation.calculate_add_divide, column_name, period, **kwargs)
+
+    def calculate_divide(self, column_name, period = None, **kwargs):
+        return self.get_uniform_array(self.simulation.calculate_divide, column_name, period, **kwargs)
+
+    def get_array(self, column_name, period = None):
+        array = self.simulation.get_array(column_name, period)
+        if array is None:
+            return None
+        return get_single_cell(array)
+
+    def get_uniform_array(self, calculate, column_name, period, **kwargs):
+        if period is None:
+            period = self.period
+        if calculate == self.simulation.calculate:
+            value = get_uniform_value(self.simulation, column_name, period)
+            if value is not None:
+                return value
+        return get_single_cell(calculate(column_name, period, **kwargs))
+
+    def legislation_at(self, instant, reference = False):
+        return self.simulation.legislation_at(instant, reference = reference)
+
+
+def get_single_cell(array):
+    if array.size > 0 and not (array == array[0]).all():
+        raise NotUniform()
+    # Copy the cell, because a formula may modify its arrays in place.
+    return array[:1].copy()
+
+
+def get_uniform_value(simulation, column_name, period):
+    """Return the single-cell value of a variable known to be uniform without computing it, or None."""
+    uniform_value_by_key = uniform_value_by_key_by_simulation.get(simulation)
+    if uniform_value_by_key is not None:
+        value = uniform_value_by_key.get((column_name, period))
+        if value is not None:
+            return value
+    holder = simulation.get_or_new_holder(column_name)
+    formula = holder.formula
+    if formula is None or getattr(formula, 'function', None) is not None or holder.get_array(period) is not None:
+        return None
+    base_function = getattr(formula.base_function, 'im_func', formula.base_function)
+    if base_function not in (formulas.requested_period_default_value, requested_period_sparse_value):
+        # The value may come from another period.
+        return None
+    sparse_array = get_sparse_array(holder, period)
+    if sparse_array is None:
+        default = holder.column.default
+    elif sparse_array.is_default():
+        default = sparse_array.default
+    else:
+        raise NotUniform(column_name)
+    value = np.empty(1, dtype = holder.column.dtype)
+    value.fill(default)
+    return value
+
+
+def short_circuit_uniform(function):
+    """Decorate a formula function to evaluate it on a single cell when all the variables it reads are uniform."""
+    @functools.wraps(function)
+    def uniform_function(self, simulation, period):
+        if simulation.debug or simulation.trace:
+            return function(self, simulation, period)
+        try:
+            output_period, array = function(self, UniformSimulation(simulation), period)
+        except NotUniform:
+            return function(self, simulation, period)
+        array = np.asarray(array)
+        if array.size != 1:
+            return function(self, simulation, period)
+        holder = self.holder
+        uniform_value_by_key = uniform_value_by_key_by_simulation.get(simulation)
+        if uniform_value_by_key is None:
+            uniform_value_by_key_by_simulation[simulation] = uniform_value_by_key = {}
+        uniform_value_by_key[(holder.column.name, output_period)] = array.reshape(1)
+        result = np.empty(holder.entity.count, dtype = array.dtype)
+        result.fill(array.flat[0])
+        return output_period, result
+
+    return uniform_function
+
+
+def use_uniform_short_circuit(module_name):
+    """Short-circuit the formulas of the given module when all the variables they read are uniform."""
+    for entity_class in entity_class_by_symbol.itervalues():
+        for name, column in entity_class.column_by_name.iter_loaded_items():
+            formula_class = column.formula_class
+            dated_formulas_class = getattr(formula_class, 'dated_formulas_class', None)
+            if dated_formulas_class is not None:
+                formulas_class = [
+                    dated_formula_class['formula_class']
+                    for dated_formula_class in dated_formulas_class
+                    ]
+            else:
+                formulas_class = [formula_class]
+            for formula_class in formulas_class:
+                function = formula_class.__dict__.get('function')
+                if function is None or function.__module__ != module_name or \
+                        not non_uniform_names.isdisjoint(function.__code__.co_names):
+                    continue
+                formula_class.function = short_circuit_uniform(function)
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+
+
+# OpenFisca -- A versatile microsimulation software
+# By: OpenFisca Team <contact@openfisca.fr>
+#
+# Copyright (C) 2011, 2012, 2013, 2014, 2015 OpenFisca Team
+# https://github.com/openfisca
+#
+# This file is part of OpenFisca.
+#
+# OpenFisca is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# OpenFisca is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""Evaluation of a reform against an already computed reference simulation.
+
+The reform simulation starts with the holders of the reference simulation (copy on write: arrays are shared, because
+formulas don't modify them), except those of the formulas changed by the reform, of the formulas reading a legislation
+node changed by the reform and of every formula depending on them. Only these formulas are calculated again.
+"""
+
+
+import collections
+
+from openfisca_core import simulations
+
+from . import dependency_graph
+
+
+def calculate_deltas(reference_simulation, reform, variables_name, period = None):
+    """Calculate variables with the reference simulation, then with the reform, and return their differences.
+
+    Return the reform simulation and the difference (reform minus reference) of each variable.
+    """
+    reference_array_by_name = collections.OrderedDict(
+        (variable_name, reference_simulation.calculate(variable_name, period))
+        for variable_name in variables_name
+        )
+    reform_simulation = new_reform_simulation(reference_simulation, reform)
+    delta_by_name = collections.OrderedDict(
+        (variable_name, reform_simulation.calculate(variable_name, period) - reference_array)
+        for variable_name, reference_array in reference_array_by_name.iteritems()
+        )
+    return reform_simulation, delta_by_name
+
+
+def get_changed_formulas_name(reform, reference):
+    """Return the names of the columns of the reform that are not those of its reference."""
+    reform_column_by_name = reform.column_by_name
+    reference_column_by_name = reference.column_by_name
+    # Columns not loaded yet by the reform are those of the reference.
+    items = reform_column_by_name.iter_loaded_items() if hasattr(reform_column_by_name, 'iter_loaded_items') \
+        else reform_column_by_name.iteritems()
+    return set(
+        name
+        for name, column in items
+        if reference_column_by_name.get(name) is not column
+        )
+
+
+def get_changed_legislation_paths(legislation_json, reference_legislation_json, path = ()):
+    """Return the paths (tuples of names) of the legislation nodes that differ between two legislations."""
+    if legislation_json is reference_legislation_json:
+        return []
+    children = legislation_json.get('children')
+    reference_children = reference_legislation_json.get('children')
+    if children is None or reference_children is None:
+        return [] if legislation_json == reference_legislation_json else [path]
+    changed_paths = []
+    for name in set(children).union(reference_children):
+        child = children.get(name)
+        reference_child = reference_children.get(name)
+        if child is None or reference_child is None:
+            changed_paths.append(path + (name,))
+        else:
+            changed_paths.extend(get_changed_legislation_paths(child, reference_child, path = path + (name,)))
+    return changed_paths
+
+
+def get_invalidated_names(reform, reference):
+    """Return the names of the formulas whose values differ between a reform and its reference."""
+    graph = dependency_graph.get_dependency_graph(reform)
+    changed_names = get_changed_formulas_name(reform, reference).union(graph.get_legislation_readers(
+        get_changed_legislation_paths(reform.legislation_json, reference.legislation_json)))
+    return changed_names.union(graph.get_dependents(changed_names))
+
+
+def new_reform_simulation(reference_simulation, reform, debug = False, debug_all = False, trace = False):
+    """Return a simulation of the reform, reusing the values computed by the reference simulation.
+
+    Values calculated by the reference simulation after this call are not shared.
+    """
+    invalidated_names = get_invalidated_names(reform, reference_simulation.tax_benefit_system)
+    simulation = simulations.Simulation(
+        debug = debug,
+        debug_all = debug_all,
+        period = reference_simulation.period,
+        tax_benefit_system = reform,
+        trace = trace,
+        )
+    for key_plural, reference_entity in reference_simulation.entity_by_key_plural.iteritems():
+        entity = simulation.entity_by_key_plural[key_plural]
+        entity.count = reference_entity.count
+        entity.roles_count = reference_entity.roles_count
+        entity.step_size = reference_entity.step_size
+        for name, holder in reference_entity.holder_by_name.iteritems():
+            if name not in invalidated_names:
+                entity.holder_by_name[name] = holder.clone(entity)
+    return simulation
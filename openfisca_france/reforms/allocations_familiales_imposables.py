@@ -31,7 +31,7 @@ from numpy import maximum as max_
 import logging
 
 from openfisca_core import columns, formulas, reforms
-from openfisca_france import entities
+from openfisca_france import entities, legislation_pool
 from openfisca_france.model.base import QUIFOY
 from openfisca_france.model.impot_revenu import ir
 
@@ -138,4 +138,4 @@ def build_reform(tax_benefit_system):
         new_formulas = (rbg, rfr, allocations_familiales_imposables),
         reference = tax_benefit_system,
         )
-    return Reform()
+    return legislation_pool.use_pool(Reform())
@@ -32,7 +32,7 @@ import logging
 from numpy import maximum as max_
 
 from openfisca_core import columns, formulas, reforms
-from openfisca_france import entities
+from openfisca_france import entities, legislation_pool
 from openfisca_france.model.impot_revenu import ir
 
 
@@ -119,4 +119,4 @@ def build_reform(tax_benefit_system):
         new_formulas = (cesthra, irpp),
         reference = tax_benefit_system,
         )
-    return Reform()
+    return legislation_pool.use_pool(Reform())
@@ -27,12 +27,14 @@ from __future__ import division
 
 import logging
 
+import numpy as np
 # from numpy import logical_not as not_
-from openfisca_core import columns, formulas, reforms
+from openfisca_core import columns, formulas, legislations, reforms, taxscales
 # from openfisca_core.taxscales import MarginalRateTaxScale
 from scipy.optimize import fsolve
 
-from .. import entities
+from .. import entities, legislation_pool
+from ..model.base import CAT
 
 # from ..base import *  # noqa
 # from .cotisations_sociales.remplacement import exo_csg_chom
@@ -51,6 +53,140 @@ def brut_to_target(target_name = None, period = None, simulation = None, **input
     return simulation.calculate(target_name)
 
 
+def collect_thresholds(node, thresholds = None):
+    """Collecte (récursivement) les seuils de tous les barèmes d'un nœud de la législation compacte."""
+    if thresholds is None:
+        thresholds = set()
+    if isinstance(node, taxscales.AbstractRateTaxScale):
+        thresholds.update(node.thresholds)
+    elif isinstance(node, legislations.CompactNode):
+        for child in node.itervalues():
+            collect_thresholds(child, thresholds)
+    return thresholds
+
+
+def build_knots(thresholds, plafond_securite_sociale, target):
+    """Construit, pour chaque individu, les points de rupture (en brut) du barème net/brut.
+
+    Les seuils des barèmes sont exprimés en fraction du plafond de la sécurité sociale. Un dernier point, au-delà du
+    dernier seuil et de la cible, permet d'extrapoler linéairement le dernier segment.
+    """
+    thresholds = np.array(sorted(threshold for threshold in thresholds if threshold > 0))
+    knots = np.column_stack(
+        [np.zeros(len(target))] +
+        [threshold * plafond_securite_sociale for threshold in thresholds]
+        )
+    top_knot = np.maximum(2 * knots[:, -1], 2 * np.abs(target)) + 1
+    return np.column_stack((knots, top_knot))
+
+
+def invert_brut_to_target(input_name = None, knots = None, period = None, simulation = None, target = None,
+        target_name = None, max_secant_iterations = 3, tolerance = 0.01, **other_input_array_by_name):
+    """Inverse de façon vectorielle la fonction brut -> cible (net ou imposable), linéaire par morceaux.
+
+    La cible est évaluée en chacun des points de rupture `knots` (un tableau individus x points, construit à partir
+    des seuils des barèmes) : une simulation vectorielle par point, quelle que soit la taille de la population. Le brut
+    est ensuite obtenu par interpolation linéaire sur le segment qui encadre la cible, puis vérifié. Les individus pour
+    lesquels l'écart reste supérieur à `tolerance` (rupture non prévue par les barèmes, comme une exonération) sont
+    corrigés par la méthode de la sécante, puis, en dernier recours, par fsolve sur ces seuls individus.
+
+    Coût : chaque évaluation clone la simulation et recalcule la cible sur toute la population. Il y a une évaluation
+    par colonne de `knots` (les points de toutes les catégories de salariés partagent les mêmes colonnes, cf.
+    `build_salbrut_knots`), une pour vérifier l'interpolation, au plus `max_secant_iterations` pour la sécante, puis
+    celles de fsolve. Le nombre de simulations dépend donc du nombre de seuils des barèmes, pas de la population.
+    """
+    def evaluate(brut):
+        input_array_by_name = other_input_array_by_name.copy()
+        input_array_by_name[input_name] = brut
+        return brut_to_target(
+            target_name = target_name,
+            period = period,
+            simulation = simulation,
+            **input_array_by_name
+            )
+
+    count, knots_count = knots.shape
+    values = np.column_stack([evaluate(knots[:, index]) for index in range(knots_count)])
+
+    # Segment encadrant la cible (la cible est supposée croissante avec le brut).
+    segment = np.clip((values <= target[:, np.newaxis]).sum(axis = 1) - 1, 0, knots_count - 2)
+    individus = np.arange(count)
+    x_low = knots[individus, segment]
+    x_high = knots[individus, segment + 1]
+    y_low = values[individus, segment]
+    y_high = values[individus, segment + 1]
+    slope = np.where(x_high > x_low, (y_high - y_low) / np.where(x_high > x_low, x_high - x_low, 1), 0)
+    slope = np.where(slope > 0, slope, 1)
+    brut = x_low + (target - y_low) / slope
+
+    residual = evaluate(brut) - target
+    for _ in range(max_secant_iterations):
+        unsolved = np.abs(residual) > tolerance
+        if not unsolved.any():
+            return brut
+        new_brut = np.where(unsolved, brut - residual / slope, brut)
+        new_residual = evaluate(new_brut) - target
+        delta = new_brut - brut
+        slope = np.where(
+            unsolved & (delta != 0) & (new_residual != residual),
+            (new_residual - residual) / np.where(delta != 0, delta, 1),
+            slope,
+            )
+        brut, residual = new_brut, new_residual
+
+    unsolved = np.abs(residual) > tolerance
+    if unsolved.any():
+        log.info(u"Inversion of {} by fsolve for {} individus".format(target_name, unsolved.sum()))
+
+        def function(unsolved_brut):
+            full_brut = brut.copy()
+            full_brut[unsolved] = unsolved_brut
+            return (evaluate(full_brut) - target)[unsolved]
+
+        brut = brut.copy()
+        brut[unsolved] = fsolve(function, brut[unsolved])
+    return brut
+
+
+def build_remplacement_knots(simulation, period, target, revenu_name):
+    law = simulation.legislation_at(period.start)
+    thresholds = collect_thresholds(law.csg[revenu_name])
+    plafond_securite_sociale = simulation.calculate_add('plafond_securite_sociale', period)
+    return build_knots(thresholds, plafond_securite_sociale, target)
+
+
+def build_salbrut_knots(simulation, period, target):
+    """Construit les points de rupture du salaire brut, avec les seuils des barèmes de la catégorie de chaque salarié.
+
+    Les seuils des cotisations salariales dépendent de type_sal : chaque individu a les points de rupture de sa
+    catégorie et de la CSG. Les catégories ayant moins de points que les autres répètent leur dernier seuil, ce qui
+    ajoute des segments vides sans changer l'interpolation.
+    """
+    law = simulation.legislation_at(period.start)
+    csg_thresholds = collect_thresholds(law.csg.activite)
+    plafond_securite_sociale = simulation.calculate_add('plafond_securite_sociale', period)
+    type_sal = simulation.calculate('type_sal', period)
+    knots_by_type_sal = {}
+    for type_sal_index in np.unique(type_sal):
+        selection = type_sal == type_sal_index
+        thresholds = set(csg_thresholds)
+        type_sal_name = CAT._vars.get(type_sal_index)
+        if type_sal_name in law.cotsoc.cotisations_salarie:
+            collect_thresholds(law.cotsoc.cotisations_salarie[type_sal_name], thresholds)
+        knots_by_type_sal[type_sal_index] = (
+            selection,
+            build_knots(thresholds, plafond_securite_sociale[selection], target[selection]),
+            )
+    knots_count = max(type_sal_knots.shape[1] for selection, type_sal_knots in knots_by_type_sal.itervalues())
+    knots = np.empty((len(target), knots_count))
+    for selection, type_sal_knots in knots_by_type_sal.itervalues():
+        padding_count = knots_count - type_sal_knots.shape[1]
+        knots[selection] = np.column_stack(
+            [type_sal_knots[:, :-1]] + [type_sal_knots[:, -2:-1]] * padding_count + [type_sal_knots[:, -1:]]
+            )
+    return knots
+
+
 # Salaires
 
 class salbrut(formulas.SimpleFormulaColumn):
@@ -74,31 +210,33 @@ class salbrut(formulas.SimpleFormulaColumn):
             if salnet is not None:
                 # Calcule le salaire brut à partir du salaire net par inversion numérique.
                 if (salnet == 0).all():
-                    # Quick path to avoid fsolve when using default value of input variables.
+                    # Quick path to avoid inversion when using default value of input variables.
                     return period, salnet
                 simulation = self.holder.entity.simulation
-                function = lambda salbrut: brut_to_target(
-                    target_name = 'salnet',
+                return period, invert_brut_to_target(
+                    input_name = 'salbrut',
+                    knots = build_salbrut_knots(simulation, period, salnet),
                     period = period,
-                    salbrut = salbrut,
                     simulation = simulation,
-                    ) - salnet
-                return period, fsolve(function, salnet)
+                    target = salnet,
+                    target_name = 'salnet',
+                    )
 
             sali = simulation.calculate_add_divide('sali', period)
 
         # Calcule le salaire brut à partir du salaire imposable par inversion numérique.
         if (sali == 0).all():
-            # Quick path to avoid fsolve when using default value of input variables.
+            # Quick path to avoid inversion when using default value of input variables.
             return period, sali
         simulation = self.holder.entity.simulation
-        function = lambda salbrut: brut_to_target(
-            target_name = 'sal',
+        return period, invert_brut_to_target(
+            input_name = 'salbrut',
+            knots = build_salbrut_knots(simulation, period, sali),
             period = period,
-            salbrut = salbrut,
             simulation = simulation,
-            ) - sali
-        return period, fsolve(function, sali)
+            target = sali,
+            target_name = 'sal',
+            )
 
 
 #        # Calcule le salaire brut à partir du salaire imposable.
@@ -193,16 +331,17 @@ class chobrut(formulas.SimpleFormulaColumn):
             if chonet is not None:
                 # Calcule les allocations chomage brutes à partir des allocations nettes par inversion numérique.
                 if (chonet == 0).all():
-                    # Quick path to avoid fsolve when using default value of input variables.
+                    # Quick path to avoid inversion when using default value of input variables.
                     return period, chonet
                 simulation = self.holder.entity.simulation
-                function = lambda chobrut: brut_to_target(
-                    chobrut = chobrut,
-                    target_name = 'chonet',
+                return period, invert_brut_to_target(
+                    input_name = 'chobrut',
+                    knots = build_remplacement_knots(simulation, period, chonet, 'chomage'),
                     period = period,
                     simulation = simulation,
-                    ) - chonet
-                return period, fsolve(function, chonet)
+                    target = chonet,
+                    target_name = 'chonet',
+                    )
 
             choi = simulation.calculate_add_divide('choi', period)
 
@@ -211,17 +350,18 @@ class chobrut(formulas.SimpleFormulaColumn):
         csg_rempl = simulation.calculate('csg_rempl', period)
 
         if (choi == 0).all():
-            # Quick path to avoid fsolve when using default value of input variables.
+            # Quick path to avoid inversion when using default value of input variables.
             return period, choi
         simulation = self.holder.entity.simulation
-        function = lambda chobrut: brut_to_target(
-            chobrut = chobrut,
+        return period, invert_brut_to_target(
             csg_rempl = csg_rempl,
-            target_name = 'cho',
+            input_name = 'chobrut',
+            knots = build_remplacement_knots(simulation, period, choi, 'chomage'),
             period = period,
             simulation = simulation,
-            ) - choi
-        return period, fsolve(function, choi)
+            target = choi,
+            target_name = 'cho',
+            )
 
 
 # Pensions
@@ -244,16 +384,17 @@ class rstbrut(formulas.SimpleFormulaColumn):
             if rstnet is not None:
                 # Calcule les pensions de retraite brutes à partir des pensions nettes par inversion numérique.
                 if (rstnet == 0).all():
-                    # Quick path to avoid fsolve when using default value of input variables.
+                    # Quick path to avoid inversion when using default value of input variables.
                     return period, rstnet
                 simulation = self.holder.entity.simulation
-                function = lambda rstbrut: brut_to_target(
-                    target_name = 'rstnet',
+                return period, invert_brut_to_target(
+                    input_name = 'rstbrut',
+                    knots = build_remplacement_knots(simulation, period, rstnet, 'retraite'),
                     period = period,
-                    rstbrut = rstbrut,
                     simulation = simulation,
-                    ) - rstnet
-                return period, fsolve(function, rstnet)
+                    target = rstnet,
+                    target_name = 'rstnet',
+                    )
 
             rsti = simulation.calculate_add_divide('rsti', period)
 
@@ -278,4 +419,4 @@ def build_reform(tax_benefit_system):
         new_formulas = (chobrut, rstbrut, salbrut),
         reference = tax_benefit_system,
         )
-    return Reform()
+    return legislation_pool.use_pool(Reform())
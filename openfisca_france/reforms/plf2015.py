@@ -32,6 +32,7 @@ import copy
 import logging
 
 from openfisca_core import formulas, periods, reforms
+from .. import legislation_pool
 from ..model.impot_revenu import ir
 
 
@@ -109,4 +110,4 @@ def build_reform(tax_benefit_system):
         new_formulas = (decote, ),
         reference = tax_benefit_system,
         )
-    return Reform()
+    return legislation_pool.use_pool(Reform())
@@ -33,7 +33,7 @@ import logging
 from numpy import maximum as max_, minimum as min_
 from openfisca_core import columns, formulas, reforms
 
-from .. import entities
+from .. import entities, legislation_pool
 from ..model import base
 from ..model.impot_revenu import reductions_impot
 
@@ -326,4 +326,4 @@ def build_reform(tax_benefit_system):
         new_formulas = (reduction_impot_exceptionnelle, reductions),
         reference = tax_benefit_system,
         )
-    return Reform()
+    return legislation_pool.use_pool(Reform())
@@ -33,7 +33,7 @@ from numpy import logical_not as not_, minimum as min_
 import logging
 
 from openfisca_core import columns, formulas, reforms
-from .. import entities
+from .. import entities, legislation_pool
 from ..model import base
 from ..model.impot_revenu import charges_deductibles
 
@@ -116,4 +116,4 @@ def build_reform(tax_benefit_system):
         new_formulas = (charges_deduc, charge_loyer),
         reference = tax_benefit_system,
         )
-    return Reform()
+    return legislation_pool.use_pool(Reform())
@@ -0,0 +1,320 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+# OpenFisca -- A versatile microsimulation software
+# By: OpenFisca Team <contact@openfisca.fr>
+#
+# Copyright (C) 2011, 2012, 2013, 2014, 2015 OpenFisca Team
+# https://github.com/openfisca
+#
+# This file is part of OpenFisca.
+#
+# OpenFisca is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# OpenFisca is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""Benchmark the computation of the main variables of OpenFisca-France on synthetic populations.
+
+Each workload computes a group of variables (income tax, payroll, RSA, housing benefits, family benefits, disposable
+income) on reproducible synthetic populations of various sizes. Every run is executed in a separate process, to
+measure its own peak memory, and the time spent in the formula of every computed variable is recorded, to find
+which formula a slow down comes from. Results are written as JSON and may be compared to a baseline generated by a
+previous run (by default the reference report benchmark_baseline.json next to this script), to detect performance
+regressions.
+"""
+
+
+import argparse
+import collections
+import datetime
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+import numpy as np
+from openfisca_core import holders, periods
+
+from openfisca_france import init_country, surveys
+
+
+app_name = os.path.splitext(os.path.basename(__file__))[0]
+log = logging.getLogger(app_name)
+
+# Synthetic populations are reproducible: they only depend on their size and on this seed.
+seed = 20150101
+year = 2014
+# Variables computed by each workload, with their periods.
+workloads = collections.OrderedDict([
+    ('impot_revenu', [
+        ('irpp', str(year)),
+        ]),
+    ('fiche_de_paie', [
+        ('salsuperbrut', str(year)),
+        ('salaire_net_a_payer', str(year)),
+        ('allegement_fillon', str(year)),
+        ]),
+    ('rsa', [
+        ('rsa', '{}-01'.format(year)),
+        ]),
+    ('apl', [
+        ('apl', '{}-01'.format(year)),
+        ]),
+    ('prestations_familiales', [
+        ('af', '{}-01'.format(year)),
+        ('cf', '{}-01'.format(year)),
+        ('paje_base', '{}-01'.format(year)),
+        ('ars', str(year)),
+        ]),
+    ('revdisp', [
+        ('revdisp', str(year)),
+        ]),
+    ])
+default_sizes = [1, 100, 10000, 1000000]
+default_baseline_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+# Variables computed faster than this (in seconds) in the baseline are too noisy to be compared.
+min_variable_time = 0.05
+
+
+def build_synthetic_population(size):
+    """Return the input arrays of a reproducible population of size persons, grouped in households of 1 to 5 persons.
+
+    Each household is a single family and a single foyer fiscal: one or two adults and their children.
+    """
+    random_state = np.random.RandomState(seed)
+    household_size = random_state.choice([1, 2, 3, 4, 5], size = size, p = [0.35, 0.3, 0.15, 0.15, 0.05])
+    # Build households until every person has one, then truncate the last household.
+    household_index = np.repeat(np.arange(size), household_size)[:size]
+    first_member = np.concatenate(([True], household_index[1:] != household_index[:-1]))
+    household_start = np.flatnonzero(first_member)
+    rank_in_household = np.arange(size) - household_start[np.cumsum(first_member) - 1]
+    # Households of 2, 4 and 5 persons have a couple, households of 3 persons a single parent.
+    has_spouse = (household_size[household_index] != 1) & (household_size[household_index] != 3)
+    is_spouse = has_spouse & (rank_in_household == 1)
+    is_adult = (rank_in_household == 0) | is_spouse
+    # Roles: 0 for the first adult, 1 for the spouse, 2, 3… for the children.
+    role = np.where(is_adult, rank_in_household, rank_in_household + 1 - has_spouse)
+
+    entity_index = np.cumsum(first_member) - 1
+    age = np.where(is_adult, random_state.randint(20, 80, size = size), random_state.randint(0, 20, size = size))
+    birth = np.array(['{}-01-01'.format(year)], dtype = 'datetime64[D]') - (age * 365.25).astype('timedelta64[D]')
+    employed = is_adult & (age < 62) & (random_state.uniform(size = size) < 0.7)
+    sali = np.where(employed, np.round(random_state.lognormal(mean = 10, sigma = 0.6, size = size)), 0)
+    return dict(
+        activite = np.where(employed, 0, np.where(is_adult, np.where(age >= 62, 3, 1), 2)),
+        birth = birth,
+        idfam = entity_index,
+        idfoy = entity_index,
+        idmen = entity_index,
+        loyer = np.round(random_state.uniform(300, 1200, size = size)),
+        quifam = role,
+        quifoy = role,
+        quimen = role,
+        sali = sali,
+        so = np.where(random_state.uniform(size = size) < 0.4, 4, 2),
+        )
+
+
+def record_time_by_variable(time_by_variable):
+    """Wrap Holder.compute to add to time_by_variable the time spent computing each variable.
+
+    The time of a variable excludes the time spent computing the other variables it depends on, so that a slow down
+    is reported for the formula it comes from. Return the original method, to restore it.
+    """
+    original_compute = holders.Holder.compute
+    # Time spent in the variables computed by each pending call of compute, innermost last.
+    children_time_stack = []
+
+    def compute(self, *args, **kwargs):
+        children_time_stack.append(0)
+        start_time = time.time()
+        try:
+            return original_compute(self, *args, **kwargs)
+        finally:
+            elapsed_time = time.time() - start_time
+            children_time = children_time_stack.pop()
+            if children_time_stack:
+                children_time_stack[-1] += elapsed_time
+            name = self.column.name
+            time_by_variable[name] = time_by_variable.get(name, 0) + elapsed_time - children_time
+
+    holders.Holder.compute = compute
+    return original_compute
+
+
+def run_workload(tax_benefit_system, workload_name, size):
+    """Compute the variables of a workload on a synthetic population and return its measures."""
+    start_time = time.time()
+    simulation = surveys.new_simulation_from_arrays(
+        array_by_name = build_synthetic_population(size),
+        period = periods.period(year),
+        tax_benefit_system = tax_benefit_system,
+        )
+    population_time = time.time() - start_time
+    time_by_variable = {}
+    original_compute = record_time_by_variable(time_by_variable)
+    try:
+        for variable_name, period in workloads[workload_name]:
+            simulation.calculate(variable_name, periods.period(period))
+    finally:
+        holders.Holder.compute = original_compute
+    return collections.OrderedDict([
+        ('workload', workload_name),
+        ('size', size),
+        ('wall_time', time.time() - start_time),
+        ('population_time', population_time),
+        # ru_maxrss is in kilobytes on Linux.
+        ('peak_rss', resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024),
+        # Slowest variables first.
+        ('time_by_variable', collections.OrderedDict(
+            sorted(time_by_variable.iteritems(), key = lambda item: (-item[1], item[0])),
+            )),
+        ])
+
+
+def run_workload_in_process(tax_benefit_system, workload_name, size):
+    """Run a workload in a forked process, so that its peak memory doesn't include the previous runs."""
+    parent_connection, child_connection = multiprocessing.Pipe(duplex = False)
+
+    def target():
+        try:
+            child_connection.send(run_workload(tax_benefit_system, workload_name, size))
+        except Exception as exception:
+            child_connection.send(dict(error = repr(exception), size = size, workload = workload_name))
+            raise
+        finally:
+            child_connection.close()
+
+    process = multiprocessing.Process(target = target)
+    process.start()
+    # Close the end of the child in the parent, so that recv fails instead of blocking when the child dies.
+    child_connection.close()
+    try:
+        result = parent_connection.recv()
+    except EOFError:
+        process.join()
+        result = dict(
+            error = u'Process exited with code {} without result'.format(process.exitcode),
+            exitcode = process.exitcode,
+            size = size,
+            workload = workload_name,
+            )
+    else:
+        process.join()
+    finally:
+        parent_connection.close()
+    return result
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """Return the runs slower than the ones of the baseline by more than tolerance (a ratio)."""
+    baseline_by_key = dict(
+        ((result['workload'], result['size']), result)
+        for result in baseline['results']
+        if 'error' not in result
+        )
+    regressions = []
+    for result in results:
+        baseline_result = baseline_by_key.get((result['workload'], result['size']))
+        if baseline_result is None or 'error' in result:
+            continue
+        for key in ('wall_time', 'peak_rss'):
+            if result[key] > baseline_result[key] * (1 + tolerance):
+                regressions.append(dict(
+                    baseline = baseline_result[key],
+                    measure = key,
+                    size = result['size'],
+                    value = result[key],
+                    workload = result['workload'],
+                    ))
+        time_by_variable = result.get('time_by_variable', {})
+        for variable_name, baseline_time in baseline_result.get('time_by_variable', {}).iteritems():
+            variable_time = time_by_variable.get(variable_name)
+            if baseline_time < min_variable_time or variable_time is None:
+                continue
+            if variable_time > baseline_time * (1 + tolerance):
+                regressions.append(dict(
+                    baseline = baseline_time,
+                    measure = u'time of {}'.format(variable_name),
+                    size = result['size'],
+                    value = variable_time,
+                    workload = result['workload'],
+                    ))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__)
+    parser.add_argument('-b', '--baseline', default = default_baseline_path,
+        help = "JSON results of a previous run to compare to (default: %(default)s)")
+    parser.add_argument('--no-baseline', action = 'store_true', default = False,
+        help = "don't compare the results to a baseline, for example to generate a new one")
+    parser.add_argument('-o', '--output', help = "path of the JSON file of results (default: standard output)")
+    parser.add_argument('-s', '--sizes', default = ','.join(str(size) for size in default_sizes),
+        help = "comma separated sizes of the synthetic populations (default: %(default)s)")
+    parser.add_argument('-t', '--tolerance', default = 0.2, type = float,
+        help = "relative slow down considered as a regression (default: %(default)s)")
+    parser.add_argument('-v', '--verbose', action = 'store_true', default = False, help = "increase output verbosity")
+    parser.add_argument('-w', '--workloads', default = ','.join(workloads),
+        help = "comma separated names of the workloads (default: %(default)s)")
+    args = parser.parse_args()
+    logging.basicConfig(level = logging.DEBUG if args.verbose else logging.WARNING, stream = sys.stderr)
+
+    workloads_name = args.workloads.split(',')
+    for workload_name in workloads_name:
+        assert workload_name in workloads, u'Unknown workload: {}'.format(workload_name)
+    sizes = [int(size) for size in args.sizes.split(',')]
+
+    # The tax-benefit system is built once, before forking the runs.
+    TaxBenefitSystem = init_country()
+    tax_benefit_system = TaxBenefitSystem()
+
+    results = []
+    for workload_name in workloads_name:
+        for size in sizes:
+            result = run_workload_in_process(tax_benefit_system, workload_name, size)
+            log.info(u'{} ({} persons): {}'.format(workload_name, size, result.get('wall_time', result.get('error'))))
+            results.append(result)
+
+    report = collections.OrderedDict([
+        ('date', datetime.datetime.utcnow().isoformat()),
+        ('results', results),
+        ])
+    exit_code = 0
+    if not args.no_baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        report['regressions'] = regressions = compare_to_baseline(results, baseline, args.tolerance)
+        for regression in regressions:
+            log.warning(u'Regression of {measure} for {workload} ({size} persons): {value} instead of {baseline}'
+                .format(**regression))
+        if regressions:
+            exit_code = 1
+    if any('error' in result for result in results):
+        exit_code = 1
+
+    if args.output is None:
+        json.dump(report, sys.stdout, indent = 2)
+        sys.stdout.write('\n')
+    else:
+        with open(args.output, 'w') as output_file:
+            json.dump(report, output_file, indent = 2)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+
+# OpenFisca -- A versatile microsimulation software
+# By: OpenFisca Team <contact@openfisca.fr>
+#
+# Copyright (C) 2011, 2012, 2013, 2014, 2015 OpenFisca Team
+# https://github.com/openfisca
+#
+# This file is part of OpenFisca.
+#
+# OpenFisca is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# OpenFisca is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""Generate the manifest of the columns registered by each formula module.
+
+The manifest is used by `init_country` to declare the columns without importing their formula modules. Run this
+script after adding, renaming or removing an input variable or a formula.
+"""
+
+
+import argparse
+import importlib
+import json
+import logging
+import os
+import sys
+
+from openfisca_france import entities, formulas_registry
+
+
+app_name = os.path.splitext(os.path.basename(__file__))[0]
+log = logging.getLogger(app_name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__)
+    parser.add_argument('-v', '--verbose', action = 'store_true', default = False, help = "increase output verbosity")
+    args = parser.parse_args()
+    logging.basicConfig(level = logging.DEBUG if args.verbose else logging.WARNING, stream = sys.stdout)
+
+    manifest = []
+    for module_name in formulas_registry.formulas_modules_name:
+        # Columns are credited to the module being imported, so it must not import other formula modules not imported
+        # yet.
+        assert module_name not in sys.modules, \
+            u'Formula module {} is imported before its turn: move it up in formulas_modules_name'.format(module_name)
+        names_by_entity_symbol = dict(
+            (entity_symbol, set(entity_class.column_by_name))
+            for entity_symbol, entity_class in entities.entity_class_by_symbol.iteritems()
+            )
+        importlib.import_module(module_name)
+        for entity_symbol in ('ind', 'fam', 'foy', 'men'):
+            for name in entities.entity_class_by_symbol[entity_symbol].column_by_name:
+                if name not in names_by_entity_symbol[entity_symbol]:
+                    manifest.append([entity_symbol, name, module_name])
+        log.info(u'Module {} registers {} columns'.format(module_name,
+            sum(1 for entry in manifest if entry[2] == module_name)))
+
+    with open(formulas_registry.manifest_file_path, 'w') as manifest_file:
+        manifest_file.write('[\n')
+        manifest_file.write(',\n'.join(json.dumps(entry) for entry in manifest))
+        manifest_file.write('\n]\n')
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
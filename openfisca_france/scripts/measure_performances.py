@@ -33,70 +33,15 @@ import sys
 import time
 
 import numpy as np
-from openfisca_core import periods, simulations
+from openfisca_core import periods
 from openfisca_core.tools import assert_near
-from openfisca_france import init_country
+from openfisca_france import init_country, surveys
 
 
 args = None
 log = logging.getLogger(__name__)
 
 
-def add_member(entity, **variables_value_by_name):
-    entity.count += 1
-    entity.step_size += 1
-    member_index = entity.count - 1
-    simulation = entity.simulation
-
-    # Add a cell to all arrays of all variables of entity.
-    for variable_name, variable_holder in entity.holder_by_name.iteritems():
-        column = variable_holder.column
-        if column.is_permanent:
-            variable_holder._array = np.hstack((variable_holder._array, [column.default]))
-        else:
-            array_by_period = variable_holder._array_by_period
-            if array_by_period is None:
-                variable_holder._array_by_period = array_by_period = {}
-            for period, array in array_by_period.iteritems():
-                array_by_period[period] = np.hstack((array, [column.default]))
-
-    # When entity is a person, ensure that the index & role of the person in the other entities are set.
-    value_by_name = variables_value_by_name.copy()
-    if entity.is_persons_entity:
-        for other_entity in simulation.entity_by_key_singular.itervalues():
-            if not other_entity.is_persons_entity:
-                assert other_entity.count > 0
-                value_by_name.setdefault(other_entity.index_for_person_variable_name, other_entity.count - 1)
-                role = value_by_name.get(other_entity.role_for_person_variable_name)
-                assert role is not None, "Missing role {} in person arguments: {}".format(
-                    other_entity.role_for_person_variable_name, value_by_name)
-                if role >= other_entity.roles_count:
-                    other_entity.roles_count = role + 1
-
-    # Set arguments in variables.
-    for variable_name, value in value_by_name.iteritems():
-        variable_holder = entity.get_or_new_holder(variable_name)
-        column = variable_holder.column
-        if isinstance(value, dict):
-            for period, period_value in value.iteritems():
-                array = variable_holder.get_array(period)
-                if array is None:
-                    array = np.empty(entity.count, dtype = column.dtype)
-                    array.fill(column.default)
-                    variable_holder.set_array(period, array)
-                array[member_index] = period_value
-        else:
-            period = simulation.period
-            array = variable_holder.get_array(period)
-            if array is None:
-                array = np.empty(entity.count, dtype = column.dtype)
-                array.fill(column.default)
-                variable_holder.set_array(period, array)
-            array[member_index] = value
-
-    return member_index
-
-
 def timeit(method):
     def timed(*args, **kwargs):
         start_time = time.time()
@@ -114,24 +59,19 @@ tax_benefit_system = TaxBenefitSystem()
 
 @timeit
 def test_irpp(year, irpp, **variables_value_by_name):
-    simulation = simulations.Simulation(period = periods.period(year), tax_benefit_system = tax_benefit_system,
-        debug = args.verbose)
-    famille = simulation.entity_by_key_singular['famille']
-    foyer_fiscal = simulation.entity_by_key_singular['foyer_fiscal']
-    individu = simulation.entity_by_key_singular['individu']
-    menage = simulation.entity_by_key_singular['menage']
-
-    # Dispatch arguments to their respective entities.
-    variables_value_by_name_by_entity = {}
-    for variable_name, value in variables_value_by_name.iteritems():
-        variable_holder = simulation.get_or_new_holder(variable_name)
-        entity_variables_value_by_name = variables_value_by_name_by_entity.setdefault(variable_holder.entity, {})
-        entity_variables_value_by_name[variable_name] = value
-
-    add_member(famille, **variables_value_by_name_by_entity.get(famille, {}))
-    add_member(foyer_fiscal, **variables_value_by_name_by_entity.get(foyer_fiscal, {}))
-    add_member(menage, **variables_value_by_name_by_entity.get(menage, {}))
-    add_member(individu, quifam = 1, quifoy = 1, quimen = 1, **variables_value_by_name_by_entity.get(individu, {}))
+    array_by_name = dict(
+        (variable_name, np.array([value]))
+        for variable_name, value in variables_value_by_name.iteritems()
+        )
+    for entity_symbol in ('fam', 'foy', 'men'):
+        array_by_name['id' + entity_symbol] = np.zeros(1, dtype = int)
+        array_by_name['qui' + entity_symbol] = np.zeros(1, dtype = int)
+    simulation = surveys.new_simulation_from_arrays(
+        array_by_name = array_by_name,
+        debug = args.verbose,
+        period = periods.period(year),
+        tax_benefit_system = tax_benefit_system,
+        )
     assert_near(simulation.calculate('irpp'), irpp, error_margin = 0.51)
 
 
@@ -41,6 +41,7 @@ import copy
 import logging
 import numpy as np
 import os
+import sys
 
 import openfisca_france
 
@@ -51,48 +52,151 @@ TaxBenefitSystem = openfisca_france.init_country()
 tax_benefit_system = TaxBenefitSystem()
 
 
-def split(scenario):
-# On fait l'hypothèse que le scénario ne contient qu'un seul foyer fiscal
-    tax_benefit_system = scenario.tax_benefit_system
+def split_batched(scenario, pruning = False, variable_name = 'irpp'):
+    """Compute the taxes of every attachment of the young adults in a single simulation and return the optimum.
+
+    Every partition of the family in foyers fiscaux is laid out as a separate copy of the family inside the same
+    simulation. When pruning is True, the optimum is searched greedily (detaching or attaching one young adult at a
+    time from the best partition found so far), which requires far fewer partitions when many young adults can be
+    attached.
+
+    variable_name is a variable of the foyers fiscaux, like 'irpp' (to maximize: it is negative), or of the menages,
+    like 'revdisp'.
+    """
+    test_case = scenario.test_case
+    rattachements_possibles, detachements_impossibles = find_rattachements_possibles(scenario)
+    if pruning:
+        best_rattaches = list(rattachements_possibles)
+        best_value = evaluate_foyers_possibles(scenario, [best_rattaches], rattachements_possibles,
+            detachements_impossibles, variable_name)[0]
+        while True:
+            foyers_possibles = [
+                [jeune for jeune in best_rattaches if jeune != toggled_jeune] if toggled_jeune in best_rattaches
+                else best_rattaches + [toggled_jeune]
+                for toggled_jeune in rattachements_possibles
+                ]
+            if not foyers_possibles:
+                break
+            values = evaluate_foyers_possibles(scenario, foyers_possibles, rattachements_possibles,
+                detachements_impossibles, variable_name)
+            best_index = values.argmax()
+            if values[best_index] <= best_value:
+                break
+            best_rattaches = foyers_possibles[best_index]
+            best_value = values[best_index]
+    else:
+        foyers_possibles = partiesDe(list(rattachements_possibles))
+        values = evaluate_foyers_possibles(scenario, foyers_possibles, rattachements_possibles,
+            detachements_impossibles, variable_name)
+        best_index = values.argmax()
+        best_rattaches = foyers_possibles[best_index]
+        best_value = values[best_index]
+    log.info(u'Best attachment of {} in the foyer fiscal of {}: {} = {}'.format(best_rattaches,
+        test_case['foyers_fiscaux'][0]['declarants'], variable_name, best_value))
+    return best_rattaches, best_value
+
+
+def build_batched_test_case(test_case, foyers_possibles, rattachements_possibles, detachements_impossibles):
+    """Return a test case containing a copy of the family for each possible attachment of the young adults.
+
+    Also return, for each foyer fiscal of the new test case, the index of the attachment it belongs to.
+    """
+    familles = []
+    foyers_fiscaux = []
+    foyers_possibles_index = []
+    individus = []
+    individus_id = set(individu['id'] for individu in test_case['individus'])
+    menages = []
+    for index, rattaches in enumerate(foyers_possibles):
+        def suffix_id(id):
+            return u'{}-{}'.format(id, index)
+
+        def suffix_ids(entity):
+            return dict(
+                (key, [suffix_id(id) for id in value] if isinstance(value, list)
+                    else suffix_id(value) if key != 'id' and isinstance(value, basestring) and value in individus_id
+                    else value)
+                for key, value in entity.iteritems()
+                )
+
+        for individu in test_case['individus']:
+            individu = individu.copy()
+            individu['id'] = suffix_id(individu['id'])
+            individus.append(individu)
+        for famille in test_case['familles']:
+            famille = suffix_ids(famille)
+            famille['id'] = suffix_id(famille['id'])
+            familles.append(famille)
+        for menage in test_case['menages']:
+            menage = suffix_ids(menage)
+            menage['id'] = suffix_id(menage['id'])
+            menages.append(menage)
+        for foyer_index, foyer_fiscal in enumerate(test_case['foyers_fiscaux']):
+            foyer_fiscal = suffix_ids(foyer_fiscal)
+            foyer_fiscal['id'] = suffix_id(foyer_fiscal['id'])
+            if foyer_index == 0:
+                foyer_fiscal['personnes_a_charge'] = [
+                    suffix_id(id)
+                    for id in rattaches + detachements_impossibles
+                    ]
+            foyers_fiscaux.append(foyer_fiscal)
+            foyers_possibles_index.append(index)
+        for jeune in rattachements_possibles:
+            if jeune not in rattaches:
+                foyers_fiscaux.append(dict(
+                    declarants = [suffix_id(jeune)],
+                    id = suffix_id(u'foyer-{}'.format(jeune)),
+                    personnes_a_charge = [],
+                    ))
+                foyers_possibles_index.append(index)
+    return dict(
+        familles = familles,
+        foyers_fiscaux = foyers_fiscaux,
+        individus = individus,
+        menages = menages,
+        ), np.array(foyers_possibles_index)
+
+
+def evaluate_foyers_possibles(scenario, foyers_possibles, rattachements_possibles, detachements_impossibles,
+        variable_name = 'irpp'):
+    """Return the total of variable_name for each possible attachment, computed in a single simulation.
+
+    variable_name must be a variable of the foyers fiscaux or of the menages.
+    """
+    entity_key_plural = scenario.tax_benefit_system.column_by_name[variable_name].entity_key_plural
+    assert entity_key_plural in ('foyers_fiscaux', 'menages'), \
+        u'Variable {} is neither a foyer fiscal nor a menage variable'.format(variable_name)
+    batched_scenario = scenario.__class__()
+    batched_scenario.__dict__ = copy.copy(scenario.__dict__)
+    batched_scenario.test_case, foyers_possibles_index = build_batched_test_case(scenario.test_case,
+        foyers_possibles, rattachements_possibles, detachements_impossibles)
+    batched_scenario.suggest()
+    simulation = batched_scenario.new_simulation()
+    values = simulation.calculate(variable_name)
+    if entity_key_plural == 'foyers_fiscaux':
+        return np.bincount(foyers_possibles_index, weights = values, minlength = len(foyers_possibles))
+    # Each copy of the family has as many menages as the original test case.
+    return values.reshape(len(foyers_possibles), -1).sum(axis = 1)
+
+
+def find_rattachements_possibles(scenario):
+    """Return the young adults that may be attached to the foyer fiscal and the dependents that must stay in it."""
     test_case = scenario.test_case
-    foyer_fiscal = test_case['foyers_fiscaux'][0]
-    individus = test_case['individus']
+    individu_by_id = dict(
+        (individu['id'], individu)
+        for individu in test_case['individus']
+        )
     year = scenario.year
-    rattachements_possibles = [] # Contient en réalité les détachements possibles puisqu'au départ tous les membres sous rattachés au même foyer
+    rattachements_possibles = []
     detachements_impossibles = []
-    scenarios = []
-    impots = []
-
-    for pac_index, pac_id in enumerate(foyer_fiscal.pop('personnes_a_charge')):
-        pac = individus[pac_id].copy()
-        age = year - pac.pop('birth').year - 1
-        if 18 <= age < (21 + 4 * (pac['activite'] == 2)): # Exprime la condition de rattachement au foyer pour les majeurs
+    for pac_id in test_case['foyers_fiscaux'][0].get('personnes_a_charge', []):
+        pac = individu_by_id[pac_id]
+        age = year - pac['birth'].year - 1
+        if 18 <= age < (21 + 4 * (pac['activite'] == 2)):  # Condition de rattachement au foyer pour les majeurs
             rattachements_possibles.append(pac_id)
         else:
             detachements_impossibles.append(pac_id)
-
-    foyers_possibles = partiesDe(list(rattachements_possibles))
-    n = len(foyers_possibles)
-    j = 1
-    min_ = [-1, 0]
-    for i in range(0, n):
-        scenarios.append(scenario.__class__())
-        scenarios[i].__dict__ = copy.copy(scenario.__dict__)
-        scenarios[i].test_case = copy.deepcopy(scenario.test_case)
-        scenarios[i].test_case['foyers_fiscaux'][0]['personnes_a_charge'] = foyers_possibles[i]+detachements_impossibles
-        for jeune in rattachements_possibles:
-            if jeune not in foyers_possibles[i]:
-                scenarios[i].test_case['foyers_fiscaux'][j] = { 'declarants': [jeune], 'personnes_a_charge': [] }
-                j += 1
-        scenarios[i].suggest()
-        simulation  = scenarios[i].new_simulation()
-        irpp = - round(np.sum(simulation.calculate('irpp')))
-        if irpp < min_[1] or min_[0] == -1:
-            min_ = [i, irpp]
-        impots.append(irpp)
-
-    print "Le plus avantageux pour votre famille est que les jeunes rattachés à votre foyer fiscal soient : {}. Vous paierez alors {}€ d'impôts. (Seuls les jeunes éligibles au rattachement sont indiqués (18 <= age < 21 si pas étudiant / 25 sinon. Le calculateur a émis l'hypothèse qu'il n'y avait qu'un seul foyer fiscal au départ, auquel tous les jeunes éligibles étaient rattachés.)".format(foyers_possibles[min_[0]],min_[1])
-    return impots
+    return rattachements_possibles, detachements_impossibles
 
 
 def partiesDe(tab): # Calcule l'ensemble des parties des éléments d'un array, sous forme d'un array d'arrays
@@ -145,7 +249,8 @@ def define_scenario(year):
 
 
 def main():
-    split(define_scenario(2014))
+    logging.basicConfig(level = logging.INFO, stream = sys.stdout)
+    split_batched(define_scenario(2014))
     return 0
 
 
@@ -24,18 +24,28 @@
 
 
 # import copy
+import ctypes
+import json
 import logging
+import multiprocessing
+import multiprocessing.sharedctypes
+import os
 
 import numpy as np
 from openfisca_core import periods, simulations
 
+from .model.sparse_inputs import set_input_array
+
 
 log = logging.getLogger(__name__)
+# State of the parallel calculation in progress, inherited by the forked processes of its pool
+parallel_calculation = None
 
 
 class SurveyScenario(object):
     inflators = None
     input_data_frame = None
+    input_path = None
     legislation_json = None
     simulation = None
     tax_benefit_system = None
@@ -46,6 +56,19 @@ class SurveyScenario(object):
     def init_from_data_frame(self, input_data_frame = None, tax_benefit_system = None, year = None):
         assert input_data_frame is not None
         self.input_data_frame = input_data_frame
+        return self.init_tax_benefit_system(tax_benefit_system = tax_benefit_system, year = year)
+
+    def init_from_path(self, input_path = None, tax_benefit_system = None, year = None):
+        """Use the columns of a directory of .npy files, or of a .npz, HDF5 or Parquet file, as survey input.
+
+        The files are read when the simulation is created. Only the input variables of the tax-benefit system are
+        read, and .npy files and uncompressed HDF5 datasets are memory-mapped instead of being copied.
+        """
+        assert input_path is not None
+        self.input_path = input_path
+        return self.init_tax_benefit_system(tax_benefit_system = tax_benefit_system, year = year)
+
+    def init_tax_benefit_system(self, tax_benefit_system = None, year = None):
         assert tax_benefit_system is not None
         self.tax_benefit_system = tax_benefit_system
         survey_tax_benefit_system = adapt_to_survey(tax_benefit_system)
@@ -59,6 +82,18 @@ class SurveyScenario(object):
         return self
 
     def new_simulation(self, debug = False, debug_all = False, trace = False):
+        column_by_name = self.tax_benefit_system.column_by_name
+        if self.input_path is not None:
+            self.simulation = simulation = new_simulation_from_arrays(
+                array_by_name = load_input_arrays(self.input_path, column_by_name),
+                debug = debug,
+                debug_all = debug_all,
+                period = periods.period(self.year),
+                tax_benefit_system = self.tax_benefit_system,
+                trace = trace,
+                )
+            return simulation
+
         input_data_frame = self.input_data_frame
         # TODO: Pass year to this method, not init_from_data_frame
         simulation = simulations.Simulation(
@@ -76,44 +111,139 @@ class SurveyScenario(object):
         for id_variable in id_variables + role_variables:
             assert id_variable in self.input_data_frame.columns
 
-        column_by_name = self.tax_benefit_system.column_by_name
-        for column_name in input_data_frame:
-            if column_name not in column_by_name:
-                log.info('Unknown column "{}" in survey, dropped from input table'.format(column_name))
-                # waiting for the new pandas version to hit Travis repo
-                input_data_frame = input_data_frame.drop(column_name, axis = 1)
-                # , inplace = True)  # TODO: effet de bords ?
-        for column_name in input_data_frame:
-            if column_by_name[column_name].formula_class is not None:
-                log.info('Column "{}" in survey set to be calculated, dropped from input table'.format(column_name))
-                input_data_frame = input_data_frame.drop(column_name, axis = 1)
-                # , inplace = True)  # TODO: effet de bords ?
+        # Select the input columns at once, instead of dropping the other ones (which copies the data frame).
+        columns_name = select_input_columns(input_data_frame.columns, column_by_name)
 
+        heads_mask_by_entity = {}
         for entity in simulation.entity_by_key_singular.values():
             if entity.is_persons_entity:
                 entity.count = entity.step_size = len(input_data_frame)
             else:
-                entity.count = entity.step_size = (input_data_frame["qui{}".format(entity.symbol)] == 0).sum()
-                entity.roles_count = input_data_frame["qui{}".format(entity.symbol)].max() + 1
-#       TODO: Create a validation/conversion step
-#       TODO: introduce an assert when loading in place of astype
-        for column_name, column_series in input_data_frame.iteritems():
+                roles = input_data_frame["qui{}".format(entity.symbol)].values
+                heads_mask_by_entity[entity] = heads_mask = roles == 0
+                entity.count = entity.step_size = heads_mask.sum()
+                entity.roles_count = roles.max() + 1
+        for column_name in columns_name:
             holder = simulation.get_or_new_holder(column_name)
             entity = holder.entity
-            if entity.is_persons_entity:
-                array = column_series.values.astype(holder.column.dtype)
-            else:
-                array = column_series.values[input_data_frame['qui' + entity.symbol].values == 0].astype(
-                    holder.column.dtype)
+            array = input_data_frame[column_name].values
+            if not entity.is_persons_entity:
+                array = array[heads_mask_by_entity[entity]]
             assert array.size == entity.count, 'Bad size for {}: {} instead of {}'.format(
                 column_name,
                 array.size,
                 entity.count)
-            holder.array = np.array(array, dtype = holder.column.dtype)
+            set_input_array(holder, cast_input_array(column_name, array, holder.column))
 
         self.simulation = simulation
         return simulation
 
+    def get_input_array_by_name(self):
+        """Return the arrays of the input variables of the survey, with one value per person."""
+        column_by_name = self.tax_benefit_system.column_by_name
+        if self.input_path is not None:
+            return load_input_arrays(self.input_path, column_by_name)
+        input_data_frame = self.input_data_frame
+        return dict(
+            (column_name, input_data_frame[column_name].values)
+            for column_name in select_input_columns(input_data_frame.columns, column_by_name)
+            )
+
+    def iter_chunks_simulations(self, chunk_size = 10000, array_by_name = None, debug = False, debug_all = False,
+            trace = False):
+        """Iterate over the indexes of the persons and the simulation of successive chunks of the survey.
+
+        See iter_chunks_persons_index for the content of a chunk. Only one chunk simulation exists at a time when the
+        caller doesn't keep them. array_by_name defaults to the input arrays of the survey.
+        """
+        if array_by_name is None:
+            array_by_name = self.get_input_array_by_name()
+        persons_count = len(array_by_name['idmen'])
+        for column_name, array in array_by_name.iteritems():
+            assert len(array) == persons_count, u'Input variable {} must have one value per person'.format(
+                column_name)
+        for persons_index in iter_chunks_persons_index(array_by_name, chunk_size):
+            yield persons_index, new_simulation_from_arrays(
+                array_by_name = dict(
+                    (column_name, array[persons_index])
+                    for column_name, array in array_by_name.iteritems()
+                    ),
+                debug = debug,
+                debug_all = debug_all,
+                period = periods.period(self.year),
+                tax_benefit_system = self.tax_benefit_system,
+                trace = trace,
+                )
+
+    def calculate_decomposition_aggregates(self, decomposition_json = None, quantile_variable_name = 'nivvie',
+            quantiles_count = 10):
+        """Return the decomposition (revdisp by default) with the weighted aggregates of each node.
+
+        See decompositions.aggregates.calculate_aggregates.
+        """
+        assert self.simulation is not None
+        if decomposition_json is None:
+            from openfisca_core import decompositions
+            decomposition_json = decompositions.get_decomposition_json(self.tax_benefit_system)
+        from .decompositions import aggregates
+        return aggregates.calculate_aggregates(
+            self.simulation,
+            decomposition_json,
+            quantile_variable_name = quantile_variable_name,
+            quantiles_count = quantiles_count,
+            weight_variable_name = self.weight_column_name_by_entity_symbol['men'],
+            )
+
+    def calculate_parallel(self, variables_name = None, processes_count = None, chunk_size = None):
+        """Calculate variables on the whole survey with a pool of processes. See calculate_by_chunks_in_parallel."""
+        return calculate_by_chunks_in_parallel(
+            array_by_name = self.get_input_array_by_name(),
+            chunk_size = chunk_size,
+            period = periods.period(self.year),
+            processes_count = processes_count,
+            tax_benefit_system = self.tax_benefit_system,
+            variables_name = variables_name,
+            )
+
+    def stream(self, output_dir = None, variables_name = None, chunk_size = 10000):
+        """Simulate the survey chunk by chunk, writing the requested variables of each chunk to output_dir.
+
+        The variables of each chunk are written to a file chunk-<index>.npz, with the indexes of its persons (in the
+        input) and the ids of its other entities (ordered like the values of their variables). The weighted sums of
+        the variables are updated in aggregates.json after each chunk, and returned at the end.
+
+        Memory depends on chunk_size (in menages) instead of the size of the survey.
+        """
+        assert output_dir is not None
+        assert variables_name
+        if not os.path.isdir(output_dir):
+            os.makedirs(output_dir)
+        aggregate_by_name = dict((variable_name, 0.0) for variable_name in variables_name)
+        array_by_name = self.get_input_array_by_name()
+        for chunk_index, (persons_index, simulation) in enumerate(self.iter_chunks_simulations(
+                array_by_name = array_by_name, chunk_size = chunk_size)):
+            output_array_by_name = dict(individus_index = persons_index)
+            for entity in simulation.entity_by_key_singular.itervalues():
+                if not entity.is_persons_entity:
+                    # The holders of the chunk simulation contain the indexes of the entities, not their survey ids.
+                    role_array = np.asarray(array_by_name[entity.role_for_person_variable_name])[persons_index]
+                    id_array = np.asarray(array_by_name[entity.index_for_person_variable_name])[persons_index]
+                    output_array_by_name[u'{}_id'.format(entity.key_plural)] = id_array[role_array == 0]
+            weight_by_entity = {}
+            for variable_name in variables_name:
+                holder = simulation.compute(variable_name)
+                entity = holder.entity
+                weight = weight_by_entity.get(entity)
+                if weight is None:
+                    weight_by_entity[entity] = weight = simulation.calculate(
+                        self.weight_column_name_by_entity_symbol[entity.symbol])
+                output_array_by_name[variable_name] = array = holder.array
+                aggregate_by_name[variable_name] += float(np.dot(array, weight))
+            np.savez(os.path.join(output_dir, 'chunk-{:05d}.npz'.format(chunk_index)), **output_array_by_name)
+            with open(os.path.join(output_dir, 'aggregates.json'), 'w') as aggregates_file:
+                json.dump(aggregate_by_name, aggregates_file, indent = 2, sort_keys = True)
+        return aggregate_by_name
+
     def inflate(self, inflators = None):
         if inflators is not None:
             self.inflators = inflators
@@ -124,7 +254,10 @@ class SurveyScenario(object):
         for column_name, inflator in inflators:
             assert column_name in tax_benefit_system.column_by_name
             holder = simulation.get_or_new_holder(column_name)
-            holder.array = inflator * holder.array
+            set_input_array(holder, inflator * simulation.calculate(column_name))
+        # Only the variables depending on the inflated ones will be calculated again.
+        from . import dependency_graph
+        return dependency_graph.invalidate(simulation, [column_name for column_name, inflator in inflators])
 
 
 def adapt_to_survey(tax_benefit_system):
@@ -184,7 +317,18 @@ def adapt_to_survey(tax_benefit_system):
 
 def new_simulation_from_array_dict(array_dict = None, debug = False, debug_all = False, legislation_json = None,
         tax_benefit_system = None, trace = False, year = None):
-    simulation = simulations.Simulation(
+    global_count = len(array_dict.values()[0])
+    array_dict = array_dict.copy()
+    for role_var in ['quifam', 'quifoy', 'quimen']:
+        if role_var not in array_dict:
+            array_dict[role_var] = np.zeros(global_count, dtype = int)
+
+    for id_var in ['idfam', 'idfoy', 'idmen']:
+        if id_var not in array_dict:
+            array_dict[id_var] = np.arange(global_count, dtype = int)
+
+    return new_simulation_from_arrays(
+        array_by_name = array_dict,
         debug = debug,
         debug_all = debug_all,
         legislation_json = legislation_json,
@@ -193,55 +337,293 @@ def new_simulation_from_array_dict(array_dict = None, debug = False, debug_all =
         trace = trace,
         )
 
-    assert len(set(len(x) for x in array_dict.itervalues() if len(x) != 1)) == 1, 'Arrays do not have the same size'
-    global_count = len(array_dict.values()[0])
-
-    for role_var in ['quifam', 'quifoy', 'quimen']:
-        if role_var not in array_dict:
-            array_dict[role_var] = np.zeros(global_count, dtype = int)
 
-    for id_var in ['idfam', 'idfoy', 'idmen']:
-        if id_var not in array_dict:
-            array_dict[id_var] = np.arange(global_count, dtype = int)
+def new_simulation_from_arrays(array_by_name = None, debug = False, debug_all = False, legislation_json = None,
+        period = None, tax_benefit_system = None, trace = False):
+    """Build a simulation of a whole population from columnar arrays, allocating each holder once.
 
+    array_by_name must contain, for each entity other than individus, the id (idfam, idfoy, idmen) and the role
+    (quifam, quifoy, quimen) of every person. Ids may be any integers: they are converted to the indexes of the
+    entities, ordered by the first appearance of the person having role 0. The other arrays are the values of input
+    variables for the period of the simulation. Arrays of entity variables are either of the size of their entity or
+    of the size of the population, in which case the value of the person having role 0 is used.
+    """
+    assert array_by_name is not None
+    assert tax_benefit_system is not None
+    simulation = simulations.Simulation(
+        debug = debug,
+        debug_all = debug_all,
+        legislation_json = legislation_json,
+        period = period,
+        tax_benefit_system = tax_benefit_system,
+        trace = trace,
+        )
     column_by_name = tax_benefit_system.column_by_name
-    for column_name, array in array_dict.iteritems():
-        assert column_name in column_by_name, column_name
-
-    entity_by_key_plural = simulation.entity_by_key_plural
-
-    familles = entity_by_key_plural[u'familles']
-    familles.count = familles.step_size = (array_dict['quifam'] == 0).sum()
-    foyers_fiscaux = entity_by_key_plural[u'foyers_fiscaux']
-    foyers_fiscaux.count = foyers_fiscaux.step_size = (array_dict['quifoy'] == 0).sum()
-    individus = entity_by_key_plural[u'individus']
-    individus.count = individus.step_size = global_count
-    menages = entity_by_key_plural[u'menages']
-    menages.count = menages.step_size = (array_dict['quimen'] == 0).sum()
-
-    assert 'idfam' in array_dict.keys()
-    assert 'idfoy' in array_dict.keys()
-    assert 'idmen' in array_dict.keys()
-    assert 'quifam' in array_dict.keys()
-    assert 'quifoy' in array_dict.keys()
-    assert 'quimen' in array_dict.keys()
-
-    familles.roles_count = array_dict['quifam'].max() + 1
-    menages.roles_count = array_dict['quimen'].max() + 1
-    foyers_fiscaux.roles_count = array_dict['quifoy'].max() + 1
-
-    for column_name, column_array in array_dict.iteritems():
+    for column_name in array_by_name:
+        assert column_name in column_by_name, u'Unknown variable: {}'.format(column_name)
+
+    persons = simulation.persons
+    persons_count = None
+    head_indexes_by_entity = {}
+    index_variables_name = set()
+    for entity in simulation.entity_by_key_singular.itervalues():
+        if entity.is_persons_entity:
+            continue
+        id_array = np.asarray(array_by_name[entity.index_for_person_variable_name])
+        role_array = np.asarray(array_by_name[entity.role_for_person_variable_name])
+        if persons_count is None:
+            persons_count = id_array.size
+        assert id_array.size == role_array.size == persons_count, \
+            u'Ids and roles of {} must have one value per person'.format(entity.key_plural)
+        index_array, head_indexes = check_entity_members(entity, id_array, role_array)
+        head_indexes_by_entity[entity] = head_indexes
+        entity.count = entity.step_size = head_indexes.size
+        entity.roles_count = int(role_array.max()) + 1 if role_array.size else 0
+        for variable_name, array in (
+                (entity.index_for_person_variable_name, index_array),
+                (entity.role_for_person_variable_name, role_array),
+                ):
+            holder = persons.get_or_new_holder(variable_name)
+            holder.array = array.astype(holder.column.dtype, copy = False)
+        index_variables_name.add(entity.index_for_person_variable_name)
+        index_variables_name.add(entity.role_for_person_variable_name)
+    persons.count = persons.step_size = persons_count
+
+    for column_name, array in array_by_name.iteritems():
+        if column_name in index_variables_name:
+            continue
         holder = simulation.get_or_new_holder(column_name)
         entity = holder.entity
+        array = np.asarray(array)
+        if not entity.is_persons_entity and array.size == persons_count and array.size != entity.count:
+            # Value of the person having role 0 (a new array, so no extra copy is needed for the dtype).
+            array = array[head_indexes_by_entity[entity]]
+        assert array.size == entity.count, u'Bad size for {}: {} instead of {}'.format(column_name, array.size,
+            entity.count)
+        set_input_array(holder, cast_input_array(column_name, array, holder.column))
+
+    return simulation
+
+
+def calculate_by_chunks_in_parallel(array_by_name = None, chunk_size = None, period = None, processes_count = None,
+        tax_benefit_system = None, variables_name = None):
+    """Calculate variables on a population split into chunks of menages, simulated by a pool of processes.
+
+    array_by_name is as in new_simulation_from_arrays, with one value per person. The formulas and the legislation are
+    loaded before the pool is forked, so the processes share them instead of loading them again. The processes write
+    their results to shared memory, where each value goes to the same position it would have in one simulation of the
+    whole population. The results are therefore identical to those of a single process.
+
+    Return the array of each variable.
+    """
+    global parallel_calculation
+    assert array_by_name is not None
+    assert tax_benefit_system is not None
+    assert variables_name
+    if processes_count is None:
+        processes_count = multiprocessing.cpu_count()
+    if chunk_size is None:
+        # A few chunks per process, so that processes finishing early take the remaining ones.
+        chunk_size = max(np.unique(array_by_name['idmen']).size // (processes_count * 4), 1)
+
+    from . import formulas_registry
+    formulas_registry.import_formulas_modules()
+    simulation = simulations.Simulation(period = period, tax_benefit_system = tax_benefit_system)
+    simulation.legislation_at(simulation.period.start)
+
+    persons_count = len(array_by_name['idmen'])
+    heads_index_by_entity_key_plural = {}
+    for entity_class in tax_benefit_system.entity_class_by_key_plural.itervalues():
+        if not entity_class.is_persons_entity:
+            heads_index_by_entity_key_plural[entity_class.key_plural] = np.flatnonzero(
+                np.asarray(array_by_name[entity_class.role_for_person_variable_name]) == 0)
+    array_by_variable_name = {}
+    for variable_name in variables_name:
+        column = tax_benefit_system.column_by_name[variable_name]
+        heads_index = heads_index_by_entity_key_plural.get(column.entity_key_plural)
+        dtype = np.dtype(column.dtype)
+        size = persons_count if heads_index is None else heads_index.size
+        shared_buffer = multiprocessing.sharedctypes.RawArray(ctypes.c_char, max(size * dtype.itemsize, 1))
+        array_by_variable_name[variable_name] = np.frombuffer(shared_buffer, dtype = dtype, count = size)
+
+    parallel_calculation = dict(
+        array_by_name = array_by_name,
+        array_by_variable_name = array_by_variable_name,
+        chunks_persons_index = list(iter_chunks_persons_index(array_by_name, chunk_size)),
+        heads_index_by_entity_key_plural = heads_index_by_entity_key_plural,
+        period = period,
+        tax_benefit_system = tax_benefit_system,
+        )
+    try:
+        chunks_index = range(len(parallel_calculation['chunks_persons_index']))
+        if processes_count == 1:
+            for chunk_index in chunks_index:
+                calculate_chunk(chunk_index)
+        else:
+            pool = multiprocessing.Pool(processes_count)
+            try:
+                pool.map(calculate_chunk, chunks_index, chunksize = 1)
+            finally:
+                pool.close()
+                pool.join()
+    finally:
+        parallel_calculation = None
+    return array_by_variable_name
+
+
+def calculate_chunk(chunk_index):
+    """Simulate a chunk of the parallel calculation in progress and write its results to the shared arrays."""
+    array_by_name = parallel_calculation['array_by_name']
+    persons_index = parallel_calculation['chunks_persons_index'][chunk_index]
+    simulation = new_simulation_from_arrays(
+        array_by_name = dict(
+            (column_name, np.asarray(array)[persons_index])
+            for column_name, array in array_by_name.iteritems()
+            ),
+        period = parallel_calculation['period'],
+        tax_benefit_system = parallel_calculation['tax_benefit_system'],
+        )
+    heads_index_by_entity_key_plural = parallel_calculation['heads_index_by_entity_key_plural']
+    for variable_name, output_array in parallel_calculation['array_by_variable_name'].iteritems():
+        holder = simulation.compute(variable_name)
+        entity = holder.entity
         if entity.is_persons_entity:
-            array = column_array
+            positions = persons_index
         else:
-            array = column_array[array_dict['qui' + entity.symbol].values == 0]
-        assert array.size == entity.count, 'Bad size for {}: {} instead of {}'.format(
-            column_name,
-            array.size,
-            entity.count
+            # Entities of a simulation are ordered by the position of their head, in the chunk as in the population.
+            chunk_heads_index = persons_index[simulation.get_holder(entity.role_for_person_variable_name).array == 0]
+            positions = np.searchsorted(heads_index_by_entity_key_plural[entity.key_plural], chunk_heads_index)
+        output_array[positions] = holder.array
+
+
+def check_entity_members(entity, id_array, role_array):
+    """Validate the composition of an entity and return the entity index of each person and the heads of entities.
+
+    Every entity must have exactly one person with role 0, and no role may be held by two persons of the same entity.
+    """
+    heads_mask = role_array == 0
+    head_indexes = np.flatnonzero(heads_mask)
+    head_ids = id_array[head_indexes]
+    sorter = np.argsort(head_ids, kind = 'mergesort')
+    sorted_head_ids = head_ids[sorter]
+    assert not (sorted_head_ids[1:] == sorted_head_ids[:-1]).any(), \
+        u'Some {} have several persons with role 0'.format(entity.key_plural)
+    positions = np.searchsorted(sorted_head_ids, id_array).clip(max = max(sorted_head_ids.size - 1, 0))
+    assert id_array.size == 0 or sorted_head_ids.size > 0 and (sorted_head_ids[positions] == id_array).all(), \
+        u'Some {} have no person with role 0'.format(entity.key_plural)
+    # Entities are ordered by the position of their head in the population.
+    index_array = sorter[positions]
+    roles_count = int(role_array.max()) + 1 if role_array.size else 1
+    member_keys = np.sort(index_array.astype(np.int64) * roles_count + role_array)
+    assert not (member_keys[1:] == member_keys[:-1]).any(), \
+        u'Some {} have several persons with the same role'.format(entity.key_plural)
+    return index_array, head_indexes
+
+
+def cast_input_array(column_name, array, column):
+    """Return the array in the dtype of the column, without copying it when it already has this dtype.
+
+    Casts that may lose information (for example from float to int, or from int64 to int32) are only accepted when no
+    value changes. The only exception is the rounding of floats to a smaller float type.
+    """
+    dtype = np.dtype(column.dtype)
+    if array.dtype == dtype:
+        return array
+    cast_array = array.astype(dtype)
+    if not np.can_cast(array.dtype, dtype, casting = 'safe') and not (array.dtype.kind == dtype.kind == 'f') \
+            and not (cast_array == array).all():
+        raise ValueError(u'Values of {} can\'t be converted from {} to {}'.format(column_name, array.dtype,
+            dtype).encode('utf-8'))
+    return cast_array
+
+
+def iter_chunks_persons_index(array_by_name, chunk_size):
+    """Iterate over the indexes of the persons of successive chunks of about chunk_size menages.
+
+    Chunks contain whole menages, familles and foyers fiscaux: menages linked by a famille or a foyer fiscal are put
+    in the same chunk, which may then exceed chunk_size. Menages are taken in the order of their ids.
+    """
+    assert chunk_size > 0
+    menage_index_array = np.unique(array_by_name['idmen'], return_inverse = True)[1]
+    if menage_index_array.size == 0:
+        return
+    # Each person belongs to the group of the smallest menage it is linked to, through familles and foyers fiscaux.
+    group_array = menage_index_array
+    while True:
+        previous_group_array = group_array
+        for id_variable_name in ('idfam', 'idfoy', 'idmen'):
+            entity_index_array = np.unique(array_by_name[id_variable_name], return_inverse = True)[1]
+            group_by_entity = np.full(entity_index_array.max() + 1, group_array.max(), dtype = group_array.dtype)
+            np.minimum.at(group_by_entity, entity_index_array, group_array)
+            group_array = group_by_entity[entity_index_array]
+        if (group_array == previous_group_array).all():
+            break
+    heads_group_array = group_array[np.asarray(array_by_name['quimen']) == 0]
+    menages_count_by_group = np.bincount(heads_group_array, minlength = menage_index_array.max() + 1)
+    chunk_by_group = (np.cumsum(menages_count_by_group) - 1) // chunk_size
+    chunk_array = chunk_by_group[group_array]
+    sorter = np.argsort(chunk_array, kind = 'mergesort')
+    for persons_index in np.split(sorter, np.cumsum(np.bincount(chunk_array))[:-1]):
+        if persons_index.size:
+            yield persons_index
+
+
+def load_input_arrays(input_path, column_by_name):
+    """Read the arrays of the input variables stored in a directory of .npy files or in a .npz, HDF5 or Parquet file.
+
+    Only the columns that are input variables of column_by_name are read. The .npy files and the contiguous
+    uncompressed HDF5 datasets are memory-mapped (copy on write), so their data is not copied in memory.
+    """
+    if os.path.isdir(input_path):
+        file_path_by_name = dict(
+            (os.path.splitext(file_name)[0], os.path.join(input_path, file_name))
+            for file_name in os.listdir(input_path)
+            if file_name.endswith('.npy')
             )
-        holder.array = np.array(array, dtype = holder.column.dtype)
-
-    return simulation
+        return dict(
+            (column_name, np.load(file_path_by_name[column_name], mmap_mode = 'c'))
+            for column_name in select_input_columns(file_path_by_name.keys(), column_by_name)
+            )
+    extension = os.path.splitext(input_path)[1].lower()
+    if extension == '.npz':
+        with np.load(input_path) as npz_file:
+            return dict(
+                (column_name, npz_file[column_name])
+                for column_name in select_input_columns(npz_file.files, column_by_name)
+                )
+    if extension in ('.h5', '.hdf5'):
+        import h5py
+        array_by_name = {}
+        with h5py.File(input_path, 'r') as hdf5_file:
+            for column_name in select_input_columns(hdf5_file.keys(), column_by_name):
+                dataset = hdf5_file[column_name]
+                offset = dataset.id.get_offset()
+                if dataset.chunks is None and dataset.compression is None and offset is not None:
+                    array_by_name[column_name] = np.memmap(input_path, dtype = dataset.dtype, mode = 'c',
+                        offset = offset, shape = dataset.shape)
+                else:
+                    array_by_name[column_name] = dataset[...]
+        return array_by_name
+    if extension == '.parquet':
+        import pyarrow.parquet
+        columns_name = select_input_columns(pyarrow.parquet.ParquetFile(input_path).schema.names, column_by_name)
+        table = pyarrow.parquet.read_table(input_path, columns = columns_name, memory_map = True)
+        return dict(
+            (column_name, table.column(column_name).to_numpy())
+            for column_name in columns_name
+            )
+    raise ValueError(u'Unknown format of survey input: {}'.format(input_path).encode('utf-8'))
+
+
+def select_input_columns(columns_name, column_by_name):
+    """Return the names of the columns that are input variables of the tax-benefit system."""
+    selected_columns_name = []
+    for column_name in columns_name:
+        column = column_by_name.get(column_name)
+        if column is None:
+            log.info('Unknown column "{}" in survey, dropped from input table'.format(column_name))
+        elif column.formula_class is not None:
+            log.info('Column "{}" in survey set to be calculated, dropped from input table'.format(column_name))
+        else:
+            selected_columns_name.append(column_name)
+    return selected_columns_name
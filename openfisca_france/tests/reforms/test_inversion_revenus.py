@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+
+# OpenFisca -- A versatile microsimulation software
+# By: OpenFisca Team <contact@openfisca.fr>
+#
+# Copyright (C) 2011, 2012, 2013, 2014, 2015 OpenFisca Team
+# https://github.com/openfisca
+#
+# This file is part of OpenFisca.
+#
+# OpenFisca is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# OpenFisca is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import datetime
+
+from openfisca_core.tools import assert_near
+
+from openfisca_france.model.base import CAT
+from openfisca_france.reforms import inversion_revenus
+from openfisca_france.tests import base
+
+
+def check_salbrut_round_trip(type_sal_name, year):
+    # The scan crosses the thresholds of the barèmes, up to 4 plafonds de la sécurité sociale.
+    scenario_args = dict(
+        axes = [
+            dict(
+                count = 21,
+                name = 'salbrut',
+                max = 150000,
+                min = 0,
+                ),
+            ],
+        period = year,
+        parent1 = dict(
+            birth = datetime.date(year - 40, 1, 1),
+            type_sal = CAT[type_sal_name],
+            ),
+        )
+    simulation = base.tax_benefit_system.new_scenario().init_single_entity(**scenario_args).new_simulation()
+    salbrut = simulation.get_holder('salbrut').array
+    salnet = simulation.calculate('salnet')
+
+    inversion_reform = inversion_revenus.build_reform(base.tax_benefit_system)
+    inverse_simulation = inversion_reform.new_scenario().init_single_entity(**scenario_args).new_simulation()
+    inverse_simulation.get_holder('salbrut').delete_arrays()
+    inverse_simulation.get_or_new_holder('salnet').array = salnet
+    assert_near(inverse_simulation.calculate('salbrut'), salbrut, error_margin = 1)
+
+
+def test_salbrut_round_trip():
+    for type_sal_name in ('prive_non_cadre', 'prive_cadre', 'public_titulaire_etat'):
+        for year in (2013, 2014):
+            yield check_salbrut_round_trip, type_sal_name, year
+
+
+if __name__ == '__main__':
+    import logging
+    import sys
+
+    logging.basicConfig(level = logging.ERROR, stream = sys.stdout)
+    for function_and_arguments in test_salbrut_round_trip():
+        function_and_arguments[0](*function_and_arguments[1:])
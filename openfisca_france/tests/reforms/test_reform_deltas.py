@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+
+# OpenFisca -- A versatile microsimulation software
+# By: OpenFisca Team <contact@openfisca.fr>
+#
+# Copyright (C) 2011, 2012, 2013, 2014, 2015 OpenFisca Team
+# https://github.com/openfisca
+#
+# This file is part of OpenFisca.
+#
+# OpenFisca is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# OpenFisca is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import datetime
+
+from nose.tools import assert_equal
+
+from openfisca_core import periods
+from openfisca_france import reform_deltas
+from openfisca_france.reforms import plf2015
+from openfisca_france.tests import base
+
+
+def test_calculate_deltas(year = 2014):
+    reform = plf2015.build_reform(base.tax_benefit_system)
+    scenario = reform.new_scenario().init_single_entity(
+        axes = [
+            dict(
+                count = 5,
+                max = 40000,
+                min = 0,
+                name = 'sal',
+                ),
+            ],
+        period = periods.period('year', year),
+        parent1 = dict(birth = datetime.date(year - 40, 1, 1)),
+        )
+    reference_simulation = scenario.new_simulation(reference = True)
+    reform_simulation, delta_by_name = reform_deltas.calculate_deltas(reference_simulation, reform,
+        ['impo', 'sal'])
+    # The new décote is recomputed, the inputs are shared.
+    assert 'decote' in reform_deltas.get_invalidated_names(reform, base.tax_benefit_system)
+    assert reform_simulation.calculate('sal') is reference_simulation.calculate('sal')
+    assert_equal(delta_by_name['sal'].tolist(), [0] * 5)
+    full_reform_simulation = scenario.new_simulation()
+    assert_equal(
+        delta_by_name['impo'].tolist(),
+        (full_reform_simulation.calculate('impo') - reference_simulation.calculate('impo')).tolist(),
+        )
+
+
+if __name__ == '__main__':
+    import logging
+    import sys
+    logging.basicConfig(level = logging.ERROR, stream = sys.stdout)
+    test_calculate_deltas()
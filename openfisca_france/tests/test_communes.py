@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+
+# OpenFisca -- A versatile microsimulation software
+# By: OpenFisca Team <contact@openfisca.fr>
+#
+# Copyright (C) 2011, 2012, 2013, 2014, 2015 OpenFisca Team
+# https://github.com/openfisca
+#
+# This file is part of OpenFisca.
+#
+# OpenFisca is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# OpenFisca is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import datetime
+
+import numpy as np
+
+from .. import dependency_graph
+from ..model.communes import Communes
+from . import base
+
+
+def test_communes_encoding():
+    depcom = np.array(['75114', '97105', '2A004', '75114', '97611', ''], dtype = '|S5')
+    communes = Communes(depcom)
+    assert len(communes.depcom) == 5
+    assert (communes.depcom[communes.index] == depcom).all()
+    assert (communes.code[communes.index] == [75114, 97105, 100004, 75114, 97611, -1]).all()
+    assert (communes.territoire[communes.index] == [0, 971, 0, 0, 976, 0]).all()
+    assert (communes.departement[communes.index] == ['75', '971', '2A', '75', '976', '']).all()
+
+
+def test_residence_dom():
+    year = 2013
+    simulation = base.tax_benefit_system.new_scenario().init_single_entity(
+        period = year,
+        menage = dict(
+            depcom = '97105',
+            ),
+        parent1 = dict(birth = datetime.date(year - 40, 1, 1)),
+        ).new_simulation(debug = True)
+    assert simulation.calculate('residence_guadeloupe')
+    assert not simulation.calculate('residence_mayotte')
+    assert simulation.calculate('zone_apl') == 2
+
+
+def test_depcom_modified_in_place():
+    year = 2013
+    simulation = base.tax_benefit_system.new_scenario().init_single_entity(
+        period = year,
+        menage = dict(
+            depcom = '97105',
+            ),
+        parent1 = dict(birth = datetime.date(year - 40, 1, 1)),
+        ).new_simulation(debug = True)
+    assert simulation.calculate('residence_guadeloupe')
+    depcom = simulation.calculate('depcom')
+    depcom[:] = '97611'
+    dependency_graph.invalidate(simulation, ['depcom'])
+    assert not simulation.calculate('residence_guadeloupe')
+    assert simulation.calculate('residence_mayotte')
+
+
+if __name__ == '__main__':
+    import logging
+    import sys
+
+    logging.basicConfig(level = logging.ERROR, stream = sys.stdout)
+    test_communes_encoding()
+    test_residence_dom()
+    test_depcom_modified_in_place()
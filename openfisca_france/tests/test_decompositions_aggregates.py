@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+
+# OpenFisca -- A versatile microsimulation software
+# By: OpenFisca Team <contact@openfisca.fr>
+#
+# Copyright (C) 2011, 2012, 2013, 2014, 2015 OpenFisca Team
+# https://github.com/openfisca
+#
+# This file is part of OpenFisca.
+#
+# OpenFisca is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# OpenFisca is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import numpy as np
+from nose.tools import assert_almost_equal, assert_equal
+from openfisca_core import periods
+
+from .. import surveys
+from ..decompositions import aggregates
+from . import base
+
+
+def test_calculate_aggregates():
+    # Two menages: a couple with a child, then a single person.
+    ids = np.array([12, 12, 12, 5])
+    roles = np.array([0, 1, 2, 0])
+    simulation = surveys.new_simulation_from_arrays(
+        array_by_name = dict(
+            idfam = ids,
+            idfoy = ids,
+            idmen = ids,
+            quifam = roles,
+            quifoy = roles,
+            quimen = roles,
+            sali = np.array([30000, 20000, 0, 0]),
+            wprm = np.array([100., 300.]),
+            ),
+        period = periods.period(2013),
+        tax_benefit_system = base.tax_benefit_system,
+        )
+    decomposition_json = dict(
+        code = 'revenus',
+        children = [
+            dict(code = 'sal'),
+            dict(code = 'irpp'),
+            dict(code = 'sal'),
+            ],
+        )
+    aggregated_decomposition_json = aggregates.calculate_aggregates(simulation, decomposition_json,
+        quantiles_count = 2)
+    sal = simulation.calculate('sal')
+    irpp = simulation.calculate('irpp')
+    sal_node, irpp_node, _ = aggregated_decomposition_json['children']
+    assert_equal(sal_node['aggregates']['total'], 100 * sal.sum())
+    assert_equal(sal_node['aggregates']['beneficiaries'], 100)
+    assert_equal(irpp_node['aggregates']['total'], 100 * irpp[0] + 300 * irpp[1])
+    root_aggregates = aggregated_decomposition_json['aggregates']
+    assert_equal(root_aggregates['total'], 2 * sal_node['aggregates']['total'] + irpp_node['aggregates']['total'])
+    assert_almost_equal(sum(root_aggregates['total_by_quantile']), root_aggregates['total'])
+    assert 'aggregates' not in decomposition_json
+
+
+if __name__ == '__main__':
+    import logging
+    import sys
+
+    logging.basicConfig(level = logging.ERROR, stream = sys.stdout)
+    test_calculate_aggregates()
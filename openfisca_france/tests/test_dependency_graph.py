@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+
+# OpenFisca -- A versatile microsimulation software
+# By: OpenFisca Team <contact@openfisca.fr>
+#
+# Copyright (C) 2011, 2012, 2013, 2014, 2015 OpenFisca Team
+# https://github.com/openfisca
+#
+# This file is part of OpenFisca.
+#
+# OpenFisca is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# OpenFisca is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import datetime
+
+from nose.tools import assert_equal
+
+from .. import dependency_graph
+from . import base
+
+
+def new_simulation(sali):
+    return base.tax_benefit_system.new_scenario().init_single_entity(
+        period = 2013,
+        parent1 = dict(
+            birth = datetime.date(1970, 1, 1),
+            sali = sali,
+            ),
+        ).new_simulation()
+
+
+def test_dependents():
+    graph = dependency_graph.get_dependency_graph(base.tax_benefit_system)
+    assert 'rbg' in graph.dependencies_by_name['rng']
+    dependents = graph.get_dependents(['sali'])
+    assert 'irpp' in dependents
+    assert 'sali' not in dependents
+    assert 'loyer' not in dependents
+
+
+def test_invalidate():
+    simulation = new_simulation(20000)
+    simulation.calculate('irpp')
+    simulation.calculate('loyer')
+    variables_to_recompute_name = dependency_graph.get_variables_to_recompute(simulation, ['sali'])
+    assert 'irpp' in variables_to_recompute_name
+    assert 'loyer' not in variables_to_recompute_name
+    assert_equal(
+        dependency_graph.set_input_and_invalidate(simulation, 'sali', simulation.calculate('sali') * 2),
+        variables_to_recompute_name,
+        )
+    assert_equal(simulation.calculate('irpp').tolist(), new_simulation(40000).calculate('irpp').tolist())
+
+
+if __name__ == '__main__':
+    import logging
+    import sys
+
+    logging.basicConfig(level = logging.ERROR, stream = sys.stdout)
+    test_dependents()
+    test_invalidate()
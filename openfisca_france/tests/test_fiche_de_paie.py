@@ -27,6 +27,7 @@ from __future__ import division
 
 import datetime
 
+import numpy as np
 from openfisca_core import periods
 from openfisca_france.tests.base import tax_benefit_system
 from openfisca_france.tests.fiche_de_paie import modules
@@ -51,6 +52,25 @@ def test_1():
     simulation.calculate("agff_tranche_a_employe", period = "2013-12")
 
 
+def test_type_sal_replaced_in_holder():
+    period = periods.period("2013-12")
+    simulation = tax_benefit_system.new_scenario().init_single_entity(
+        period = period,
+        parent1 = dict(
+            effectif_entreprise = 3000,
+            localisation_entreprise = "75001",
+            salaire_de_base = 3000,
+            taille_entreprise = 3,
+            type_sal = 0,
+            ),
+        ).new_simulation()
+    assert (simulation.calculate("apec_employe", period) == 0).all()
+    # The individuals of each type_sal must not be read from the partition of the previous type_sal array.
+    type_sal_holder = simulation.get_or_new_holder("type_sal")
+    type_sal_holder.set_array(period, np.array([1], dtype = type_sal_holder.column.dtype))
+    assert (simulation.calculate("apec_employeur", period) < 0).all()
+
+
 def iter_scenarios():
     for module in modules:
         local = dict()
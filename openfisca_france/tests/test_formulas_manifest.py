@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+
+# OpenFisca -- A versatile microsimulation software
+# By: OpenFisca Team <contact@openfisca.fr>
+#
+# Copyright (C) 2011, 2012, 2013, 2014, 2015 OpenFisca Team
+# https://github.com/openfisca
+#
+# This file is part of OpenFisca.
+#
+# OpenFisca is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# OpenFisca is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+
+from .. import entities, formulas_registry
+from . import base
+
+
+def test_formulas_manifest():
+    with open(formulas_registry.manifest_file_path) as manifest_file:
+        manifest = json.load(manifest_file)
+    entity_symbol_by_name = dict(
+        (name, entity_symbol)
+        for entity_symbol, name, module_name in manifest
+        )
+
+    formulas_registry.import_formulas_modules()
+    for entity_symbol, entity_class in entities.entity_class_by_symbol.iteritems():
+        for name, column in entity_class.column_by_name.iter_loaded_items():
+            assert entity_symbol_by_name.get(name) == entity_symbol, \
+                u'Column {} is missing from the manifest: run scripts/generate_formulas_manifest.py'.format(name)
+    for name in entity_symbol_by_name:
+        assert name in base.tax_benefit_system.column_by_name, \
+            u'Column {} is not defined anymore: run scripts/generate_formulas_manifest.py'.format(name)
+
+
+if __name__ == '__main__':
+    import logging
+    import sys
+
+    logging.basicConfig(level = logging.ERROR, stream = sys.stdout)
+    test_formulas_manifest()
@@ -24,9 +24,14 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
-"""Teste tous les fichiers .json créés par un script"""
+"""Teste tous les fichiers .json créés par un script
 
+Les cas types sont regroupés par année et empilés dans une seule simulation (un foyer fiscal par cas type), de sorte
+que chaque variable n'est calculée qu'une fois par année. Le résultat de chaque cas type reste vérifié séparément.
+"""
 
+
+import collections
 import datetime
 import json
 import logging
@@ -34,101 +39,195 @@ import os
 import sys
 
 from biryani.baseconv import check
-from nose.tools import assert_equal
+from openfisca_core import conv
 
 from .base import assert_near, tax_benefit_system
 
 
+ignored_codes = frozenset(('AVFISCOPTER', 'BCSG', 'BPRS', 'BRDS', 'CIADCRE', 'CICA', 'CICORSE', 'CIDEPENV', 'CIDEVDUR',
+    'CIGARD', 'CIGE', 'CIHABPRIN', 'CIMOBIL', 'CIPERT', 'CIPRETUD', 'RILMIA', 'IINET',
+    'CIRCM', 'CIRELANCE', 'CITEC', 'IAVF2', 'I2DH', 'IREST', 'IRESTIR', 'RILMIH',
+    'IRETS', 'ITRED', 'NAPCR', 'NAPCRP', 'NAPCS', 'RRIRENOV', 'RCELHL', 'RLOCIDEFG',
+    'NAPPS', 'NAPRD', 'PERPPLAFTC', 'PERPPLAFTV', 'RAH', 'RCEL', 'RCELREPGX', 'RCELREPGW', 'RDONS',
+    'RCELHJK', 'RCELREPHR', 'RCELRREDLA', 'RRESIVIEU', 'RMEUBLE', 'RREDMEUB', 'RSOCREPR', 'RRPRESCOMP',
+    'RCONS', 'RPECHE', 'RCELREPGS', 'RCELREPGU', 'RCELREPGT', 'RPATNAT', 'RPATNATOT', 'RPRESCOMPREP',
+    'RDIFAGRI', 'REI', 'RFOR', 'RTELEIR', 'RTOURREP', 'RTOUREPA', 'RTOUHOTR', 'RRESINEUV',
+    'RFORET', 'RHEBE', 'RILMIC', 'RILMIB', 'RRESIMEUB', 'RREPMEU', 'RREPNPRO', 'TEFF',
+    'RPROREP', 'RINVRED', 'RREDREP', 'RILMIX', 'PERPPLAFTP',
+    'RILMIZ', 'RILMJI', 'RILMJS', 'RCODJT', 'RCODJU', 'RCODJV', 'RCODJW', 'RCODJX',
+    'RIDOMENT', 'RIDOMPROE1', 'RIDOMPROE2', 'RLOGDOM', 'RREPA', 'RDUFLOGIH', 'IPROP',
+    'RIDOMPROE3', 'RIDOMPROE4', 'RIDOMPROE5', 'RTITPRISE', 'RRDOM', 'RINVDOMTOMLG', 'RCOTFOR',
+    'RNI', 'RNOUV', 'RRESTIMO', 'RTOUR', 'RCELRREDLC', 'RCELRREDLB', 'RCELNBGL', 'RCELFD',
+    'RCELLIER', 'RCELHNO', 'RCELHM', 'RCELHR', 'RCELRREDLS', 'RCELRREDLZ', 'RCELFABC',
+    'RCELREPHS', 'RCELNBGL', 'RCELCOM', 'RCELNQ', 'RCELRREDLD', 'RCELRREDLE', 'RCELRREDLF',
+    'RTOURHOT', 'RTOURES', 'RTOURNEUF', 'RCELREPHR', 'RCINE', 'RFCPI', 'RINNO', 'RAA',
+    'RCELREPGJ', 'RCELREPGK', 'RCELREPGL', 'RCELREPGP', 'RSOUFIP', 'RCODELOP',
+    'RTOURTRA', 'TXMARJ', 'RSURV', 'RAIDE', 'RCELREPHA', 'RCELREPHB', 'RCELJP', 'RCELJOQR',
+    'RCELREPHD', 'RCELREPHE', 'RCELREPHF', 'RCELREPHH', 'RCEL2012', 'RCELJBGL', 'RCOLENT',
+    'RCELREPHT', 'RCELREPHU', 'RCELREPHV', 'RCELREPHW', 'RCELREPHX', 'RCELREPHZ', 'RCELRRED09', 'TXMOYIMP',
+    'RFIPC', 'RILMJX', 'RILMJV', 'RCELREPGV', 'RCELRREDLM', 'RCELRREDMG', 'RILMJW', 'RCELREPHG'))
 json_dir_path = os.path.join(os.path.dirname(__file__), 'json')
 log = logging.getLogger(__name__)
+openfisca_name_by_code = {
+    'IAVIM': 'iai',
+    'IDEC': 'decote',
+    'IDRS2': 'ir_plaf_qf',
+    'IINETIR': 'irpp',
+    'IRESTIR': 'irpp',
+    'ITRED': 'reductions',
+    'NBP': 'nbptr',
+    'NBPT': 'nbptr',
+    'PPETOT': 'ppe',
+    'REVKIRE': 'rfr',
+    'RNICOL': 'rni',
+    'RRBG': 'rbg',
+    # TODO: Checker si le montant net CSG/CRDS correspond à NAPCS, NAPRDS, checker IINET
+    }
+roles_key_by_key_plural = dict(
+    (entity_class.key_plural, entity_class.roles_key)
+    for entity_class in tax_benefit_system.entity_class_by_key_plural.itervalues()
+    if not entity_class.is_persons_entity
+    )
+
+
+def check_fixture_error(args):
+    raise AssertionError(u'Cas type {} invalide : {}'.format(args['json_file_name'], args['error']).encode('utf-8'))
 
 
 def check_variable(args):
-    scenario = args['scenario']
-    simulation = scenario.new_simulation(debug = True)
     code = args['code']
-    openfisca_value = None
-    if code == 'IAVIM':
-        openfisca_name = 'iai'
-    elif code == 'IDEC':
-        openfisca_name = 'decote'
-    elif code == 'IDRS2':
-        openfisca_name = 'ir_plaf_qf'
-    elif code == 'IINETIR' or code == 'IRESTIR':
-        openfisca_name = 'irpp'
-    elif code == 'ITRED':
-        openfisca_name = 'reductions'
-    elif code == 'NBPT' or code == 'NBP':
-        openfisca_name = 'nbptr'
-    elif code == 'PPETOT':
-        openfisca_name = 'ppe'
-    elif code == 'REVKIRE':
-        openfisca_name = 'rfr'
-    elif code == 'RNICOL':
-        openfisca_name = 'rni'
-    elif code == 'RRBG':
-        openfisca_name = 'rbg'
-    # TODO: Checker si le montant net CSG/CRDS correspond à NAPCS, NAPRDS, checker IINET
-    elif code == 'TOTPAC':
-        openfisca_name = "len(args['totpac'] or [])"
-        openfisca_value = len(args['totpac'] or [])  # Codes ignorés pour la comparaison
-    elif code in ('AVFISCOPTER', 'BCSG', 'BPRS', 'BRDS', 'CIADCRE', 'CICA', 'CICORSE', 'CIDEPENV', 'CIDEVDUR',
-            'CIGARD', 'CIGE', 'CIHABPRIN', 'CIMOBIL', 'CIPERT', 'CIPRETUD', 'RILMIA', 'IINET',
-            'CIRCM', 'CIRELANCE', 'CITEC', 'IAVF2', 'I2DH', 'IREST', 'IRESTIR', 'RILMIH',
-            'IRETS', 'ITRED', 'NAPCR', 'NAPCRP', 'NAPCS', 'RRIRENOV', 'RCELHL', 'RLOCIDEFG',
-            'NAPPS', 'NAPRD', 'PERPPLAFTC', 'PERPPLAFTV', 'RAH', 'RCEL', 'RCELREPGX', 'RCELREPGW', 'RDONS',
-            'RCELHJK', 'RCELREPHR', 'RCELRREDLA', 'RRESIVIEU', 'RMEUBLE', 'RREDMEUB', 'RSOCREPR', 'RRPRESCOMP',
-            'RCONS', 'RPECHE', 'RCELREPGS', 'RCELREPGU', 'RCELREPGT', 'RPATNAT', 'RPATNATOT', 'RPRESCOMPREP',
-            'RDIFAGRI', 'REI', 'RFOR', 'RTELEIR', 'RTOURREP', 'RTOUREPA', 'RTOUHOTR', 'RRESINEUV',
-            'RFORET', 'RHEBE', 'RILMIC', 'RILMIB', 'RRESIMEUB', 'RREPMEU', 'RREPNPRO', 'TEFF',
-            'RPROREP', 'RINVRED', 'RREDREP', 'RILMIX', 'PERPPLAFTP',
-            'RILMIZ', 'RILMJI', 'RILMJS', 'RCODJT', 'RCODJU', 'RCODJV', 'RCODJW', 'RCODJX',
-            'RIDOMENT', 'RIDOMPROE1', 'RIDOMPROE2', 'RLOGDOM', 'RREPA', 'RDUFLOGIH', 'IPROP',
-            'RIDOMPROE3', 'RIDOMPROE4', 'RIDOMPROE5', 'RTITPRISE', 'RRDOM', 'RINVDOMTOMLG', 'RCOTFOR',
-            'RNI', 'RNOUV', 'RRESTIMO', 'RTOUR', 'RCELRREDLC', 'RCELRREDLB', 'RCELNBGL', 'RCELFD',
-            'RCELLIER', 'RCELHNO', 'RCELHM', 'RCELHR', 'RCELRREDLS', 'RCELRREDLZ', 'RCELFABC',
-            'RCELREPHS', 'RCELNBGL', 'RCELCOM', 'RCELNQ', 'RCELRREDLD', 'RCELRREDLE', 'RCELRREDLF',
-            'RTOURHOT', 'RTOURES', 'RTOURNEUF', 'RCELREPHR', 'RCINE', 'RFCPI', 'RINNO', 'RAA',
-            'RCELREPGJ', 'RCELREPGK', 'RCELREPGL', 'RCELREPGP', 'RSOUFIP', 'RCODELOP',
-            'RTOURTRA', 'TXMARJ', 'RSURV', 'RAIDE', 'RCELREPHA', 'RCELREPHB', 'RCELJP', 'RCELJOQR',
-            'RCELREPHD', 'RCELREPHE', 'RCELREPHF', 'RCELREPHH', 'RCEL2012', 'RCELJBGL', 'RCOLENT',
-            'RCELREPHT', 'RCELREPHU', 'RCELREPHV', 'RCELREPHW', 'RCELREPHX', 'RCELREPHZ', 'RCELRRED09', 'TXMOYIMP',
-            'RFIPC', 'RILMJX', 'RILMJV', 'RCELREPGV', 'RCELRREDLM', 'RCELRREDMG', 'RILMJW', 'RCELREPHG'):
-        return
+    log.info(u'Comparing impôts.gouv.fr variable {} with OpenFisca variable {} in {}'.format(code,
+        args['openfisca_name'], args['json_file_name']))
+    assert_near(abs(args['openfisca_value']), args['field']['value'], error_margin = 2)
+
+
+def iter_entities_json(entities_json):
+    """Itère sur les entités d'un cas type, qu'elles soient données sous forme de liste ou de dictionnaire par id."""
+    if isinstance(entities_json, dict):
+        for entity_id, entity_json in entities_json.iteritems():
+            yield entity_id, entity_json
     else:
-        raise ValueError(u'"code" inconnu')
-    log.info(u'Comparing impôts.gouv.fr variable {} with OpenFisca variable {}'.format(code, openfisca_name))
-    log.info(u'Scenario:\n{}'.format(json.dumps(scenario.to_json(), encoding = 'utf_8', ensure_ascii = False,
-        indent = 2)))
-    if openfisca_value is None:
-        openfisca_array = simulation.calculate(openfisca_name)
-        assert_equal(openfisca_array.shape, (1,))
-        openfisca_value = openfisca_array[0]
-    assert_near(abs(openfisca_value), args['field']['value'], error_margin = 2)
+        for index, entity_json in enumerate(entities_json):
+            yield entity_json.get('id', index), entity_json
 
 
-def test_jsons():
-    for json_file_name in os.listdir(json_dir_path):
+def load_fixtures():
+    """Charge les cas types et les regroupe par année.
+
+    Renvoie aussi les erreurs des cas types invalides (code inconnu, cas type qui ne peut pas être converti…), qui sont
+    écartés des simulations empilées pour ne pas faire échouer les autres cas types de leur année.
+    """
+    fixtures_by_year = collections.defaultdict(list)
+    error_by_json_file_name = collections.OrderedDict()
+    for json_file_name in sorted(os.listdir(json_dir_path)):
         with open(os.path.join(json_dir_path, json_file_name)) as json_file:
             content = json.load(json_file)
         scenario_json = content['scenario']
-        scenario = check(tax_benefit_system.Scenario.make_json_to_instance(tax_benefit_system = tax_benefit_system))(
-            scenario_json)
         if 'year' in scenario_json:
             year = scenario_json['year']
         else:
             date = datetime.datetime.strptime(scenario_json['date'], "%Y-%m-%d")
             year = date.year
-        totpac = scenario.test_case['foyers_fiscaux'].values()[0].get('personnes_a_charge')
-        for code, field in content['resultat_officiel'].iteritems():
-            yield check_variable, {
-                'code': code,
-                'field': field,
-                'json_file_name': json_file_name,
-                'scenario': scenario,
-                'totpac': totpac,
-                'year': year,
-                }
+        error = validate_fixture(content, year)
+        if error is not None:
+            error_by_json_file_name[json_file_name] = error
+            continue
+        fixtures_by_year[year].append((json_file_name, content))
+    return fixtures_by_year, error_by_json_file_name
+
+
+def stack_test_cases(test_cases_json):
+    """Empile plusieurs cas types en un seul, en préfixant les id par l'indice du cas type.
+
+    Chaque cas type doit contenir exactement un foyer fiscal : le foyer fiscal du cas type d'indice i est donc le i-ème
+    foyer fiscal de la simulation.
+    """
+    stacked_test_case_json = collections.OrderedDict(
+        (key_plural, [])
+        for key_plural in ('familles', 'foyers_fiscaux', 'individus', 'menages')
+        )
+    for test_case_index, test_case_json in enumerate(test_cases_json):
+        prefix = u'{}-'.format(test_case_index)
+        assert len(test_case_json['foyers_fiscaux']) == 1, test_case_json
+        for key_plural, entities_json in test_case_json.iteritems():
+            roles_key = roles_key_by_key_plural.get(key_plural, [])
+            for entity_id, entity_json in iter_entities_json(entities_json):
+                entity_json = entity_json.copy()
+                entity_json['id'] = prefix + unicode(entity_id)
+                for role_key in roles_key:
+                    members_id = entity_json.get(role_key)
+                    if members_id is None:
+                        continue
+                    if isinstance(members_id, list):
+                        entity_json[role_key] = [prefix + unicode(member_id) for member_id in members_id]
+                    else:
+                        entity_json[role_key] = prefix + unicode(members_id)
+                stacked_test_case_json[key_plural].append(entity_json)
+    return stacked_test_case_json
+
+
+def test_jsons():
+    fixtures_by_year, error_by_json_file_name = load_fixtures()
+    for json_file_name, error in error_by_json_file_name.iteritems():
+        yield check_fixture_error, {
+            'error': error,
+            'json_file_name': json_file_name,
+            }
+    for year, fixtures in sorted(fixtures_by_year.iteritems()):
+        scenario = check(tax_benefit_system.Scenario.make_json_to_instance(tax_benefit_system = tax_benefit_system))(
+            dict(
+                test_case = stack_test_cases([content['scenario']['test_case'] for _, content in fixtures]),
+                year = year,
+                ))
+        simulation = scenario.new_simulation(debug = True)
+        foyers_fiscaux_count = len(fixtures)
+        openfisca_array_by_name = {}
+        for foyer_fiscal_index, (json_file_name, content) in enumerate(fixtures):
+            foyer_fiscal_json = list(iter_entities_json(content['scenario']['test_case']['foyers_fiscaux']))[0][1]
+            totpac = foyer_fiscal_json.get('personnes_a_charge')
+            for code, field in content['resultat_officiel'].iteritems():
+                if code == 'TOTPAC':
+                    openfisca_name = "len(totpac or [])"
+                    openfisca_value = len(totpac or [])
+                elif code in ignored_codes and code not in openfisca_name_by_code:
+                    # Codes ignorés pour la comparaison
+                    continue
+                else:
+                    openfisca_name = openfisca_name_by_code[code]
+                    openfisca_array = openfisca_array_by_name.get(openfisca_name)
+                    if openfisca_array is None:
+                        openfisca_array = openfisca_array_by_name[openfisca_name] = simulation.calculate(
+                            openfisca_name)
+                        assert openfisca_array.shape == (foyers_fiscaux_count,), openfisca_array.shape
+                    openfisca_value = openfisca_array[foyer_fiscal_index]
+                yield check_variable, {
+                    'code': code,
+                    'field': field,
+                    'json_file_name': json_file_name,
+                    'openfisca_name': openfisca_name,
+                    'openfisca_value': openfisca_value,
+                    'year': year,
+                    }
+
+
+def validate_fixture(content, year):
+    """Renvoie l'erreur d'un cas type qui ne peut pas être empilé et comparé, ou None."""
+    for code in content['resultat_officiel']:
+        if code != 'TOTPAC' and code not in ignored_codes and code not in openfisca_name_by_code:
+            return u'"code" inconnu : {}'.format(code)
+    test_case_json = content['scenario']['test_case']
+    if len(test_case_json.get('foyers_fiscaux') or []) != 1:
+        return u'le cas type doit contenir exactement un foyer fiscal'
+    error = tax_benefit_system.Scenario.make_json_to_instance(tax_benefit_system = tax_benefit_system)(
+        dict(
+            test_case = test_case_json,
+            year = year,
+            ),
+        state = conv.default_state,
+        )[1]
+    if error is not None:
+        return unicode(error)
+    return None
 
 
 if __name__ == "__main__":
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+
+# OpenFisca -- A versatile microsimulation software
+# By: OpenFisca Team <contact@openfisca.fr>
+#
+# Copyright (C) 2011, 2012, 2013, 2014, 2015 OpenFisca Team
+# https://github.com/openfisca
+#
+# This file is part of OpenFisca.
+#
+# OpenFisca is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# OpenFisca is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import copy
+
+import numpy as np
+
+from ..scripts import rattachement
+from .base import assert_near
+
+
+def compute_irpp_by_foyers_possibles(scenario):
+    """Reference: compute the irpp of each attachment of the young adults in its own simulation."""
+    rattachements_possibles, detachements_impossibles = rattachement.find_rattachements_possibles(scenario)
+    foyers_possibles = rattachement.partiesDe(list(rattachements_possibles))
+    irpp_by_foyers_possibles = []
+    for rattaches in foyers_possibles:
+        foyers_possibles_scenario = scenario.__class__()
+        foyers_possibles_scenario.__dict__ = copy.copy(scenario.__dict__)
+        test_case = foyers_possibles_scenario.test_case = copy.deepcopy(scenario.test_case)
+        test_case['foyers_fiscaux'][0]['personnes_a_charge'] = rattaches + detachements_impossibles
+        for jeune in rattachements_possibles:
+            if jeune not in rattaches:
+                test_case['foyers_fiscaux'].append(dict(
+                    declarants = [jeune],
+                    id = u'foyer-{}'.format(jeune),
+                    personnes_a_charge = [],
+                    ))
+        foyers_possibles_scenario.suggest()
+        irpp_by_foyers_possibles.append(foyers_possibles_scenario.new_simulation().calculate('irpp').sum())
+    return foyers_possibles, np.array(irpp_by_foyers_possibles)
+
+
+def test_split_batched():
+    scenario = rattachement.define_scenario(2014)
+    rattachements_possibles, detachements_impossibles = rattachement.find_rattachements_possibles(scenario)
+    assert rattachements_possibles
+    foyers_possibles, irpp_by_foyers_possibles = compute_irpp_by_foyers_possibles(scenario)
+    assert_near(
+        rattachement.evaluate_foyers_possibles(scenario, foyers_possibles, rattachements_possibles,
+            detachements_impossibles),
+        irpp_by_foyers_possibles,
+        error_margin = 1,
+        )
+    best_index = irpp_by_foyers_possibles.argmax()
+    best_rattaches, best_value = rattachement.split_batched(scenario)
+    assert sorted(best_rattaches) == sorted(foyers_possibles[best_index])
+    assert_near(best_value, irpp_by_foyers_possibles[best_index], error_margin = 1)
+    best_rattaches, best_value = rattachement.split_batched(scenario, pruning = True)
+    assert_near(best_value, irpp_by_foyers_possibles[best_index], error_margin = 1)
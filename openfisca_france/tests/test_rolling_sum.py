@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+
+# OpenFisca -- A versatile microsimulation software
+# By: OpenFisca Team <contact@openfisca.fr>
+#
+# Copyright (C) 2011, 2012, 2013, 2014, 2015 OpenFisca Team
+# https://github.com/openfisca
+#
+# This file is part of OpenFisca.
+#
+# OpenFisca is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# OpenFisca is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from __future__ import division
+
+import datetime
+
+import numpy as np
+from openfisca_core import periods
+
+from ..model.minima_sociaux.base import calculate_rolling_sum
+from .base import assert_near, tax_benefit_system
+
+
+def new_simulation():
+    # Random float32 monthly values, from October 2012 to December 2014
+    random_state = np.random.RandomState(1)
+    gains_exceptionnels = dict(
+        ('{}-{:02d}'.format(year, month), float(random_state.uniform(0, 100000)))
+        for year in (2012, 2013, 2014)
+        for month in range(1, 13)
+        if (year, month) >= (2012, 10)
+        )
+    return tax_benefit_system.new_scenario().init_single_entity(
+        period = 2014,
+        parent1 = dict(
+            birth = datetime.date(1970, 1, 1),
+            gains_exceptionnels = gains_exceptionnels,
+            ),
+        ).new_simulation()
+
+
+def test_rolling_sum_month_by_month():
+    for months_count in (3, 12):
+        simulation = new_simulation()
+        reference_simulation = new_simulation()
+        for month in range(1, 13):
+            period = periods.period('2014-{:02d}'.format(month))
+            window = period.start.period('month', months_count).offset(-months_count)
+            assert_near(
+                calculate_rolling_sum(simulation, 'gains_exceptionnels', period, months_count = months_count),
+                reference_simulation.calculate_add('gains_exceptionnels', window),
+                error_margin = 0.01,
+                )
+
+
+def test_rolling_sum_of_modified_holder():
+    simulation = new_simulation()
+    calculate_rolling_sum(simulation, 'gains_exceptionnels', periods.period('2014-05'))
+    # Value replaced without invalidating the variables depending on it
+    holder = simulation.get_or_new_holder('gains_exceptionnels')
+    holder.set_array(periods.period('2014-04'), np.array([0], dtype = np.float32))
+    assert_near(
+        calculate_rolling_sum(simulation, 'gains_exceptionnels', periods.period('2014-06')),
+        simulation.calculate('gains_exceptionnels', periods.period('2014-03')) +
+        simulation.calculate('gains_exceptionnels', periods.period('2014-05')),
+        error_margin = 0.01,
+        )
+
+
+def test_rolling_sum_of_window_value():
+    simulation = new_simulation()
+    holder = simulation.get_or_new_holder('gains_exceptionnels')
+    holder.set_array(periods.period('2014-07:3'), np.array([900], dtype = np.float32))
+    holder.set_array(periods.period('year:2013-10'), np.array([1200], dtype = np.float32))
+    assert_near(calculate_rolling_sum(simulation, 'gains_exceptionnels', periods.period('2014-10')), 900)
+    assert_near(
+        calculate_rolling_sum(simulation, 'gains_exceptionnels', periods.period('2014-10'), months_count = 12),
+        1200,
+        )
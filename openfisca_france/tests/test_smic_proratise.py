@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+
+# OpenFisca -- A versatile microsimulation software
+# By: OpenFisca Team <contact@openfisca.fr>
+#
+# Copyright (C) 2011, 2012, 2013, 2014, 2015 OpenFisca Team
+# https://github.com/openfisca
+#
+# This file is part of OpenFisca.
+#
+# OpenFisca is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# OpenFisca is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from __future__ import division
+
+import datetime
+
+from openfisca_core import periods
+
+from .base import assert_near, tax_benefit_system
+
+
+def new_simulation(allegement_fillon_mode_recouvrement):
+    year = 2013
+    return tax_benefit_system.new_scenario().init_single_entity(
+        period = year,
+        parent1 = dict(
+            allegement_fillon_mode_recouvrement = allegement_fillon_mode_recouvrement,
+            birth = datetime.date(year - 40, 1, 1),
+            effectif_entreprise = 3000,
+            localisation_entreprise = "75001",
+            salaire_de_base = dict(
+                # SMIC horaire brut 2013 : 9,43 €
+                ('{}-{:02d}'.format(year, month), 35 * 52 / 12 * 9.43)
+                for month in range(1, 13)
+                ),
+            taille_entreprise = 3,
+            type_sal = 0,
+            ),
+        ).new_simulation(debug = True)
+
+
+def test_smic_proratise_annuel():
+    simulation = new_simulation(allegement_fillon_mode_recouvrement = 0)
+    smic_proratise_mensuel = sum(
+        simulation.calculate('smic_proratise', periods.period('2013-{:02d}'.format(month)))
+        for month in range(1, 13)
+        )
+    smic_proratise_annuel = simulation.calculate('smic_proratise', periods.period(2013))
+    assert_near(smic_proratise_annuel, smic_proratise_mensuel, error_margin = 0.01)
+    assert_near(smic_proratise_annuel, 35 * 52 * 9.43, error_margin = 1)
+
+
+def test_allegement_fillon_annuel():
+    # Salaire constant : l'allègement calculé en fin d'année sur les cumuls annuels est égal à 12 fois l'allègement
+    # d'un mois.
+    allegement_fin_d_annee = new_simulation(allegement_fillon_mode_recouvrement = 0).calculate('allegement_fillon',
+        periods.period('2013-12'))
+    allegement_janvier = new_simulation(allegement_fillon_mode_recouvrement = 2).calculate('allegement_fillon',
+        periods.period('2013-01'))
+    assert (allegement_janvier > 0).all()
+    assert_near(allegement_fin_d_annee, 12 * allegement_janvier, error_margin = 0.1)
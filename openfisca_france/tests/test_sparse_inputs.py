@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+
+
+# OpenFisca -- A versatile microsimulation software
+# By: OpenFisca Team <contact@openfisca.fr>
+#
+# Copyright (C) 2011, 2012, 2013, 2014, 2015 OpenFisca Team
+# https://github.com/openfisca
+#
+# This file is part of OpenFisca.
+#
+# OpenFisca is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# OpenFisca is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import numpy as np
+from openfisca_core import periods
+
+from .. import dependency_graph, surveys
+from ..model.sparse_inputs import SparseArray, calculate_sparse, get_sparse_array
+from . import base
+
+
+def test_sparse_array_arithmetic():
+    array1 = np.array([0, 0, 300, 0, 500])
+    array2 = np.array([100, 0, 0, 0, 200])
+    sparse_array1 = SparseArray.from_array(array1)
+    sparse_array2 = SparseArray.from_array(array2)
+    assert sparse_array1.density == 0.4
+    assert (sparse_array1.toarray() == array1).all()
+    for result, expected in (
+            (sparse_array1 + sparse_array2, array1 + array2),
+            (sparse_array1 - sparse_array2, array1 - array2),
+            (sparse_array1 * sparse_array2, array1 * array2),
+            (0.5 * sparse_array1, 0.5 * array1),
+            (1 - sparse_array1, 1 - array1),
+            ):
+        assert isinstance(result, SparseArray)
+        assert (result.toarray() == expected).all(), (result.toarray(), expected)
+    assert (sparse_array1 + array2 == array1 + array2).all()
+
+
+def test_sparse_cerfa_input():
+    year = 2013
+    simulation = base.tax_benefit_system.new_scenario().init_single_entity(
+        period = year,
+        parent1 = dict(),
+        foyer_fiscal = dict(f7ud = 1000),
+        ).new_simulation(debug = True)
+    f7ud_holder = simulation.get_or_new_holder('f7ud')
+    assert f7ud_holder.formula.set_input.__name__ == 'set_input_sparse'
+    assert simulation.calculate('f7ud') == 1000
+    assert simulation.calculate('f7uf') == 0
+
+
+def test_sparse_sum_of_cerfa_boxes():
+    year = 2013
+    period = periods.period(year)
+    simulation = surveys.new_simulation_from_array_dict(
+        array_dict = dict(sali = np.zeros(8)),
+        tax_benefit_system = base.tax_benefit_system,
+        year = year,
+        )
+    fhsa_holder = simulation.get_or_new_holder('fhsa')
+    fhsa_holder.set_input(period, np.array([0, 0, 1000, 0, 0, 0, 0, 0]))
+    fhsb_holder = simulation.get_or_new_holder('fhsb')
+    fhsb_holder.set_input(period, np.array([0, 0, 500, 0, 0, 0, 0, 300]))
+    assert isinstance(get_sparse_array(fhsa_holder, period), SparseArray)
+    assert (simulation.calculate('doment', period) == [0, 0, 1500, 0, 0, 0, 0, 300]).all()
+    # doment adds the boxes without converting them to dense arrays.
+    assert fhsa_holder.get_array(period) is None
+    assert fhsb_holder.get_array(period) is None
+
+
+def test_sparse_input_set_twice():
+    year = 2013
+    period = periods.period(year)
+    simulation = surveys.new_simulation_from_array_dict(
+        array_dict = dict(sali = np.zeros(8)),
+        tax_benefit_system = base.tax_benefit_system,
+        year = year,
+        )
+    fhsa_holder = simulation.get_or_new_holder('fhsa')
+    fhsa_holder.set_input(period, np.array([0, 0, 1000, 0, 0, 0, 0, 0]))
+    assert (simulation.calculate('fhsa', period) == [0, 0, 1000, 0, 0, 0, 0, 0]).all()
+    # Sparse input, after the previous one has been converted to a dense array
+    fhsa_holder.set_input(period, np.array([0, 0, 0, 2000, 0, 0, 0, 0]))
+    dependency_graph.invalidate(simulation, ['fhsa'])
+    assert (simulation.calculate('fhsa', period) == [0, 0, 0, 2000, 0, 0, 0, 0]).all()
+    assert (calculate_sparse(simulation, 'fhsa', period).toarray() == [0, 0, 0, 2000, 0, 0, 0, 0]).all()
+    assert (simulation.calculate('doment', period) == [0, 0, 0, 2000, 0, 0, 0, 0]).all()
+    # Dense input set directly in the holder, after a sparse one
+    fhsa_holder.set_input(period, np.array([0, 0, 1000, 0, 0, 0, 0, 0]))
+    dependency_graph.set_input_and_invalidate(simulation, 'fhsa', np.array([100] * 8, dtype = np.float32))
+    assert (calculate_sparse(simulation, 'fhsa', period).toarray() == 100).all()
+    assert (simulation.calculate('doment', period) == 100).all()
+    # Dense input set through the set input hook, after a sparse one
+    fhsa_holder.set_input(period, np.array([0, 0, 1000, 0, 0, 0, 0, 0]))
+    fhsa_holder.set_input(period, np.arange(8))
+    dependency_graph.invalidate(simulation, ['fhsa'])
+    assert get_sparse_array(fhsa_holder, period) is None
+    assert (calculate_sparse(simulation, 'fhsa', period).toarray() == np.arange(8)).all()
+    assert (simulation.calculate('doment', period) == np.arange(8)).all()
+
+
+def test_sparse_survey_input():
+    year = 2013
+    period = periods.period(year)
+    simulation = surveys.new_simulation_from_array_dict(
+        array_dict = dict(
+            fhsa = np.array([0, 0, 1000, 0, 0, 0, 0, 0]),
+            fhsb = np.ones(8),
+            sali = np.zeros(8),
+            ),
+        tax_benefit_system = base.tax_benefit_system,
+        year = year,
+        )
+    fhsa_holder = simulation.get_or_new_holder('fhsa')
+    assert isinstance(get_sparse_array(fhsa_holder, period), SparseArray)
+    assert fhsa_holder.get_array(period) is None
+    fhsb_holder = simulation.get_or_new_holder('fhsb')
+    assert get_sparse_array(fhsb_holder, period) is None
+    assert fhsb_holder.get_array(period) is not None
+    assert (simulation.calculate('doment', period) == [1, 1, 1001, 1, 1, 1, 1, 1]).all()
+
+
+if __name__ == '__main__':
+    import logging
+    import sys
+
+    logging.basicConfig(level = logging.ERROR, stream = sys.stdout)
+    test_sparse_array_arithmetic()
+    test_sparse_cerfa_input()
+    test_sparse_sum_of_cerfa_boxes()
+    test_sparse_input_set_twice()
+    test_sparse_survey_input()
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+
+
+# OpenFisca -- A versatile microsimulation software
+# By: OpenFisca Team <contact@openfisca.fr>
+#
+# Copyright (C) 2011, 2012, 2013, 2014, 2015 OpenFisca Team
+# https://github.com/openfisca
+#
+# This file is part of OpenFisca.
+#
+# OpenFisca is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# OpenFisca is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from nose.tools import assert_equal, assert_raises
+from openfisca_core import periods
+
+from .. import surveys
+from . import base
+
+
+def build_array_by_name():
+    # A couple with a child, then a single person. Ids are not indexes.
+    ids = np.array([12, 12, 12, 5])
+    roles = np.array([0, 1, 2, 0])
+    return dict(
+        idfam = ids,
+        idfoy = ids,
+        idmen = ids,
+        loyer = np.array([600, 0, 0, 450]),
+        quifam = roles,
+        quifoy = roles,
+        quimen = roles,
+        sali = np.array([30000, 20000, 0, 15000]),
+        )
+
+
+def test_new_simulation_from_arrays():
+    simulation = surveys.new_simulation_from_arrays(
+        array_by_name = build_array_by_name(),
+        period = periods.period(2013),
+        tax_benefit_system = base.tax_benefit_system,
+        )
+    foyers_fiscaux = simulation.entity_by_key_plural['foyers_fiscaux']
+    assert_equal(foyers_fiscaux.count, 2)
+    assert_equal(simulation.persons.count, 4)
+    assert_equal(simulation.calculate('idfoy').tolist(), [0, 0, 0, 1])
+    assert_equal(simulation.calculate('loyer').tolist(), [600, 450])
+    assert_equal(simulation.calculate('irpp').size, 2)
+
+
+def test_new_simulation_from_arrays_without_head():
+    array_by_name = build_array_by_name()
+    array_by_name['quifoy'] = np.array([0, 1, 2, 1])
+    with assert_raises(AssertionError):
+        surveys.new_simulation_from_arrays(
+            array_by_name = array_by_name,
+            period = periods.period(2013),
+            tax_benefit_system = base.tax_benefit_system,
+            )
+
+
+def test_calculate_by_chunks_in_parallel():
+    array_by_name = build_array_by_name()
+    simulation = surveys.new_simulation_from_arrays(
+        array_by_name = array_by_name,
+        period = periods.period(2013),
+        tax_benefit_system = base.tax_benefit_system,
+        )
+    array_by_variable_name = surveys.calculate_by_chunks_in_parallel(
+        array_by_name = array_by_name,
+        chunk_size = 1,
+        period = periods.period(2013),
+        processes_count = 2,
+        tax_benefit_system = base.tax_benefit_system,
+        variables_name = ['irpp', 'revdisp'],
+        )
+    for variable_name, array in array_by_variable_name.iteritems():
+        assert_equal(array.tolist(), simulation.calculate(variable_name).tolist())
+
+
+def test_iter_chunks_persons_index():
+    # Menages 10, 20, 30 and 40, with a foyer fiscal shared by menages 20 and 40.
+    array_by_name = dict(
+        idfam = np.array([1, 1, 2, 3, 4, 4]),
+        idfoy = np.array([1, 1, 7, 3, 7, 4]),
+        idmen = np.array([10, 10, 20, 30, 40, 40]),
+        quimen = np.array([0, 1, 0, 0, 0, 1]),
+        )
+    assert_equal(
+        [persons_index.tolist() for persons_index in surveys.iter_chunks_persons_index(array_by_name, 1)],
+        [[0, 1], [2, 4, 5], [3]],
+        )
+
+
+def test_load_input_arrays_from_npy_directory():
+    directory = tempfile.mkdtemp()
+    try:
+        array_by_name = build_array_by_name()
+        array_by_name['unknown_variable'] = np.zeros(4)
+        for name, array in array_by_name.iteritems():
+            np.save(os.path.join(directory, name + '.npy'), array)
+        loaded_array_by_name = surveys.load_input_arrays(directory, base.tax_benefit_system.column_by_name)
+        assert_equal(sorted(loaded_array_by_name), sorted(set(array_by_name) - set(['unknown_variable'])))
+        assert isinstance(loaded_array_by_name['sali'], np.memmap)
+        assert_equal(loaded_array_by_name['sali'].tolist(), [30000, 20000, 0, 15000])
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_cast_input_array():
+    column = base.tax_benefit_system.column_by_name['sali']
+    array = np.array([30000., 20000.])
+    assert_equal(surveys.cast_input_array('sali', array, column).dtype, column.dtype)
+    with assert_raises(ValueError):
+        surveys.cast_input_array('nbR', np.array([1.5]), base.tax_benefit_system.column_by_name['nbR'])
+    with assert_raises(ValueError):
+        surveys.cast_input_array('sali', np.array([2 ** 40]), column)
+
+
+def test_survey_scenario_from_npy_directory():
+    directory = tempfile.mkdtemp()
+    try:
+        for name, array in build_array_by_name().iteritems():
+            np.save(os.path.join(directory, name + '.npy'), array)
+        survey_scenario = surveys.SurveyScenario()
+        # Use the tax-benefit system as is, because adapt_to_survey requires openfisca-france-data.
+        survey_scenario.input_path = directory
+        survey_scenario.tax_benefit_system = base.tax_benefit_system
+        survey_scenario.year = 2013
+        simulation = survey_scenario.new_simulation()
+        assert survey_scenario.simulation is simulation
+        irpp = simulation.calculate('irpp')
+        survey_scenario.inflate(inflators = [('sali', 2)])
+        assert_equal(simulation.calculate('sali').tolist(), [60000, 40000, 0, 30000])
+        assert (simulation.calculate('irpp') < irpp).all()
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_stream():
+    input_directory = tempfile.mkdtemp()
+    output_directory = tempfile.mkdtemp()
+    try:
+        array_by_name = build_array_by_name()
+        for name, array in array_by_name.iteritems():
+            np.save(os.path.join(input_directory, name + '.npy'), array)
+        survey_scenario = surveys.SurveyScenario()
+        survey_scenario.input_path = input_directory
+        survey_scenario.tax_benefit_system = base.tax_benefit_system
+        # The tax-benefit system has no survey weights: weight the menages by their rent.
+        survey_scenario.weight_column_name_by_entity_symbol = dict(men = 'loyer')
+        survey_scenario.year = 2013
+        aggregate_by_name = survey_scenario.stream(output_dir = output_directory, variables_name = ['revdisp'],
+            chunk_size = 1)
+        revdisp = surveys.new_simulation_from_arrays(
+            array_by_name = array_by_name,
+            period = periods.period(2013),
+            tax_benefit_system = base.tax_benefit_system,
+            ).calculate('revdisp')
+        with open(os.path.join(output_directory, 'aggregates.json')) as aggregates_file:
+            assert_equal(json.load(aggregates_file), aggregate_by_name)
+        assert abs(aggregate_by_name['revdisp'] - (600 * revdisp[0] + 450 * revdisp[1])) < 1
+        for chunk_index, (persons_index, menages_id, chunk_revdisp) in enumerate((
+                # Menages are taken in the order of their ids.
+                ([3], [5], revdisp[1]),
+                ([0, 1, 2], [12], revdisp[0]),
+                )):
+            with np.load(os.path.join(output_directory, 'chunk-{:05d}.npz'.format(chunk_index))) as chunk_file:
+                assert_equal(chunk_file['individus_index'].tolist(), persons_index)
+                assert_equal(chunk_file['menages_id'].tolist(), menages_id)
+                assert_equal(chunk_file['foyers_fiscaux_id'].tolist(), menages_id)
+                assert_equal(chunk_file['revdisp'].tolist(), [chunk_revdisp])
+    finally:
+        shutil.rmtree(input_directory)
+        shutil.rmtree(output_directory)
+
+
+if __name__ == '__main__':
+    import logging
+    import sys
+
+    logging.basicConfig(level = logging.ERROR, stream = sys.stdout)
+    test_new_simulation_from_arrays()
+    test_new_simulation_from_arrays_without_head()
+    test_calculate_by_chunks_in_parallel()
+    test_iter_chunks_persons_index()
+    test_load_input_arrays_from_npy_directory()
+    test_cast_input_array()
+    test_survey_scenario_from_npy_directory()
+    test_stream()
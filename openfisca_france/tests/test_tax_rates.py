@@ -23,7 +23,9 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
+from nose.tools import assert_almost_equal
 from openfisca_core.rates import average_rate, marginal_rate
+from openfisca_france import marginal_rates
 from openfisca_france.tests import base
 
 
@@ -67,9 +69,33 @@ def test_marginal_tax_rate():
         ) == 0).all()
 
 
+def test_marginal_rates_by_perturbation():
+    year = 2013
+    scenario = base.tax_benefit_system.new_scenario().init_single_entity(
+        axes = [
+            dict(
+                count = 5,
+                name = 'sal',
+                max = 100000,
+                min = 10000,
+                ),
+            ],
+        period = year,
+        parent1 = dict(agem = 40 * 12 + 6),
+        )
+    simulation = scenario.new_simulation()
+    rates = marginal_rates.calculate_marginal_rates(simulation, 'sal', delta = 1000)
+    perturbed_simulation = scenario.new_simulation()
+    perturbed_simulation.get_holder('sal').array = simulation.calculate('sal') + 1000
+    expected_rates = 1 - (perturbed_simulation.calculate('revdisp') - simulation.calculate('revdisp')) / 1000.
+    for rate, expected_rate in zip(rates, expected_rates):
+        assert_almost_equal(rate, expected_rate)
+
+
 if __name__ == '__main__':
     import logging
     import sys
     logging.basicConfig(level = logging.ERROR, stream = sys.stdout)
     test_marginal_tax_rate()
     test_average_tax_rate()
+    test_marginal_rates_by_perturbation()
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+
+# OpenFisca -- A versatile microsimulation software
+# By: OpenFisca Team <contact@openfisca.fr>
+#
+# Copyright (C) 2011, 2012, 2013, 2014, 2015 OpenFisca Team
+# https://github.com/openfisca
+#
+# This file is part of OpenFisca.
+#
+# OpenFisca is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# OpenFisca is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from numpy.testing import assert_array_equal
+
+from . import base
+
+
+def check_uniform_short_circuit(axis_name, year):
+    scenario = base.tax_benefit_system.new_scenario().init_single_entity(
+        axes = [
+            dict(
+                count = 10,
+                name = axis_name,
+                max = 20000,
+                min = 0,
+                ),
+            ],
+        period = year,
+        parent1 = dict(sali = 30000),
+        )
+    simulation = scenario.new_simulation()
+    # Formulas are never short-circuited in debug mode.
+    reference_simulation = scenario.new_simulation(debug = True)
+    for name in ('reductions', 'credits_impot', 'irpp'):
+        assert_array_equal(simulation.calculate(name), reference_simulation.calculate(name))
+
+
+def test_uniform_short_circuit():
+    year = 2013
+    for axis_name in ('f7db', 'f7uf', 'f4ba'):
+        yield check_uniform_short_circuit, axis_name, year
+
+
+if __name__ == '__main__':
+    import logging
+    import sys
+
+    logging.basicConfig(level = logging.ERROR, stream = sys.stdout)
+    for function_and_arguments in test_uniform_short_circuit():
+        function_and_arguments[0](*function_and_arguments[1:])
@@ -58,6 +58,12 @@ setup(
         ('share/locale/fr/LC_MESSAGES', ['openfisca_france/i18n/fr/LC_MESSAGES/openfisca-france.mo']),
         ],
     extras_require = dict(
+        hdf5 = [
+            'h5py',
+            ],
+        parquet = [
+            'pyarrow',
+            ],
         tests = [
             'Biryani >= 0.10.1',
             'pandas >= 0.13',